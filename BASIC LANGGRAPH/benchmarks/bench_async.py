@@ -0,0 +1,78 @@
+# benchmarks/bench_async.py
+"""
+Graph runs per second on one event loop with a simulated 200 ms LLM node:
+
+    read_input (plain) -> llm (async, 200 ms) -> validate (plain)
+
+AsyncExecutor.run_many with N concurrent runs vs the synchronous Executor
+(one run at a time). Plain nodes go through the thread pool, so the numbers
+include that hop (--inline calls them on the loop instead). CPU time is
+reported to show the loop stays on one core.
+
+Run from the project root:
+    python benchmarks/bench_async.py --runs 1000 5000 [--inline]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath("."))
+
+from langgraph_module import nodes  # noqa: E402
+from langgraph_module.executor import AsyncExecutor, Executor  # noqa: E402
+from langgraph_module.state import update_state  # noqa: E402
+
+LLM_SECONDS = 0.2
+EDGES = {"read_input": ["llm"], "llm": ["validate"]}
+
+
+async def async_llm(state):
+    await asyncio.sleep(LLM_SECONDS)
+    return update_state(state, answer="Response: LangGraph runs nodes as a graph.")
+
+
+def sync_llm(state):
+    time.sleep(LLM_SECONDS)
+    return update_state(state, answer="Response: LangGraph runs nodes as a graph.")
+
+
+def graph_nodes(llm):
+    return {"read_input": nodes.read_input, "llm": llm, "validate": nodes.validate_answer}
+
+
+async def async_batch(ex, n, concurrency):
+    return await ex.run_many([{"input_text": f"question {i}"} for i in range(n)], concurrency=concurrency)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, nargs="+", default=[100, 1000, 5000])
+    ap.add_argument("--concurrency", type=int, default=None, help="cap on concurrent runs (default: all)")
+    ap.add_argument("--workers", type=int, default=8, help="threads for the plain nodes")
+    ap.add_argument("--inline", action="store_true", help="call the plain nodes on the loop, no thread hop")
+    args = ap.parse_args()
+
+    ex = Executor(graph_nodes(sync_llm), EDGES, entry="read_input")
+    t0 = time.perf_counter()
+    for i in range(5):
+        ex.run({"input_text": f"question {i}"})
+    print(f"Executor, sequential:        {5 / (time.perf_counter() - t0):8.1f} runs/s")
+
+    aex = AsyncExecutor(graph_nodes(async_llm), EDGES, entry="read_input", max_workers=args.workers,
+                        node_timeouts={"llm": 5.0}, inline=["read_input", "validate"] if args.inline else ())
+    try:
+        for n in args.runs:
+            wall0, cpu0 = time.perf_counter(), time.process_time()
+            outs = asyncio.run(async_batch(aex, n, args.concurrency))
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            assert len(outs) == n and all(o["valid"] for o in outs)
+            print(f"AsyncExecutor, {n:>6} runs:  {n / wall:8.1f} runs/s   "
+                  f"wall {wall:6.2f}s   cpu {cpu:6.2f}s ({cpu / wall * 100:3.0f}% of one core)")
+    finally:
+        aex.close()
+
+
+if __name__ == "__main__":
+    main()
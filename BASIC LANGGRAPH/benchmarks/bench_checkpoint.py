@@ -0,0 +1,121 @@
+# benchmarks/bench_checkpoint.py
+"""
+Checkpointing cost and resume on a 50-node chain carrying ~10 MB of retrieved
+documents, each node writing two small keys:
+
+  none           - no checkpointer
+  memory async   - MemoryCheckpointer, records pickled by the writer thread
+  sqlite async   - SqliteCheckpointer (WAL), batched by the writer thread
+  sqlite sync    - SqliteCheckpointer(async_writes=False): pickle + INSERT per node
+
+Reports ms per run (with the trailing flush() timed separately), the overhead
+per checkpointed node (run time over "none" / 50, so the sync figure includes
+writing the initial state inline), and the stored bytes: the 10 MB initial state is written
+once per thread, each node record holds only its delta.
+
+Then runs a chain whose node 40 raises, resumes it and counts the node calls.
+
+Run from the project root:
+    python benchmarks/bench_checkpoint.py --runs 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath("."))
+
+from langgraph_module.checkpoint import MemoryCheckpointer, SqliteCheckpointer  # noqa: E402
+from langgraph_module.executor import Executor  # noqa: E402
+from langgraph_module.state import DeltaState, update_state  # noqa: E402
+
+NODES = 50
+FAIL_AT = 40
+
+
+def docs_10mb():
+    return [{"id": i, "text": f"doc {i} " + "lorem ipsum dolor sit amet " * 190} for i in range(2000)]
+
+
+def chain(calls, fail):
+    names = [f"n{i}" for i in range(NODES)]
+
+    def make(i):
+        def node(state):
+            calls.append(i)
+            if i == FAIL_AT and fail[0]:
+                raise RuntimeError(f"node {i} failed")
+            return update_state(state, **{f"note_{i}": f"node {i} done", "step": i})
+        return node
+
+    nodes = {name: make(i) for i, name in enumerate(names)}
+    edges = {a: [b] for a, b in zip(names, names[1:])}
+    return names, nodes, edges
+
+
+def stored_bytes(cp, thread_id):
+    blobs = [blob for _, blob in cp._read(thread_id)]
+    return len(blobs[0]), sum(map(len, blobs[1:])) / max(len(blobs) - 1, 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+
+    docs = docs_10mb()
+    print(f"{NODES} nodes, docs {sum(len(d['text']) for d in docs) / 1e6:.1f} MB")
+    tmp = tempfile.mkdtemp()
+    calls, fail = [], [False]
+    names, nodes, edges = chain(calls, fail)
+    initial = DeltaState({"input_text": "What is LangGraph?", "docs": docs})
+
+    base_ms = None
+    for label, cp in (("none", None),
+                      ("memory async", MemoryCheckpointer()),
+                      ("sqlite async", SqliteCheckpointer(os.path.join(tmp, "async.sqlite"))),
+                      ("sqlite sync", SqliteCheckpointer(os.path.join(tmp, "sync.sqlite"), async_writes=False))):
+        ex = Executor(nodes, edges, entry=names[0], max_loops=None, checkpointer=cp)
+        thread = None if cp is None else "bench"
+        ex.run(initial, thread_id=thread)
+        run_s = flush_s = 0.0
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            out = ex.run(initial, thread_id=thread)
+            t1 = time.perf_counter()
+            if cp is not None:
+                cp.flush()
+            run_s += t1 - t0
+            flush_s += time.perf_counter() - t1
+        assert out["step"] == NODES - 1
+        ms, flush_ms = run_s / args.runs * 1000, flush_s / args.runs * 1000
+        if cp is None:
+            base_ms = ms
+            print(f"{label:<13} {ms:8.2f} ms/run")
+            continue
+        first, per_node = stored_bytes(cp, thread)
+        print(f"{label:<13} {ms:8.2f} ms/run  {(ms - base_ms) / NODES * 1000:8.1f} us/node overhead  "
+              f"flush {flush_ms:7.2f} ms   initial {first / 1e6:.1f} MB, {per_node:.0f} B/node record")
+        cp.close()
+
+    cp = SqliteCheckpointer(os.path.join(tmp, "resume.sqlite"))
+    ex = Executor(nodes, edges, entry=names[0], max_loops=None, checkpointer=cp)
+    calls.clear()
+    fail[0] = True
+    try:
+        ex.run(initial, thread_id="job")
+    except RuntimeError as exc:
+        print(f"run: {len(calls)} node calls, then {exc}")
+    calls.clear()
+    fail[0] = False
+    t0 = time.perf_counter()
+    out = ex.resume("job")
+    ms = (time.perf_counter() - t0) * 1000
+    assert calls == list(range(FAIL_AT, NODES)) and out["step"] == NODES - 1 and len(out["docs"]) == len(docs)
+    print(f"resume: {len(calls)} node calls (n{calls[0]}..n{calls[-1]}), {ms:.1f} ms incl. loading the log")
+    cp.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/bench_routing.py
+"""
+Dispatch overhead per node hop.
+
+Router-driven loop, every contender carrying the same DeltaState:
+
+    step -> check -(i < N)-> step ...
+                  -(done)--> END
+
+1. a hand-written while loop calling the node functions (the old examples)
+2. a name-keyed dispatcher (nodes/edges/routers looked up by string each hop)
+3. the compiled Executor (integer-indexed tables, router path map)
+
+Static loop step -> check -> step stopped by max_loops, on a plain dict state:
+
+4. the baseline Executor (the original first-successor loop, reproduced here)
+5. the compiled Executor
+
+Run from the project root:
+    python benchmarks/bench_routing.py --hops 100000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath("."))
+
+from langgraph_module.executor import END, Executor  # noqa: E402
+from langgraph_module.state import DeltaState, update_state  # noqa: E402
+
+
+def step(state):
+    return update_state(state, i=state["i"] + 1)
+
+
+def check(state):
+    return state
+
+
+def more(state):
+    return state["i"] < state["n"]
+
+
+def hand_written(state):
+    while True:
+        state = check(step(state))
+        if not more(state):
+            return state
+
+
+def name_keyed(nodes, edges, routers, entry, state):
+    current = entry
+    while current != END:
+        state = nodes[current](state)
+        if current in routers:
+            router, paths = routers[current]
+            current = paths[router(state)]
+        else:
+            current = edges[current][0]
+    return state
+
+
+def baseline_executor(nodes, edges, entry, max_loops, state):
+    """The Executor.run loop this package started from: first successor only, no routers."""
+    state = dict(state)
+    current = entry
+    loop_count = 0
+    while True:
+        if current == END:
+            return state
+        state = nodes[current](state)
+        next_nodes = edges.get(current, [])
+        if not next_nodes:
+            return state
+        if loop_count >= max_loops:
+            state["loop_limit_reached"] = True
+            return state
+        current = next_nodes[0]
+        loop_count += 1
+
+
+def timed(fn, hops, repeat):
+    """Best of `repeat` runs, in us per hop."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+        assert out["i"] == hops // 2
+    return best / hops * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hops", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    state = {"i": 0, "n": args.hops // 2, "docs": ["x" * 100] * 5}
+
+    nodes = {"step": step, "check": check}
+    edges = {"step": ["check"]}
+    routers = {"check": (more, {True: "step", False: END})}
+    ex = Executor(nodes, edges, entry="step", max_loops=None, routers=routers)
+    print("router loop (DeltaState)")
+    for name, fn in (("hand-written loop", lambda: hand_written(DeltaState(dict(state)))),
+                     ("name-keyed dispatch", lambda: name_keyed(nodes, edges, routers, "step", DeltaState(dict(state)))),
+                     ("compiled Executor", lambda: ex.run(DeltaState(dict(state))))):
+        print(f"  {name:<20} {timed(fn, args.hops, args.repeat):6.2f} us/hop")
+
+    static = {"step": ["check"], "check": ["step"]}
+    ex = Executor(nodes, static, entry="step", max_loops=args.hops - 1)
+    print("static loop (max_loops)")
+    for name, fn in (("baseline Executor", lambda: baseline_executor(nodes, static, "step", args.hops - 1, state)),
+                     ("compiled Executor", lambda: ex.run(state))):
+        print(f"  {name:<20} {timed(fn, args.hops, args.repeat):6.2f} us/hop")
+
+
+if __name__ == "__main__":
+    main()
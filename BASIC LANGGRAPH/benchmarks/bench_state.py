@@ -0,0 +1,98 @@
+# benchmarks/bench_state.py
+"""
+Per-node state cost on a 50-node chain carrying ~10 MB of retrieved documents
+plus N small keys, each node writing two keys:
+
+  dict copy  - every node does `state = dict(state)` and returns the new dict
+               (the executor then diffs the whole dict to find the writes)
+  delta      - every node returns `update_state(state, ...)`: one small layer
+               over the shared DeltaState, and the executor reads the delta
+
+Reports ms per run through the Executor, bytes allocated per node (tracemalloc
+peak over a direct call chain) and the memory held by the 50 intermediate
+states when they are all kept (what snapshots / checkpoints retain).
+
+Run from the project root:
+    python benchmarks/bench_state.py --keys 10 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath("."))
+
+from langgraph_module.executor import Executor  # noqa: E402
+from langgraph_module.state import DeltaState, update_state  # noqa: E402
+
+NODES = 50
+
+
+def docs_10mb():
+    return [{"id": i, "text": f"doc {i} " + "lorem ipsum dolor sit amet " * 190} for i in range(2000)]
+
+
+def copy_node(i):
+    def node(state):
+        state = dict(state)
+        state[f"note_{i}"] = f"node {i} done"
+        state["step"] = i
+        return state
+    return node
+
+
+def delta_node(i):
+    def node(state):
+        return update_state(state, **{f"note_{i}": f"node {i} done", "step": i})
+    return node
+
+
+def chain(make):
+    names = [f"n{i}" for i in range(NODES)]
+    nodes = {name: make(i) for i, name in enumerate(names)}
+    edges = {a: [b] for a, b in zip(names, names[1:])}
+    return names, nodes, edges
+
+
+def kept_states_bytes(names, nodes, state):
+    """Memory allocated while running the chain directly and keeping every intermediate state."""
+    tracemalloc.start()
+    kept = []
+    for name in names:
+        state = nodes[name](state)
+        kept.append(state)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, nargs="+", default=[10, 1000, 10000])
+    ap.add_argument("--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    docs = docs_10mb()
+    size = sum(len(d["text"]) for d in docs)
+    print(f"{NODES} nodes, docs {size / 1e6:.1f} MB")
+    for n_keys in args.keys:
+        base = {"input_text": "What is LangGraph?", "docs": docs}
+        base.update({f"meta_{k}": k for k in range(n_keys)})
+        for label, make, initial in (("dict copy", copy_node, lambda: dict(base)),
+                                     ("delta", delta_node, lambda: DeltaState(dict(base)))):
+            names, nodes, edges = chain(make)
+            ex = Executor(nodes, edges, entry=names[0], max_loops=None)
+            ex.run(initial())
+            t0 = time.perf_counter()
+            for _ in range(args.runs):
+                out = ex.run(initial())
+            ms = (time.perf_counter() - t0) / args.runs * 1000
+            assert out["step"] == NODES - 1 and out["docs"] is docs
+            held, peak = kept_states_bytes(names, nodes, initial())
+            print(f"keys={n_keys:<6} {label:<10} {ms:8.2f} ms/run   "
+                  f"{held / NODES / 1024:9.1f} KiB/node kept   {peak / 1024:9.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,32 @@
 # examples/rag_example.py
 from langgraph_module import nodes
+from langgraph_module.executor import END, Executor
 
-def rag_pipeline(query: str, max_refines=2):
-    state = {"input_text": query}
 
-    state = nodes.retriever(state)
-    state = nodes.rag_answer(state)
-    state = nodes.validate_answer(state)
+def refine(state):
+    print("Refining...")
+    return nodes.enrich_tool(state)
+
 
-    refines = 0
-    while not state["valid"] and refines < max_refines:
-        print("Refining...")
-        state = nodes.enrich_tool(state)
-        state = nodes.rag_answer(state)
-        state = nodes.validate_answer(state)
-        refines += 1
+def rag_graph(max_refines=2):
+    # retriever -> rag_answer -> validate -(not valid)-> refine -> rag_answer ...
+    return Executor(
+        nodes={
+            "retriever": nodes.retriever,
+            "rag_answer": nodes.rag_answer,
+            "validate": nodes.validate_answer,
+            "refine": refine,
+        },
+        edges={"retriever": ["rag_answer"], "rag_answer": ["validate"], "refine": ["rag_answer"]},
+        routers={"validate": (lambda state: state["valid"], {True: END, False: "refine"})},
+        edge_budgets={("validate", "refine"): max_refines},
+        entry="retriever",
+        max_loops=None,
+    )
 
+
+def rag_pipeline(query: str, max_refines=2):
+    state = rag_graph(max_refines).run({"input_text": query})
     return {"answer": state["answer"], "valid": state["valid"]}
 
 
@@ -1,26 +1,29 @@
 # examples/simple_example.py
 from langgraph_module import nodes
+from langgraph_module.executor import Executor
 
-def run():
-    state = {"input_text": "Explain LangGraph."}
-
-    state = nodes.read_input(state)
+# read_input -> summarize -(needs_tool)-> enrich -> summarize ... -> finalize
+graph = Executor(
+    nodes={
+        "read_input": nodes.read_input,
+        "summarize": nodes.summarize_node,
+        "enrich": nodes.enrich_tool,
+        "finalize": nodes.finalize,
+    },
+    edges={"read_input": ["summarize"], "enrich": ["summarize"]},
+    routers={"summarize": (lambda state: bool(state.get("needs_tool")), {True: "enrich", False: "finalize"})},
+    edge_budgets={("summarize", "enrich"): 2},
+    entry="read_input",
+    max_loops=None,
+)
 
-    loops = 0
-    while True:
-        state = nodes.summarize_node(state)
 
-        if state.get("needs_tool"):
-            if loops >= 2:
-                print("Stopped due to loop limit")
-                break
-            state = nodes.enrich_tool(state)
-            loops += 1
-            continue
-
-        out = nodes.finalize(state)
-        print("Result:", out)
-        break
+def run():
+    out = graph.run({"input_text": "Explain LangGraph."})
+    if out.get("loop_limit_reached"):
+        print("Stopped due to loop limit")
+        return
+    print("Result:", out)
 
 
 if __name__ == "__main__":
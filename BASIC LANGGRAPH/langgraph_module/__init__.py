@@ -6,7 +6,7 @@ Keep imports explicit so `from langgraph_module import executor, nodes` works ni
 """
 
 
-from . import nodes, executor
+from . import nodes, executor, state, checkpoint
 
 
-__all__ = ["nodes", "executor"]
\ No newline at end of file
+__all__ = ["nodes", "executor", "state", "checkpoint"]
\ No newline at end of file
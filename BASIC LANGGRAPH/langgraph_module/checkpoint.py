@@ -0,0 +1,228 @@
+# langgraph_module/checkpoint.py
+"""
+Checkpoints for Executor runs, so a failed run can resume without repeating
+the nodes that already succeeded (e.g. a costly rag_answer).
+
+A thread's checkpoint log is its initial state plus one record per finished
+node: the node's key (name, branch path, hop) and its delta (changed keys and
+removed keys), pickled. Executor.resume(thread_id) re-runs the graph and, for
+every node with a record, applies the recorded delta instead of calling the
+node, so the schedule (routers, joins, budgets) is rebuilt exactly and only the
+failed node and what follows it run again.
+
+    ex = Executor(nodes, edges, entry="retriever", checkpointer=SqliteCheckpointer("runs.sqlite"))
+    ex.run({"input_text": "..."}, thread_id="job-42")   # raises in validate
+    ex.resume("job-42")                                  # retriever / rag_answer are not called again
+
+Writes are queued to a background thread (serialization included), so the
+executor only pays for an enqueue per node; flush() waits for the queue, and
+load() flushes first. close() (or leaving a `with` block) stops the writer.
+
+A finished thread's log stays until delete(thread_id), so it can still be
+inspected or replayed; with clear_on_success=True it is dropped as soon as a
+run or resume of that thread succeeds. Nodes must not mutate state values in place (the
+DeltaState contract), since records are pickled after the node returns.
+"""
+import atexit
+import pickle
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+_INITIAL = 0  # seq of the initial-state record
+_STOP = object()  # queued by close() to stop the writer thread
+
+NodeKey = Tuple[str, tuple, int]  # (node name, branch path, hop)
+
+
+class Checkpointer:
+    """
+    Base class: queues records and writes them in batches from a writer thread
+    (or inline with async_writes=False). Backends implement _write(batch), whose
+    items are ("put", thread_id, seq, blob) or ("delete", thread_id), and
+    _read(thread_id) -> [(seq, blob)] in seq order.
+    """
+
+    def __init__(self, async_writes: bool = True, clear_on_success: bool = False):
+        self.async_writes = async_writes
+        self.clear_on_success = clear_on_success
+        self.closed = False
+        self._queue: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._writer = None
+        if async_writes:
+            self._writer = threading.Thread(target=self._drain, name="checkpoint-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.flush)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- executor API --------------------------------------------------------
+    def begin(self, thread_id: str, initial_state: Dict[str, Any]):
+        """Start a fresh log for thread_id (replacing an old one)."""
+        self._submit(("delete", thread_id))
+        self._submit(("put", thread_id, _INITIAL, ("initial", dict(initial_state))))
+
+    def put(self, thread_id: str, seq: int, key: NodeKey, changes: Dict[str, Any], removed: List[str]):
+        self._submit(("put", thread_id, seq, ("node", key, changes, removed)))
+
+    def end(self, thread_id: str):
+        """Called by the executor when a run of thread_id succeeded."""
+        if self.clear_on_success:
+            self.delete(thread_id)
+
+    def delete(self, thread_id: str):
+        """Drop thread_id's log (its initial state and node records)."""
+        self._submit(("delete", thread_id))
+
+    def load(self, thread_id: str) -> Optional[Tuple[Dict[str, Any], Dict[NodeKey, tuple], int]]:
+        """(initial state, {node key: (changes, removed)}, last seq) or None for an unknown thread."""
+        self.flush()
+        initial, records, last = None, {}, _INITIAL
+        for seq, blob in self._read(thread_id):
+            record = pickle.loads(blob)
+            if record[0] == "initial":
+                initial = record[1]
+            else:
+                records[record[1]] = (record[2], record[3])
+            last = max(last, seq)
+        if initial is None:
+            return None
+        return initial, records, last
+
+    def flush(self):
+        """Wait until every queued record is written; re-raise a writer error."""
+        if self.async_writes:
+            self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """Write what is queued, then stop the writer thread. Idempotent."""
+        if self.closed:
+            return
+        self.closed = True
+        if self._writer is not None:
+            atexit.unregister(self.flush)
+            self._queue.put(_STOP)
+            self._writer.join()
+        self.flush()
+
+    # ---- writer --------------------------------------------------------------
+    def _submit(self, item):
+        if self.closed:
+            raise ValueError("checkpointer is closed")
+        if self._error is not None:
+            self.flush()
+        if self.async_writes:
+            self._queue.put(item)
+        else:
+            self._write([self._encode(item)])
+
+    @staticmethod
+    def _encode(item):
+        if item[0] == "put":
+            return ("put", item[1], item[2], pickle.dumps(item[3], protocol=PROTOCOL))
+        return item
+
+    def _drain(self):
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is _STOP:  # close() queues it last
+                batch.pop()
+                self._queue.task_done()
+                stop = True
+            try:
+                if batch:
+                    self._write([self._encode(item) for item in batch])
+            except BaseException as exc:  # surfaced by the next flush()
+                self._error = exc
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ---- backend -------------------------------------------------------------
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _read(self, thread_id: str):
+        raise NotImplementedError
+
+
+class MemoryCheckpointer(Checkpointer):
+    """Keeps the pickled records in a dict: survives node failures, not process exits."""
+
+    def __init__(self, async_writes: bool = True, clear_on_success: bool = False):
+        self._logs: Dict[str, Dict[int, bytes]] = {}
+        self._lock = threading.Lock()
+        super().__init__(async_writes, clear_on_success)
+
+    def _write(self, batch):
+        with self._lock:
+            for item in batch:
+                if item[0] == "delete":
+                    self._logs.pop(item[1], None)
+                else:
+                    _, thread_id, seq, blob = item
+                    self._logs.setdefault(thread_id, {})[seq] = blob
+
+    def _read(self, thread_id):
+        with self._lock:
+            return sorted(self._logs.get(thread_id, {}).items())
+
+
+class SqliteCheckpointer(Checkpointer):
+    """Records in one SQLite table (WAL mode); each writer batch is one transaction."""
+
+    def __init__(self, path: str = "checkpoints.sqlite", async_writes: bool = True,
+                 clear_on_success: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                blob BLOB NOT NULL,
+                PRIMARY KEY (thread_id, seq)
+            )""")
+        self._conn.commit()
+        super().__init__(async_writes, clear_on_success)
+
+    def _write(self, batch):
+        with self._lock, self._conn:
+            for item in batch:
+                if item[0] == "delete":
+                    self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (item[1],))
+                else:
+                    _, thread_id, seq, blob = item
+                    self._conn.execute("INSERT OR REPLACE INTO checkpoints (thread_id, seq, blob) VALUES (?, ?, ?)",
+                                       (thread_id, seq, blob))
+
+    def _read(self, thread_id):
+        with self._lock:
+            return self._conn.execute("SELECT seq, blob FROM checkpoints WHERE thread_id = ? ORDER BY seq",
+                                      (thread_id,)).fetchall()
+
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        with self._lock:
+            self._conn.close()
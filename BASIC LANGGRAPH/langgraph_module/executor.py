@@ -1,37 +1,676 @@
 # langgraph_module/executor.py
-from typing import Dict, List, Callable, Any
+"""
+Tiny graph runner.
+
+Edges are either static (`edges[node]` lists the successors) or conditional
+(`routers[node] = (router, paths)`: `router(state)` returns a key of `paths`,
+or a list of keys, and `paths` maps each key to the next node or END). A
+`paths` list means the router returns node names directly.
+
+Every chosen successor runs: a node with several successors forks the run into
+parallel branches (on a thread pool), and a node with several predecessors is a
+merge node that waits for every branch that can still reach it, then runs once
+on the joined state.
+
+Joining: keys written by only one branch take that branch's value. A key
+written by several branches is combined with `reducers[key](left, right)`,
+folded in edge declaration order, so the result does not depend on which
+branch finished first; without a reducer the conflict raises ValueError.
+
+    ex = Executor(nodes, edges={"start": ["retrieve", "pre_summary"],
+                                "retrieve": ["answer"], "pre_summary": ["answer"]},
+                  entry="start", reducers={"notes": operator.add})
+    state = ex.run({"input_text": "..."})
+
+    ex = Executor(nodes, edges={"read_input": ["summarize"], "enrich": ["summarize"]},
+                  routers={"summarize": (lambda s: s["needs_tool"], {True: "enrich", False: "finalize"})},
+                  entry="read_input", max_loops=None, edge_budgets={("summarize", "enrich"): 2})
+
+The graph is compiled once in the constructor into integer-indexed tables and
+validated: unknown nodes and unreachable nodes raise ValueError, and so do nodes
+that can never reach an exit (END or a node without successors) unless
+max_loops bounds the run (they are listed in `ex.no_exit`). Executor.run follows
+the first branch straight off those tables, on the state exactly as the caller
+passed it (a plain dict is copied once and stays a dict), and only builds the
+fork/join scheduler, which works on DeltaStates, when the run forks (or when it
+is checkpointed).
+
+`max_loops` bounds the number of hops each branch may take (None: no bound) and
+`edge_budgets[(src, dst)]` how often a branch may take one edge; a branch that
+hits either stops with `loop_limit_reached=True` in its state. That flag has a
+built-in `operator.or_` reducer, so branches that stop in parallel always join.
+
+With a `checkpointer` (langgraph_module.checkpoint), `run(state, thread_id=...)`
+records every finished node's delta off the critical path, and
+`resume(thread_id)` re-runs the thread, reusing recorded node outputs so only
+the failed node and what follows it execute again. A successful run tells the
+checkpointer it ended (which drops the log with `clear_on_success=True`).
+
+State flows between parallel or checkpointed nodes as a copy-on-write DeltaState
+(langgraph_module.state), and between the nodes of a lone branch as whatever
+run() was given: pass a DeltaState for large states, so each node stores only
+the keys it changed. Nodes written with update_state(state, ...) work on both; a
+node can also return a plain dict (the full new state, compared by identity).
+run() returns a plain dict.
+
+DeltaStates reject in-place writes (`state[k] = v; return state`). With
+`in_place_writes=True` every node gets a writable layer over its input instead,
+so such nodes keep working: their writes land in that layer's own delta.
+
+AsyncExecutor runs the same graphs on an asyncio loop: `async def` nodes are
+awaited, plain nodes run in a thread pool, and many runs can share one loop.
+"""
+import asyncio
+import inspect
+import operator
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import reduce
+from itertools import count
+from collections.abc import Mapping
+from typing import Dict, List, Callable, Any, Iterable, Optional, Sequence, Tuple, Union
+
+from .state import DeltaState, as_state
 
 END = "__END__"
+_END = -1            # END in the compiled tables
+_MISSING = object()  # value of a key a node removed from the state
+
+Paths = Union[Dict[Any, str], Sequence[str]]
+
+
+def _not_a_state(name: str, out) -> TypeError:
+    return TypeError(f"node {name!r} returned {type(out).__name__}, expected the new state (a mapping)")
+
+
+def _plain(state: Mapping, **changes) -> Dict[str, Any]:
+    """The result of a run: a plain dict copy of `state` with `changes` applied."""
+    out = state.to_dict() if isinstance(state, DeltaState) else dict(state)
+    out.update(changes)
+    return out
+
+
+def _writable_input(fn: Callable) -> Callable:
+    """`fn` called on a writable layer over its DeltaState input, frozen once it returns."""
+    if inspect.iscoroutinefunction(fn):
+        async def node(state):
+            if not isinstance(state, DeltaState):
+                return await fn(state)
+            draft = state.writable()
+            try:
+                return await fn(draft)
+            finally:
+                draft.freeze()
+    else:
+        def node(state):
+            if not isinstance(state, DeltaState):
+                return fn(state)  # a lone branch's own dict
+            draft = state.writable()
+            try:
+                return fn(draft)
+            finally:
+                draft.freeze()
+    return node
+
+
+class _Token:
+    """One branch of a run: the node it is about to run and the state it carries."""
+    __slots__ = ("node", "state", "stamps", "head", "path", "hops", "counts")
+
+    def __init__(self, node, state, stamps, head, path, hops, counts):
+        self.node = node        # compiled node index (_END once the branch finished)
+        self.state = state
+        self.stamps = stamps    # DeltaState: key -> id of the node execution that last wrote it
+        self.head = head        # id of the last node execution this branch has seen
+        self.path = path        # branch indices from the entry; orders joins deterministically
+        self.hops = hops
+        self.counts = counts    # times each budgeted edge was taken
+
+
+class _Run:
+    """
+    Scheduling state of one Executor run, independent of how nodes are executed.
+    start() and finish() return the tokens that are ready to run; result() joins
+    the finished branches once nothing is left in flight.
+
+    With a checkpointer, every finished node is recorded under thread_id; nodes
+    found in `replay` (recorded by an earlier attempt) are finished from their
+    recorded delta as soon as they become ready, without being returned.
+    """
+
+    def __init__(self, graph: "Executor", thread_id: Optional[str] = None,
+                 replay: Optional[Dict[Tuple[str, tuple, int], tuple]] = None, seq: int = 0):
+        self.graph = graph
+        self.thread_id = thread_id if graph.checkpointer is not None else None
+        self.replay = replay or {}
+        self.seq = count(seq + 1)
+        self.events = count(1)
+        self.parents: Dict[int, Tuple[int, ...]] = {}  # event -> the events it followed
+        self.waiting: Dict[int, List[_Token]] = {}
+        self.in_flight: List[_Token] = []
+        self.done: List[_Token] = []
+
+    def start(self, initial_state: Dict[str, Any]) -> List[_Token]:
+        token = _Token(self.graph.entry_index, as_state(initial_state), DeltaState(), 0, (), 0,
+                       (0,) * len(self.graph.budgets))
+        return self._replayed(self._schedule(self._arrive([token])))
+
+    def finish(self, token: _Token, out: Mapping) -> List[_Token]:
+        """Record a node's output and return the tokens it made ready."""
+        return self._replayed(self._finish(token, out, record=True))
+
+    def _finish(self, token: _Token, out: Mapping, record: bool, targets=None) -> List[_Token]:
+        g = self.graph
+        self.in_flight.remove(token)
+        event = self._event(token.head)
+        out, written = self._written(token, out)
+        if record and self.thread_id is not None:
+            changes = {k: out[k] for k in written if k in out}
+            g.checkpointer.put(self.thread_id, next(self.seq), self._key(token), changes,
+                               [k for k in written if k not in changes])
+        stamps = token.stamps.with_changes(dict.fromkeys(written, event)) if written else token.stamps
+        if targets is None:
+            targets = g.succ[token.node] if g.routes[token.node] is None else g.route(token.node, out)
+        if not targets:
+            self.done.append(_Token(_END, out, stamps, event, token.path, token.hops, token.counts))
+            return self._schedule([])
+        if g.max_loops is not None and token.hops >= g.max_loops:
+            self._stop(out, stamps, event, token.path, token)
+            return self._schedule([])
+        fork = len(targets) > 1
+        children = []
+        for i, (dst, slot) in enumerate(targets):
+            path = token.path + (i,) if fork else token.path
+            counts = token.counts
+            if slot >= 0:
+                if counts[slot] >= g.budgets[slot]:
+                    self._stop(out, stamps, event, path, token)
+                    continue
+                counts = counts[:slot] + (counts[slot] + 1,) + counts[slot + 1:]
+            children.append(_Token(dst, out, stamps, event, path, token.hops + 1, counts))
+        return self._schedule(self._arrive(children))
+
+    def result(self) -> Dict[str, Any]:
+        return self._join(sorted(self.done, key=lambda t: t.path), "end of run").state.to_dict()
+
+    # ---- internals ---------------------------------------------------------
+    def _key(self, token: _Token) -> Tuple[str, tuple, int]:
+        """Identifies a node execution across attempts (the schedule is deterministic)."""
+        return self.graph.names[token.node], token.path, token.hops
+
+    def _replayed(self, ready: List[_Token]) -> List[_Token]:
+        """Finish the ready tokens that have a recorded output; return the ones that must run."""
+        if not self.replay:
+            return ready
+        runnable = []
+        pending = list(ready)
+        while pending:
+            token = pending.pop(0)
+            recorded = self.replay.pop(self._key(token), None)
+            if recorded is None:
+                runnable.append(token)
+            else:
+                changes, removed = recorded
+                pending += self._finish(token, token.state.with_changes(changes).delete(*removed), record=False)
+        return runnable
+
+    def _event(self, *parents: int) -> int:
+        event = next(self.events)
+        self.parents[event] = parents
+        return event
+
+    def _seen(self, event: int, head: int) -> bool:
+        """True if `event` is `head` or one of its ancestors (ids grow along every lineage)."""
+        stack, visited = [head], set()
+        while stack:
+            e = stack.pop()
+            if e == event:
+                return True
+            if e > event and e not in visited:
+                visited.add(e)
+                stack.extend(self.parents[e])
+        return False
+
+    def _written(self, token: _Token, out) -> Tuple[DeltaState, List[Any]]:
+        """The node output as a DeltaState and the keys it wrote relative to the node's input."""
+        before = token.state
+        if isinstance(out, DeltaState):
+            changes = out.changes_since(before)
+            if changes is not None:
+                return out, list(changes)
+        elif not isinstance(out, Mapping):
+            raise _not_a_state(self.graph.names[token.node], out)
+        else:
+            out = DeltaState(out)
+        # a full new state: compare by identity
+        old, new = before.flat(), out.flat()
+        written = [k for k, v in new.items() if old.get(k, _MISSING) is not v]
+        written += [k for k in old if k not in new]
+        return out, written
+
+    def _stop(self, out, stamps, head, path, token):
+        """Finish a branch that ran out of hops or edge budget."""
+        event = self._event(head)
+        self.done.append(_Token(_END, out.set(loop_limit_reached=True), stamps.set(loop_limit_reached=event),
+                                event, path, token.hops, token.counts))
+
+    def _arrive(self, tokens: List[_Token]) -> List[_Token]:
+        ready = []
+        is_merge = self.graph.is_merge
+        for token in tokens:
+            if token.node == _END:
+                self.done.append(token)
+            elif is_merge[token.node]:
+                self.waiting.setdefault(token.node, []).append(token)
+            else:
+                ready.append(token)
+        return ready
+
+    def _blocked(self, node: int, others: List[_Token]) -> bool:
+        """True while another live branch can still reach the merge node."""
+        reach = self.graph.reach
+        bit = 1 << node
+        if any(reach[t.node] & bit for t in others):
+            return True
+        return any(reach[n] & bit for n, ts in self.waiting.items() if ts and n != node)
+
+    def _schedule(self, ready: List[_Token]) -> List[_Token]:
+        while self.waiting:
+            released = False
+            for node in sorted(self.waiting):
+                if self.waiting.get(node) and not self._blocked(node, self.in_flight + ready):
+                    ready.append(self._release(node))
+                    released = True
+            if ready or released or self.in_flight:
+                break
+            # every live branch waits on another merge node: release the first declared one
+            ready.append(self._release(min(self.waiting)))
+        self.in_flight.extend(ready)
+        return ready
+
+    def _release(self, node: int) -> _Token:
+        tokens = sorted(self.waiting.pop(node), key=lambda t: t.path)
+        token = self._join(tokens, self.graph.names[node])
+        token.node = node
+        return token
+
+    def _join(self, tokens: List[_Token], where: str) -> _Token:
+        if len(tokens) == 1:
+            return tokens[0]
+        first = tokens[0]
+        event = self._event(*(t.head for t in tokens))
+        changes, removed, stamps = {}, [], {}
+        keys = set().union(*(t.stamps for t in tokens))
+        for key in sorted(keys, key=str):
+            live = {}
+            for t in tokens:
+                ev = t.stamps.get(key)
+                if ev is None or ev in live:
+                    continue
+                # superseded when another branch saw this write and overwrote it
+                if any(o.stamps.get(key) != ev and self._seen(ev, o.head) for o in tokens):
+                    continue
+                live[ev] = t.state.get(key, _MISSING)
+            values = list(live.values())
+            if len(values) == 1:
+                value, stamps[key] = values[0], next(iter(live))
+            else:
+                reducer = self.graph.reducers.get(key)
+                if reducer is None or any(v is _MISSING for v in values):
+                    raise ValueError(f"parallel branches wrote state key {key!r} (joined at {where!r}) "
+                                     f"and no reducer is declared for it")
+                value = reduce(reducer, values)
+                stamps[key] = event
+            if value is _MISSING:
+                removed.append(key)
+            elif first.state.get(key, _MISSING) is not value:
+                changes[key] = value
+        state = first.state.with_changes(changes).delete(*removed)
+        stamps = first.stamps.with_changes({k: v for k, v in stamps.items() if first.stamps.get(k) != v})
+        counts = tuple(max(c) for c in zip(*(t.counts for t in tokens)))
+        return _Token(first.node, state, stamps, event, first.path, max(t.hops for t in tokens), counts)
 
 
 class Executor:
-    def __init__(self, nodes: Dict[str, Callable], edges: Dict[str, List[str]], entry: str, max_loops: int = 3):
+    def __init__(self, nodes: Dict[str, Callable], edges: Optional[Dict[str, List[str]]], entry: str,
+                 max_loops: Optional[int] = 3, reducers: Optional[Dict[str, Callable[[Any, Any], Any]]] = None,
+                 max_workers: Optional[int] = None,
+                 routers: Optional[Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Paths]]] = None,
+                 edge_budgets: Optional[Dict[Tuple[str, str], int]] = None, checkpointer=None,
+                 in_place_writes: bool = False):
         self.nodes = nodes
-        self.edges = edges
+        self.edges = edges or {}
+        self.routers = routers or {}
         self.entry = entry
         self.max_loops = max_loops
+        self.reducers = {"loop_limit_reached": operator.or_, **(reducers or {})}
+        self.max_workers = max_workers
+        self.edge_budgets = edge_budgets or {}
+        self.checkpointer = checkpointer
+        self.in_place_writes = in_place_writes
+        self._compile()
+
+    # ---- compilation -------------------------------------------------------
+    def _compile(self):
+        """Build the integer-indexed tables the run loop dispatches on, and validate the graph."""
+        self.names = list(self.nodes)
+        index = {name: i for i, name in enumerate(self.names)}
+        index[END] = _END
+
+        def resolve(name, where):
+            if name not in index:
+                raise ValueError(f"{where} refers to unknown node {name!r}")
+            return index[name]
+
+        if self.entry not in self.nodes:
+            raise ValueError(f"entry node {self.entry!r} is not in nodes")
+        for src in self.edges:
+            resolve(src, "edges")
+            if src in self.routers:
+                raise ValueError(f"node {src!r} has both static edges and a router")
+        for src in self.routers:
+            resolve(src, "routers")
+
+        # every declared edge (static or a router target) -> budget slot, or -1 when unbudgeted
+        declared = {}
+        for src, dsts in self.edges.items():
+            for dst in dsts:
+                declared[(src, dst)] = -1
+        router_paths = {}
+        for src, (_, paths) in self.routers.items():
+            router_paths[src] = paths if isinstance(paths, dict) else {name: name for name in paths}
+            for dst in router_paths[src].values():
+                declared[(src, dst)] = -1
+        self.budgets: List[int] = []
+        for (src, dst), limit in self.edge_budgets.items():
+            if (src, dst) not in declared:
+                raise ValueError(f"edge budget for undeclared edge {src!r} -> {dst!r}")
+            declared[(src, dst)] = len(self.budgets)
+            self.budgets.append(limit)
 
-    def run(self, initial_state: Dict[str, Any] = None) -> Dict[str, Any]:
-        state = dict(initial_state or {})
-        current = self.entry
-        loop_count = 0
+        n = len(self.names)
+        self.entry_index = index[self.entry]
+        self.fns = [self.nodes[name] for name in self.names]
+        if self.in_place_writes:
+            self.fns = [_writable_input(fn) for fn in self.fns]
+        self.succ: List[Tuple[Tuple[int, int], ...]] = [()] * n
+        self.routes: List[Optional[Tuple[Callable, Dict[Any, Tuple[Tuple[int, int], ...]]]]] = [None] * n
+        targets: List[set] = [set() for _ in range(n)]
+        for src, dsts in self.edges.items():
+            s = index[src]
+            self.succ[s] = tuple((resolve(dst, f"edges[{src!r}]"), declared[(src, dst)]) for dst in dsts)
+            targets[s].update(d for d, _ in self.succ[s])
+        for src, (router, _) in self.routers.items():
+            s = index[src]
+            table = {key: ((resolve(dst, f"routers[{src!r}]"), declared[(src, dst)]),)
+                     for key, dst in router_paths[src].items()}
+            self.routes[s] = (router, table)
+            targets[s].update(t[0][0] for t in table.values())
+        # per node for the lone branch: (fn, the successor when the only edge is static and
+        # unbudgeted, router, router choice -> node index while no path is budgeted)
+        self.lone_steps = []
+        for s in range(n):
+            fn, dsts, route = self.fns[s], self.succ[s], self.routes[s]
+            if route is None:
+                plain = dsts[0][0] if len(dsts) == 1 and dsts[0][1] < 0 else None
+                self.lone_steps.append((fn, plain, None, None))
+            else:
+                router, table = route
+                direct = {key: t[0][0] for key, t in table.items()}
+                if any(t[0][1] >= 0 for t in table.values()):
+                    direct = {}
+                self.lone_steps.append((fn, None, router, direct))
 
+        preds = [0] * n
+        for s in range(n):
+            for d in targets[s]:
+                if d != _END:
+                    preds[d] += 1
+        self.is_merge = [p > 1 for p in preds]
+        self.reach = [0] * n  # bitmask of the nodes reachable through at least one edge
+        for s in range(n):
+            seen, stack = 0, [d for d in targets[s] if d != _END]
+            while stack:
+                d = stack.pop()
+                if not seen >> d & 1:
+                    seen |= 1 << d
+                    stack.extend(x for x in targets[d] if x != _END)
+            self.reach[s] = seen
+
+        reachable = self.reach[self.entry_index] | 1 << self.entry_index
+        unreachable = [self.names[i] for i in range(n) if not reachable >> i & 1]
+        if unreachable:
+            raise ValueError(f"nodes unreachable from {self.entry!r}: {unreachable}")
+        exits = 0
+        for s in range(n):
+            if not targets[s] or _END in targets[s]:
+                exits |= 1 << s
+        # without max_loops nothing would stop a branch that enters these
+        self.no_exit = [self.names[i] for i in range(n) if not (exits >> i & 1 or self.reach[i] & exits)]
+        if self.no_exit and self.max_loops is None:
+            raise ValueError(f"nodes that can never reach END or a terminal node (cycle without exit): {self.no_exit}")
+
+    def route(self, node: int, state: Dict[str, Any]) -> Tuple[Tuple[int, int], ...]:
+        """Targets (node index, budget slot) chosen by the router of compiled node `node`."""
+        router, table = self.routes[node]
+        return self._route_choice(node, table, router(state))
+
+    def _route_choice(self, node: int, table, choice) -> Tuple[Tuple[int, int], ...]:
+        try:
+            return table[choice]
+        except (KeyError, TypeError):
+            pass
+        try:
+            if isinstance(choice, (list, tuple)):
+                return tuple(t for key in choice for t in table[key])
+        except (KeyError, TypeError):
+            pass
+        raise ValueError(f"router of {self.names[node]!r} returned {choice!r}; "
+                         f"expected one of {list(table)}")
+
+    def _new_run(self, initial_state, thread_id, resume):
+        """(_Run, initial state) for a fresh run, or for resuming thread_id from its checkpoints."""
+        if thread_id is not None and self.checkpointer is None:
+            raise ValueError("thread_id needs an Executor with a checkpointer")
+        if not resume:
+            if thread_id is not None:
+                self.checkpointer.begin(thread_id, initial_state or {})
+            return _Run(self, thread_id), initial_state
+        loaded = self.checkpointer.load(thread_id)
+        if loaded is None:
+            raise KeyError(f"no checkpoints for thread {thread_id!r}")
+        initial_state, replay, seq = loaded
+        return _Run(self, thread_id, replay, seq), initial_state
+
+    def _result(self, run: _Run, thread_id: Optional[str]) -> Dict[str, Any]:
+        result = run.result()
+        if thread_id is not None:
+            self.checkpointer.end(thread_id)
+        return result
+
+    def resume(self, thread_id: str) -> Dict[str, Any]:
+        """Finish a checkpointed run: recorded nodes are not called again."""
+        return self.run(thread_id=thread_id, _resume=True)
+
+    def _run_lone(self, initial_state):
+        """
+        Run the branch a run starts with straight off the compiled tables, without the
+        scheduler's tokens, stamps and events, and on the state as given: a plain dict
+        is copied once and passed on as returned, never wrapped in a DeltaState.
+        Returns (result, None, None) when the run ends on this branch, or (None, run,
+        ready) once it forks: the fork is handed to a _Run (stamps can start empty
+        there, since every branch shares the earlier writes).
+        """
+        succ, routes, budgets, steps = self.succ, self.routes, self.budgets, self.lone_steps
+        limit = sys.maxsize if self.max_loops is None else self.max_loops
+        end, delta_state = _END, DeltaState
+        state = initial_state if isinstance(initial_state, DeltaState) else dict(initial_state or {})
+        node, hops, counts = self.entry_index, 0, [0] * len(budgets)
         while True:
-            if current == END:
-                return state
+            fn, dst, router, direct = steps[node]
+            out = fn(state)
+            kind = type(out)
+            if kind is not dict and kind is not delta_state and not isinstance(out, Mapping):
+                raise _not_a_state(self.names[node], out)
+            if router is not None:
+                choice = router(out)
+                try:
+                    dst = direct[choice]
+                except (KeyError, TypeError):
+                    targets = self._route_choice(node, routes[node][1], choice)
+            elif dst is None:
+                targets = succ[node]
+            if dst is not None:
+                # one unbudgeted successor: no target tuples to unpack
+                if hops >= limit:
+                    return _plain(out, loop_limit_reached=True), None, None
+                if dst == end:
+                    return _plain(out), None, None
+                node = dst
+                state = out
+                hops += 1
+                continue
+            if not targets:
+                return _plain(out), None, None
+            if hops >= limit:
+                return _plain(out, loop_limit_reached=True), None, None
+            if len(targets) > 1:
+                out = as_state(out)
+                run = _Run(self)
+                token = _Token(node, out, DeltaState(), 0, (), hops, tuple(counts))
+                run.in_flight.append(token)
+                return None, run, run._finish(token, out, record=False, targets=targets)
+            dst, slot = targets[0]
+            if slot >= 0:
+                if counts[slot] >= budgets[slot]:
+                    return _plain(out, loop_limit_reached=True), None, None
+                counts[slot] += 1
+            if dst == _END:
+                return _plain(out), None, None
+            node, state, hops = dst, out, hops + 1
+
+    def run(self, initial_state: Dict[str, Any] = None, thread_id: Optional[str] = None,
+            _resume: bool = False) -> Dict[str, Any]:
+        if thread_id is None:
+            # nothing to record: run the first branch without scheduler bookkeeping
+            result, run, ready = self._run_lone(initial_state)
+            if run is None:
+                return result
+        else:
+            run, initial_state = self._new_run(initial_state, thread_id, _resume)
+            ready = run.start(initial_state)
+        fns = self.fns
+        # a lone branch runs in this thread; the pool is only used while branches overlap
+        while len(ready) == 1:
+            token = ready[0]
+            ready = run.finish(token, fns[token.node](token.state))
+        if not ready:
+            return self._result(run, thread_id)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            try:
+                while ready or futures:
+                    for token in ready:
+                        futures[pool.submit(fns[token.node], token.state)] = token
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    ready = []
+                    for fut in finished:
+                        token = futures.pop(fut)
+                        ready += run.finish(token, fut.result())
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+        return self._result(run, thread_id)
+
+
+class AsyncExecutor(Executor):
+    """
+    Executor for an asyncio loop: `await ex.run(state)`.
+
+    `async def` nodes are awaited on the loop; plain nodes run in a thread pool
+    (`max_workers` threads of its own, else the loop's default executor). Branches
+    fork and join exactly as in Executor. `timeout` (seconds, for every node) and
+    `node_timeouts` (per node name) raise TimeoutError naming the node; a thread
+    running a plain node cannot be interrupted, only abandoned. Cancelling run()
+    cancels its in-flight nodes.
+
+    Plain nodes named in `inline` are cheap, non-blocking functions (state
+    bookkeeping, validators) and are called directly on the loop instead of
+    paying a thread hop.
+    """
+
+    def __init__(self, nodes: Dict[str, Callable], edges: Optional[Dict[str, List[str]]], entry: str,
+                 max_loops: Optional[int] = 3, reducers: Optional[Dict[str, Callable[[Any, Any], Any]]] = None,
+                 max_workers: Optional[int] = None,
+                 routers: Optional[Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Paths]]] = None,
+                 edge_budgets: Optional[Dict[Tuple[str, str], int]] = None,
+                 timeout: Optional[float] = None, node_timeouts: Optional[Dict[str, float]] = None,
+                 inline: Iterable[str] = (), checkpointer=None, in_place_writes: bool = False):
+        super().__init__(nodes, edges, entry, max_loops, reducers, max_workers, routers, edge_budgets, checkpointer,
+                         in_place_writes)
+        self.inline = set(inline)
+        self.timeout = timeout
+        self.node_timeouts = node_timeouts or {}
+        self.is_async = [inspect.iscoroutinefunction(fn) for fn in self.fns]
+        self.is_inline = [name in self.inline and not a for name, a in zip(self.names, self.is_async)]
+        self.timeouts = [self.node_timeouts.get(name, timeout) for name in self.names]
+        self._pool = ThreadPoolExecutor(max_workers=max_workers) if max_workers else None
+
+    async def _call(self, node: int, state: Dict[str, Any]) -> Dict[str, Any]:
+        fn = self.fns[node]
+        if self.is_inline[node]:
+            return fn(state)
+        if self.is_async[node]:
+            pending = fn(state)
+        else:
+            pending = asyncio.get_running_loop().run_in_executor(self._pool, fn, state)
+        timeout = self.timeouts[node]
+        if timeout is None:
+            return await pending
+        try:
+            return await asyncio.wait_for(pending, timeout)
+        except asyncio.TimeoutError as exc:
+            raise TimeoutError(f"node {self.names[node]!r} timed out after {timeout}s") from exc
+
+    async def resume(self, thread_id: str) -> Dict[str, Any]:
+        return await self.run(thread_id=thread_id, _resume=True)
 
-            fn = self.nodes[current]
-            state = fn(state)
+    async def run(self, initial_state: Dict[str, Any] = None, thread_id: Optional[str] = None,
+                  _resume: bool = False) -> Dict[str, Any]:
+        run, initial_state = self._new_run(initial_state, thread_id, _resume)
+        ready = run.start(initial_state)
+        tasks = {}
+        try:
+            while ready or tasks:
+                for token in ready:
+                    tasks[asyncio.ensure_future(self._call(token.node, token.state))] = token
+                finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                ready = []
+                for task in finished:
+                    token = tasks.pop(task)
+                    ready += run.finish(token, task.result())
+        finally:
+            if tasks:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return self._result(run, thread_id)
 
-            next_nodes = self.edges.get(current, [])
-            if not next_nodes:
-                return state
+    async def run_many(self, states: Iterable[Dict[str, Any]], concurrency: Optional[int] = None,
+                       return_exceptions: bool = False) -> List[Any]:
+        """Run the graph once per initial state on this loop, at most `concurrency` runs at a time."""
+        if not concurrency:
+            return await asyncio.gather(*(self.run(s) for s in states), return_exceptions=return_exceptions)
+        sem = asyncio.Semaphore(concurrency)
 
-            next_node = next_nodes[0]
+        async def bounded(state):
+            async with sem:
+                return await self.run(state)
 
-            if loop_count >= self.max_loops:
-                state["loop_limit_reached"] = True
-                return state
+        return await asyncio.gather(*(bounded(s) for s in states), return_exceptions=return_exceptions)
 
-            current = next_node
-            loop_count += 1
+    def close(self):
+        """Shut down the thread pool for plain nodes (when max_workers was given)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
@@ -1,6 +1,8 @@
 # langgraph_module/nodes.py
 from typing import Dict, Any
 
+from .state import update_state
+
 # ---------------------------------------------------
 # Fake LLM wrapper (replace with real LLM client)
 # ---------------------------------------------------
@@ -13,27 +15,23 @@ class FakeLLM:
 
 # ---------------------------------------------------
 # BASIC NODES
+# (update_state returns only the changed keys on top of the shared state when
+#  run by the Executor, and a shallow copy when called with a plain dict)
 # ---------------------------------------------------
 def read_input(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
-    state.setdefault("input_text", "This is a demo document about LangGraph.")
-    return state
+    if "input_text" in state:
+        return state
+    return update_state(state, input_text="This is a demo document about LangGraph.")
 
 
 def summarize_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
     llm = FakeLLM()
     summary = llm.run(f"Summarize: {state['input_text']}")
-    state["summary"] = summary
-    state["needs_tool"] = len(summary) < 20  # simple rule
-    return state
+    return update_state(state, summary=summary, needs_tool=len(summary) < 20)  # simple rule
 
 
 def enrich_tool(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
-    state["summary"] = state.get("summary", "") + " [enriched]"
-    state["needs_tool"] = False
-    return state
+    return update_state(state, summary=state.get("summary", "") + " [enriched]", needs_tool=False)
 
 
 def finalize(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -44,24 +42,18 @@ def finalize(state: Dict[str, Any]) -> Dict[str, Any]:
 # RAG NODES
 # ---------------------------------------------------
 def retriever(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
-    state["docs"] = [
+    return update_state(state, docs=[
         {"id": 1, "text": "LangGraph creates graph-based agent flows."},
         {"id": 2, "text": "Use retrieval to improve LLM reasoning."}
-    ]
-    return state
+    ])
 
 
 def rag_answer(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
     llm = FakeLLM()
     context = "\n".join(doc["text"] for doc in state.get("docs", []))
     prompt = f"Use context:\n{context}\nQuestion: {state['input_text']}"
-    state["answer"] = llm.run(prompt)
-    return state
+    return update_state(state, answer=llm.run(prompt))
 
 
 def validate_answer(state: Dict[str, Any]) -> Dict[str, Any]:
-    state = dict(state)
-    state["valid"] = "LangGraph" in state.get("answer", "")
-    return state
+    return update_state(state, valid="LangGraph" in state.get("answer", ""))
@@ -0,0 +1,249 @@
+# langgraph_module/state.py
+"""
+Copy-on-write graph state.
+
+A DeltaState is an immutable mapping made of layers: each update adds a small
+dict holding only the keys it changed (removed keys are tombstones) on top of
+the previous state, which is shared, never copied. Snapshots are free (keep the
+reference), and the executor reads a node's writes straight from its layers
+instead of diffing whole dicts.
+
+    state = DeltaState({"input_text": "...", "docs": docs})
+    state2 = state.set(summary="...", needs_tool=False)   # state is unchanged
+    state2.changes_since(state)                            # {"summary": ..., "needs_tool": ...}
+
+DeltaState is immutable: with_changes() returns a new state, and the in-place
+dict API (`state[k] = v`, `state.update(...)`) raises TypeError instead of
+silently dropping the write, so a node must return the state it builds. The one
+exception is a writable() layer, which an Executor built with in_place_writes=True
+hands to each node: in-place writes go into that layer's own delta (the shared
+state underneath is never touched) until the node returns and the layer is frozen.
+
+Lookups walk the layers, so chains are compacted into a fresh base dict every
+MAX_DEPTH updates. Nodes that should also work on plain dicts use
+update_state(state, **changes).
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Optional
+
+_DELETED = object()  # tombstone for a removed key
+_NO_CHANGES = {}     # changes of a writable layer before its first write (never written to)
+
+
+class DeltaState(Mapping):
+    MAX_DEPTH = 16
+
+    __slots__ = ("_changes", "_parent", "_depth", "_flat", "_writable")
+
+    def __init__(self, base: Optional[Mapping] = None):
+        """A root state over `base`. A dict base is shared, not copied: don't mutate it afterwards."""
+        if base is None:
+            base = {}
+        elif isinstance(base, DeltaState):
+            base = base.to_dict()
+        elif type(base) is not dict:
+            base = dict(base)
+        self._changes = base
+        self._parent = None
+        self._depth = 0
+        self._flat = base
+        self._writable = False
+
+    @classmethod
+    def _layer(cls, changes: Dict[Any, Any], parent: "DeltaState") -> "DeltaState":
+        obj = cls.__new__(cls)
+        obj._changes = changes
+        obj._parent = parent
+        obj._depth = parent._depth + 1
+        obj._flat = None
+        obj._writable = False
+        return obj
+
+    # ---- Mapping -------------------------------------------------------------
+    def __getitem__(self, key):
+        node = self
+        while node is not None:
+            changes = node._changes
+            if key in changes:
+                value = changes[key]
+                if value is _DELETED:
+                    raise KeyError(key)
+                return value
+            node = node._parent
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        node = self
+        while node is not None:
+            changes = node._changes
+            if key in changes:
+                value = changes[key]
+                return default if value is _DELETED else value
+            node = node._parent
+        return default
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _DELETED) is not _DELETED
+
+    def __iter__(self) -> Iterator:
+        return iter(self.flat())
+
+    def __len__(self) -> int:
+        return len(self.flat())
+
+    def keys(self):
+        return self.flat().keys()
+
+    def items(self):
+        return self.flat().items()
+
+    def values(self):
+        return self.flat().values()
+
+    def __repr__(self) -> str:
+        return f"DeltaState({self.flat()!r})"
+
+    def __reduce__(self):
+        # pickles as a flat state; use changes_since() to persist deltas only
+        return (DeltaState, (self.to_dict(),))
+
+    # ---- updates -------------------------------------------------------------
+    def set(self, **changes) -> "DeltaState":
+        return self.with_changes(changes)
+
+    def with_changes(self, changes: Mapping) -> "DeltaState":
+        """New state with `changes` applied on top of this one."""
+        if not changes:
+            return self
+        if self._changes is _NO_CHANGES:
+            # an unwritten writable layer adds nothing: build on what is under it
+            return self._parent.with_changes(changes)
+        if self._depth >= self.MAX_DEPTH:
+            flat = dict(self.flat())
+            for key, value in changes.items():
+                if value is _DELETED:
+                    flat.pop(key, None)
+                else:
+                    flat[key] = value
+            return DeltaState(flat)
+        return DeltaState._layer(dict(changes), self)
+
+    def delete(self, *keys) -> "DeltaState":
+        return self.with_changes({key: _DELETED for key in keys if key in self})
+
+    # ---- in-place writes (writable layers only) ------------------------------
+    def writable(self) -> "DeltaState":
+        """An empty layer over this state that takes in-place writes until freeze()."""
+        obj = DeltaState._layer(_NO_CHANGES, self)
+        obj._writable = True
+        return obj
+
+    def freeze(self) -> None:
+        self._writable = False
+
+    def _draft(self) -> Dict[Any, Any]:
+        """This layer's own changes, about to be written in place."""
+        if not self._writable:
+            raise TypeError("DeltaState is immutable: return state.with_changes({...}) or "
+                            "update_state(state, ...) instead of changing the state in place "
+                            "(or build the Executor with in_place_writes=True)")
+        if self._changes is _NO_CHANGES:
+            self._changes = {}
+        self._flat = None
+        return self._changes
+
+    def __setitem__(self, key, value):
+        self._draft()[key] = value
+
+    def __delitem__(self, key):
+        changes = self._draft()
+        if key not in self:
+            raise KeyError(key)
+        changes[key] = _DELETED
+
+    def update(self, *args, **kwargs):
+        self._draft().update(*args, **kwargs)
+
+    def pop(self, key, *default):
+        changes = self._draft()
+        value = self.get(key, _DELETED)
+        if value is _DELETED:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        changes[key] = _DELETED
+        return value
+
+    def setdefault(self, key, default=None):
+        changes = self._draft()
+        value = self.get(key, _DELETED)
+        if value is _DELETED:
+            changes[key] = value = default
+        return value
+
+    def clear(self):
+        changes = self._draft()
+        for key in list(self.flat()):
+            changes[key] = _DELETED
+        self._flat = None
+
+    # ---- deltas and snapshots ------------------------------------------------
+    @property
+    def delta(self) -> Dict[Any, Any]:
+        """Keys changed by the latest update (removed keys are absent; see changes_since)."""
+        return {k: v for k, v in self._changes.items() if v is not _DELETED}
+
+    def changes_since(self, ancestor: "DeltaState", deleted: Any = None) -> Optional[Dict[Any, Any]]:
+        """
+        Keys written between `ancestor` and this state (newest value wins; removed keys map
+        to `deleted`), or None when `ancestor` is not in this state's chain (e.g. after a
+        compaction).
+        """
+        layers = []
+        node = self
+        while node is not ancestor:
+            if node is None or node._depth < ancestor._depth:
+                return None
+            layers.append(node._changes)
+            node = node._parent
+        out = {}
+        for changes in reversed(layers):
+            for key, value in changes.items():
+                out[key] = deleted if value is _DELETED else value
+        return out
+
+    def to_dict(self) -> Dict[Any, Any]:
+        """A plain dict copy of the state."""
+        return dict(self.flat())
+
+    def flat(self) -> Dict[Any, Any]:
+        """The state as one dict, built once per state and cached (states are immutable): read-only."""
+        if self._flat is None:
+            layers = []
+            node = self
+            while node._flat is None:
+                layers.append(node._changes)
+                node = node._parent
+            flat = dict(node._flat)
+            for changes in reversed(layers):
+                for key, value in changes.items():
+                    if value is _DELETED:
+                        flat.pop(key, None)
+                    else:
+                        flat[key] = value
+            self._flat = flat
+        return self._flat
+
+
+def update_state(state: Mapping, **changes) -> Mapping:
+    """`state` with `changes` applied: a new layer for a DeltaState, a shallow copy for a plain dict."""
+    if isinstance(state, DeltaState):
+        return state.with_changes(changes)
+    new = dict(state)
+    new.update(changes)
+    return new
+
+
+def as_state(state: Optional[Mapping]) -> DeltaState:
+    """`state` as a DeltaState (a root over a copy of it when it is a plain mapping)."""
+    return state if isinstance(state, DeltaState) else DeltaState(dict(state or {}))
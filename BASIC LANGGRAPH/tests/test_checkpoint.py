@@ -0,0 +1,67 @@
+# tests/test_checkpoint.py
+import threading
+
+import pytest
+
+from langgraph_module.checkpoint import MemoryCheckpointer, SqliteCheckpointer
+from langgraph_module.executor import Executor
+from langgraph_module.state import update_state
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_checkpointer(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return MemoryCheckpointer(**kwargs)
+        return SqliteCheckpointer(str(tmp_path / "checkpoints.sqlite"), **kwargs)
+    return make
+
+
+def chain(calls, fail_at=None):
+    names = [f"n{i}" for i in range(5)]
+
+    def make(i):
+        def node(state):
+            calls.append(i)
+            if i == fail_at:
+                raise RuntimeError(f"node {i} failed")
+            return update_state(state, step=i)
+        return node
+
+    return {name: make(i) for i, name in enumerate(names)}, {a: [b] for a, b in zip(names, names[1:])}
+
+
+def test_resume_skips_the_nodes_that_succeeded(make_checkpointer):
+    calls = []
+    nodes, edges = chain(calls, fail_at=3)
+    with make_checkpointer() as cp:
+        with pytest.raises(RuntimeError):
+            Executor(nodes, edges, "n0", max_loops=None, checkpointer=cp).run({"q": "x"}, thread_id="t")
+        calls.clear()
+        nodes, edges = chain(calls)
+        assert Executor(nodes, edges, "n0", max_loops=None, checkpointer=cp).resume("t") == {"q": "x", "step": 4}
+        assert calls == [3, 4]
+
+
+def test_delete_and_clear_on_success_drop_the_log(make_checkpointer):
+    nodes, edges = chain([])
+    with make_checkpointer() as cp:
+        ex = Executor(nodes, edges, "n0", max_loops=None, checkpointer=cp)
+        ex.run({}, thread_id="kept")
+        assert cp.load("kept") is not None
+        cp.delete("kept")
+        assert cp.load("kept") is None
+    with make_checkpointer(clear_on_success=True) as cp:
+        Executor(nodes, edges, "n0", max_loops=None, checkpointer=cp).run({}, thread_id="done")
+        assert cp.load("done") is None
+
+
+def test_close_stops_the_writer_thread(make_checkpointer):
+    before = threading.active_count()
+    for _ in range(5):
+        cp = make_checkpointer()
+        cp.close()
+        cp.close()
+    assert threading.active_count() == before
+    with pytest.raises(ValueError, match="closed"):
+        cp.delete("t")
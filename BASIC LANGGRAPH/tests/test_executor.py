@@ -0,0 +1,87 @@
+# tests/test_executor.py
+import pytest
+
+from langgraph_module.executor import Executor
+from langgraph_module.state import DeltaState
+
+
+def step(key):
+    def node(state):
+        return dict(state, **{key: state.get(key, 0) + 1})
+    return node
+
+
+def test_parallel_branches_hitting_max_loops_join():
+    ex = Executor({"s": step("s"), "a": step("a"), "b": step("b")},
+                  {"s": ["a", "b"], "a": ["a"], "b": ["b"]}, "s", max_loops=3)
+    assert ex.run({}) == {"s": 1, "a": 3, "b": 3, "loop_limit_reached": True}
+
+
+def test_parallel_branches_hitting_edge_budgets_join():
+    ex = Executor({"s": step("s"), "a": step("a"), "b": step("b")},
+                  {"s": ["a", "b"], "a": ["a"], "b": ["b"]}, "s", max_loops=10,
+                  edge_budgets={("a", "a"): 1, ("b", "b"): 2})
+    assert ex.run({}) == {"s": 1, "a": 2, "b": 3, "loop_limit_reached": True}
+
+
+def test_writes_before_a_fork_only_conflict_when_both_branches_rewrite_them():
+    nodes = {"p": step("x"), "q": step("y"), "a": step("x"), "b": step("y"), "j": step("z")}
+    edges = {"p": ["q"], "q": ["a", "b"], "a": ["j"], "b": ["j"]}
+    assert Executor(nodes, edges, "p").run({}) == {"x": 2, "y": 2, "z": 1}
+    nodes["b"] = step("x")
+    with pytest.raises(ValueError, match="'x'"):
+        Executor(nodes, edges, "p").run({})
+
+
+def legacy(key):
+    def node(state):
+        state.update({key: 1})
+        return state
+    return node
+
+
+def assigns(key):
+    def node(state):
+        state[key] = state.get(key, 0) + 1
+        return state
+    return node
+
+
+def test_in_place_writes_to_a_delta_state_fail_loudly():
+    for node in (legacy("k"), assigns("k")):
+        with pytest.raises(TypeError, match="in_place_writes=True"):
+            Executor({"a": node}, {}, "a").run(DeltaState({}))
+        with pytest.raises(TypeError, match="immutable"):
+            Executor({"s": step("s"), "a": node, "b": step("b")}, {"s": ["a", "b"]}, "s").run({})
+
+
+def test_a_lone_branch_on_a_plain_dict_keeps_in_place_writes_working():
+    initial = {"k": 0}
+    ex = Executor({"a": assigns("k"), "b": legacy("b")}, {"a": ["b"]}, "a")
+    assert ex.run(initial) == {"k": 1, "b": 1}
+    assert initial == {"k": 0}
+
+
+def test_in_place_writes_flag_gives_each_node_its_own_writable_layer():
+    nodes = {"s": assigns("s"), "a": assigns("a"), "b": legacy("b"), "j": assigns("j")}
+    edges = {"s": ["a", "b"], "a": ["j"], "b": ["j"]}
+    ex = Executor(nodes, edges, "s", in_place_writes=True)
+    initial = DeltaState({"s": 5})
+    assert ex.run(initial) == {"s": 6, "a": 1, "b": 1, "j": 1}
+    assert initial.to_dict() == {"s": 5}
+    nodes["b"] = assigns("a")
+    with pytest.raises(ValueError, match="'a'"):
+        Executor(nodes, edges, "s", in_place_writes=True).run({})
+
+
+def test_writable_layer_is_frozen_once_the_node_returns():
+    kept = []
+
+    def keeps(state):
+        kept.append(state)
+        state["x"] = 1
+        return state
+
+    assert Executor({"a": keeps}, {}, "a", in_place_writes=True).run(DeltaState()) == {"x": 1}
+    with pytest.raises(TypeError):
+        kept[0]["x"] = 2
@@ -3,21 +3,47 @@
 Flexible Ollama caller.
 
 Tries, in order:
-  1. Python 'ollama' package (if installed and compatible).
-  2. CLI: ollama run MODEL --prompt "..."
-  3. CLI: ollama run MODEL (feed prompt to stdin)
+  1. Ollama REST API over a pooled keep-alive HTTP connection (no process spawn).
+  2. Python 'ollama' package (if installed and compatible).
+  3. CLI: ollama run MODEL --prompt "..."
+  4. CLI: ollama run MODEL (feed prompt to stdin)
+
+The other backends are tried when the server can't be reached over HTTP or answers
+with an error (e.g. model not pulled); that error is included if everything fails.
 
 This file decodes CLI output as UTF-8 to avoid Windows UnicodeDecodeError.
 """
 
 import os
-import shlex
 import subprocess
 from typing import Optional
 
+from src.utils.ollama_http import OllamaHTTPClient, OllamaUnavailable
+from src.utils.response_cache import cached_call
+
 MODEL = os.environ.get("OLLAMA_MODEL", "llama3.2:3b")
 CLI_TIMEOUT = 60  # seconds
 
+_http_client = None
+
+
+def _get_http_client() -> OllamaHTTPClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = OllamaHTTPClient(read_timeout=CLI_TIMEOUT)
+    return _http_client
+
+
+def _try_http_api(prompt: str) -> Optional[str]:
+    """
+    POST /api/generate on the local server. Returns None when the server is
+    unreachable; HTTP errors (e.g. model not pulled) raise RuntimeError.
+    """
+    try:
+        return _get_http_client().generate(prompt, MODEL)
+    except OllamaUnavailable:
+        return None
+
 
 def _try_python_package(prompt: str, max_tokens: int = 512, temperature: float = 0.0) -> Optional[str]:
     try:
@@ -61,13 +87,10 @@ def _run_cli_with_prompt(prompt: str) -> Optional[str]:
     """
     Try: ollama run MODEL --prompt "PROMPT"
     """
-    # quote model and prompt properly
-    model_quoted = shlex.quote(MODEL)
-    # escape double quotes inside prompt
-    safe_prompt = prompt.replace('"', '\\"')
-    cmd = f'ollama run {model_quoted} --prompt "{safe_prompt}"'
+    # argument list instead of shell=True: no extra shell process and no quoting issues
+    cmd = ["ollama", "run", MODEL, "--prompt", prompt]
     try:
-        completed = subprocess.run(cmd, shell=True, capture_output=True, timeout=CLI_TIMEOUT)
+        completed = subprocess.run(cmd, capture_output=True, timeout=CLI_TIMEOUT)
         stdout = completed.stdout.decode("utf-8", errors="ignore").strip()
         stderr = completed.stderr.decode("utf-8", errors="ignore").strip()
         if completed.returncode == 0 and stdout:
@@ -105,12 +128,28 @@ def _run_cli_with_stdin(prompt: str) -> Optional[str]:
         return None
 
 
-def call_llm(prompt: str) -> str:
+def call_llm(prompt: str, use_cache: bool = True) -> str:
     """
     Main entry point to call the local Ollama model.
-    Tries python package first, then two CLI forms. Raises RuntimeError if all fail.
+    Tries the HTTP API first, then the python package and two CLI forms; an HTTP error
+    (e.g. model not pulled on the server) moves on to the next backend as well.
+    Raises RuntimeError if all fail.
+    Answers are cached by (model, prompt) in response_cache; use_cache=False bypasses it.
     """
-    # 1) Try python package
+    return cached_call(_call_uncached, MODEL, prompt, use_cache=use_cache)
+
+
+def _call_uncached(prompt: str) -> str:
+    # 1) Try the REST API over keep-alive HTTP
+    http_error = None
+    try:
+        res = _try_http_api(prompt)
+    except RuntimeError as e:
+        res, http_error = None, e
+    if res:
+        return res.strip()
+
+    # 2) Try python package
     try:
         res = _try_python_package(prompt)
         if res:
@@ -118,12 +157,12 @@ def call_llm(prompt: str) -> str:
     except Exception:
         pass
 
-    # 2) Try CLI with --prompt
+    # 3) Try CLI with --prompt
     res = _run_cli_with_prompt(prompt)
     if res:
         return res.strip()
 
-    # 3) Try CLI by feeding prompt to stdin
+    # 4) Try CLI by feeding prompt to stdin
     res = _run_cli_with_stdin(prompt)
     if res:
         return res.strip()
@@ -131,7 +170,7 @@ def call_llm(prompt: str) -> str:
     # If we reached here, nothing worked — produce a helpful error.
     # Provide diagnostics: is 'ollama' on PATH? is model pulled?
     raise RuntimeError(
-        "Could not call Ollama. Tried python package and common CLI forms.\n"
+        "Could not call Ollama. Tried the HTTP API, python package and common CLI forms.\n"
         "- Ensure 'ollama' is installed and on your PATH.\n"
         "- Ensure the model is pulled, e.g. `ollama pull llama3.2:3b` or set OLLAMA_MODEL env var.\n"
         "- You can test manually in a terminal:\n"
@@ -139,4 +178,5 @@ def call_llm(prompt: str) -> str:
         "  or\n"
         "    ollama run llama3.2:3b   (then type/paste prompt and press Ctrl-D)\n"
         f"- Current OLLAMA_MODEL={MODEL}"
+        + (f"\n- HTTP API error: {http_error}" if http_error else "")
     )
@@ -0,0 +1,123 @@
+# src/utils/response_cache.py
+"""
+SQLite-backed LLM response cache used by call_llm.
+
+Entries are keyed by sha256 of (model, prompt, generation params), so asking the
+agent the same general question twice returns the stored answer instead of
+starting Ollama again. Entries older than `ttl` seconds are ignored and purged;
+past `max_entries` the least recently used rows are evicted.
+
+The schema and the default path (data/llm_cache.sqlite) match
+clothes-competitor-rag/src/llm_cache.py: point LLM_CACHE_PATH at one file to share
+answers between the projects. LLM_CACHE_DISABLE=1 bypasses it globally;
+call_llm(..., use_cache=False) bypasses it per call.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("data", "llm_cache.sqlite"))
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def cache_disabled():
+    return os.environ.get("LLM_CACHE_DISABLE", "").lower() in ("1", "true", "yes")
+
+
+def make_key(model, prompt, **params):
+    payload = json.dumps([model, prompt, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, model TEXT, response TEXT,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    with self._db:
+                        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            with self._db:
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response, model=None):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?)",
+                             (key, model, response, now, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            (size,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return dict(hits=self.hits, misses=self.misses, size=size)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache at DEFAULT_PATH."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def cached_call(fn, model, prompt, use_cache=True, **params):
+    """Return fn(prompt) through the cache. Only successful, non-empty responses are stored."""
+    if not use_cache or cache_disabled():
+        return fn(prompt)
+    cache = get_cache()
+    key = make_key(model, prompt, **params)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+    out = fn(prompt)
+    if out:
+        cache.put(key, out, model=model)
+    return out
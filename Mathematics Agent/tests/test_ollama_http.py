@@ -0,0 +1,111 @@
+# tests/test_ollama_http.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from src.utils import llm_client
+from src.utils.ollama_http import OllamaHTTPClient, OllamaUnavailable
+
+
+class _StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+    delay = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        if body["model"] == "missing":
+            self._send(404, {"error": "model 'missing' not found"})
+        else:
+            self._send(200, {"model": body["model"], "response": f"echo: {body['prompt']}", "done": True})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllama)
+    connections = []
+    original = server.process_request
+    server.process_request = lambda req, addr: (connections.append(addr), original(req, addr))
+    server.handle_error = lambda req, addr: None  # client hung up on purpose in the timeout test
+    t = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", connections
+    server.shutdown()
+    server.server_close()
+
+
+def test_generate_reuses_connection(stub_server):
+    host, connections = stub_server
+    client = OllamaHTTPClient(host)
+    for i in range(5):
+        assert client.generate(f"hi {i}", "llama3.2:3b") == f"echo: hi {i}"
+    assert client.connections_opened == 1
+    assert len(connections) == 1
+    client.close()
+
+
+def test_http_error_is_raised(stub_server):
+    host, _ = stub_server
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        OllamaHTTPClient(host).generate("hi", "missing")
+
+
+def test_read_timeout(stub_server, monkeypatch):
+    host, _ = stub_server
+    monkeypatch.setattr(_StubOllama, "delay", 0.5)
+    with pytest.raises(RuntimeError, match="timed out"):
+        OllamaHTTPClient(host, read_timeout=0.1).generate("slow", "llama3.2:3b")
+
+
+def test_unreachable_server():
+    # port 9 (discard) is essentially never listening on localhost
+    with pytest.raises(OllamaUnavailable):
+        OllamaHTTPClient("http://127.0.0.1:9", connect_timeout=0.5).generate("hi", "llama3.2:3b")
+
+
+def test_call_llm_prefers_http(stub_server, monkeypatch):
+    host, _ = stub_server
+    monkeypatch.setattr(llm_client, "_http_client", OllamaHTTPClient(host))
+    monkeypatch.setattr(llm_client, "_run_cli_with_prompt", lambda p: pytest.fail("CLI should not run"))
+    assert llm_client.call_llm("what is langgraph?", use_cache=False) == "echo: what is langgraph?"
+
+
+def test_call_llm_falls_back_to_cli_when_server_down(monkeypatch):
+    monkeypatch.setattr(llm_client, "_http_client", OllamaHTTPClient("http://127.0.0.1:9", connect_timeout=0.5))
+    monkeypatch.setattr(llm_client, "_try_python_package", lambda p: None)
+    monkeypatch.setattr(llm_client, "_run_cli_with_prompt", lambda p: "from cli")
+    assert llm_client.call_llm("hello", use_cache=False) == "from cli"
+
+
+def test_call_llm_falls_back_to_cli_on_http_error(stub_server, monkeypatch):
+    host, _ = stub_server
+    monkeypatch.setattr(llm_client, "MODEL", "missing")  # stub answers 404
+    monkeypatch.setattr(llm_client, "_http_client", OllamaHTTPClient(host))
+    monkeypatch.setattr(llm_client, "_try_python_package", lambda p: None)
+    monkeypatch.setattr(llm_client, "_run_cli_with_prompt", lambda p: "from cli")
+    assert llm_client.call_llm("hello", use_cache=False) == "from cli"
+
+
+def test_call_llm_reports_http_error_when_everything_fails(stub_server, monkeypatch):
+    host, _ = stub_server
+    monkeypatch.setattr(llm_client, "MODEL", "missing")
+    monkeypatch.setattr(llm_client, "_http_client", OllamaHTTPClient(host))
+    monkeypatch.setattr(llm_client, "_try_python_package", lambda p: None)
+    monkeypatch.setattr(llm_client, "_run_cli_with_prompt", lambda p: None)
+    monkeypatch.setattr(llm_client, "_run_cli_with_stdin", lambda p: None)
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        llm_client.call_llm("hello", use_cache=False)
@@ -0,0 +1,53 @@
+# tests/test_response_cache.py
+import pytest
+from src.utils import llm_client, response_cache
+from src.utils.response_cache import ResponseCache, make_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_entries=3)
+
+
+def test_put_get(cache):
+    key = make_key("m", "hello")
+    assert cache.get(key) is None
+    cache.put(key, "world", model="m")
+    assert cache.get(key) == "world"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_key_depends_on_model_and_params():
+    assert make_key("a", "p") != make_key("b", "p")
+    assert make_key("a", "p", temperature=0.0) != make_key("a", "p", temperature=0.7)
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    key = make_key("m", "old")
+    cache.put(key, "stale")
+    now = response_cache.time.time()
+    monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+    assert cache.get(key) is None
+
+
+def test_size_eviction_drops_least_recently_used(cache, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(response_cache.time, "time", lambda: next(clock))
+    keys = [make_key("m", str(i)) for i in range(3)]
+    for k in keys:
+        cache.put(k, "v")
+    cache.get(keys[0])  # keys[1] is now the least recently used
+    cache.put(make_key("m", "3"), "v")
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "v"
+
+
+def test_call_llm_uses_cache(cache, monkeypatch):
+    calls = []
+    monkeypatch.setattr(response_cache, "_cache", cache)
+    monkeypatch.setattr(llm_client, "_call_uncached", lambda p: calls.append(p) or "answer")
+    assert llm_client.call_llm("what is langgraph?") == "answer"
+    assert llm_client.call_llm("what is langgraph?") == "answer"
+    assert len(calls) == 1
+    llm_client.call_llm("what is langgraph?", use_cache=False)
+    assert len(calls) == 2
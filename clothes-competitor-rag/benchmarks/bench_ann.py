@@ -0,0 +1,73 @@
+# benchmarks/bench_ann.py
+"""
+Recall@k vs latency for the index types in index_factory, using the flat index as ground truth.
+
+Vectors are random Gaussian (a pessimistic case for ANN); real MiniLM embeddings are
+clustered and usually reach higher recall at the same nprobe/efSearch.
+
+Run from the project root:
+    python benchmarks/bench_ann.py --docs 200000 --queries 500 -k 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath("src"))
+
+from index_factory import build_index, set_search_params  # noqa: E402
+
+DIM = 384
+
+SWEEPS = {
+    "ivf_flat": ("nprobe", [1, 4, 8, 16, 64]),
+    "ivf_pq": ("nprobe", [1, 4, 8, 16, 64]),
+    "hnsw": ("ef_search", [16, 32, 64, 128, 256]),
+}
+
+
+def recall_at_k(truth, found):
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def timed_search(idx, queries, k):
+    t0 = time.perf_counter()
+    _, I = idx.search(queries, k)
+    per_query_ms = (time.perf_counter() - t0) * 1000.0 / len(queries)
+    return I, per_query_ms
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=200_000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("-k", type=int, default=4)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(7)
+    base = rng.standard_normal((args.docs, DIM)).astype("float32")
+    queries = rng.standard_normal((args.queries, DIM)).astype("float32")
+
+    t0 = time.perf_counter()
+    flat, _ = build_index(base, "flat")
+    print(f"flat: built in {time.perf_counter() - t0:.1f}s")
+    truth, flat_ms = timed_search(flat, queries, args.k)
+
+    print(f"{'index':>9} {'param':>14} | {'recall@k':>8} | {'ms/query':>8}")
+    print(f"{'flat':>9} {'-':>14} | {1.0:>8.3f} | {flat_ms:>8.3f}")
+    for index_type, (param, values) in SWEEPS.items():
+        t0 = time.perf_counter()
+        idx, config = build_index(base, index_type)
+        build_s = time.perf_counter() - t0
+        for v in values:
+            set_search_params(idx, dict(config, **{param: v}))
+            found, ms = timed_search(idx, queries, args.k)
+            print(f"{index_type:>9} {param + '=' + str(v):>14} | {recall_at_k(truth, found):>8.3f} | {ms:>8.3f}")
+        print(f"{'':>9} (built in {build_s:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
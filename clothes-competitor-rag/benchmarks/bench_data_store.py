@@ -0,0 +1,66 @@
+# benchmarks/bench_data_store.py
+"""
+CSV vs Parquet (data_store) for the footfall table at multiples of the current
+volume (data/footfall_synthetic.csv: 6 stores x 28 days x 24 h = 4,032 rows).
+
+For each scale: write time, file size, full read, a projected read (store_id,
+footfall) and a filtered read (store_id in 5 stores). CSV reads parse the whole
+file and filter afterwards; Parquet only decodes the requested columns and skips
+row groups whose store_id statistics exclude the filter.
+
+Run from the project root (needs pyarrow):
+    python benchmarks/bench_data_store.py --scales 10 100 1000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath("src"))
+
+from data_store import read_path, write_chunks  # noqa: E402
+from generate_synthetic import iter_chunks, synthetic_stores  # noqa: E402
+
+BASE_STORES, DAYS = 6, 28
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--stores-per-chunk", type=int, default=500, help="stores per written chunk / row group")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_data_store_")
+    print(f"{'scale':>6} {'rows':>11} {'fmt':>8} {'write s':>8} {'MB':>8} "
+          f"{'read s':>8} {'proj s':>8} {'filter s':>8}")
+    for scale in args.scales:
+        stores = synthetic_stores(BASE_STORES * scale)
+        wanted = [int(s) for s in stores["store_id"].sample(5, random_state=0)]
+        for fmt in ("csv", "parquet"):
+            path = os.path.join(tmp, f"footfall_{scale}.{fmt}")
+            rows = 0
+
+            def write():
+                nonlocal rows
+                chunks = iter_chunks(stores, days=DAYS, seed=0, stores_per_chunk=args.stores_per_chunk)
+                rows = write_chunks(chunks, path, fmt, name="footfall")
+
+            w = timed(write)
+            full = timed(lambda: read_path(path))
+            proj = timed(lambda: read_path(path, columns=["store_id", "footfall"]))
+            filt = timed(lambda: read_path(path, columns=["store_id", "footfall"],
+                                           filters=[("store_id", "in", wanted)]))
+            print(f"{scale:>5}x {rows:>11,} {fmt:>8} {w:>8.2f} {os.path.getsize(path) / 1e6:>8.1f} "
+                  f"{full:>8.2f} {proj:>8.2f} {filt:>8.2f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_generate.py
+"""
+Synthetic footfall generation: old per-row loop vs the vectorized chunked generator.
+
+Rows = stores * days * 24. The default sizes are 1M rows (1,489 stores x 28 days)
+and 100M rows (148,810 stores x 28 days); the old loop only runs at the 1M size
+(--skip-old to leave it out), the 100M size is streamed to --out-dir.
+Peak RSS is read from getrusage after each case, so run one size per process to
+see its own peak (--rows 100000000).
+
+Run from the project root:
+    python benchmarks/bench_generate.py
+    python benchmarks/bench_generate.py --rows 100000000 --format parquet --skip-old
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath("src"))
+
+from generate_synthetic import iter_chunks, synthetic_stores, write_chunks  # noqa: E402
+
+
+def old_generate_days(stores_df, days=14):
+    """The original iterrows / per-hour dict implementation."""
+    rows = []
+    start = datetime(2025, 11, 1)
+    for i, r in stores_df.iterrows():
+        base = np.random.randint(20, 80)
+        peak_hour = np.random.choice([12, 13, 14, 15, 18, 19, 20])
+        for d in range(days):
+            day = start + timedelta(days=d)
+            hours = np.arange(24)
+            peak = base * (1 + np.exp(-0.5 * ((hours - peak_hour) / 3) ** 2) * 2)
+            peak = peak * (1 + np.random.randn(24) * 0.2)
+            series = np.clip(peak.round().astype(int), 0, None)
+            for h, val in enumerate(series):
+                ts = datetime(day.year, day.month, day.day, h)
+                rows.append({"store_id": r['store_id'], "timestamp": ts.isoformat(), "footfall": int(val)})
+    return pd.DataFrame(rows)
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != "darwin" else rss / 1024 / 1024
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 100_000_000])
+    ap.add_argument("--days", type=int, default=28)
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    ap.add_argument("--out-dir", default=None, help="default: a temporary directory")
+    ap.add_argument("--skip-old", action="store_true")
+    args = ap.parse_args()
+
+    out_dir = args.out_dir or tempfile.mkdtemp(prefix="bench_generate_")
+    for rows in args.rows:
+        stores = synthetic_stores(max(1, rows // (args.days * 24)))
+        n = len(stores) * args.days * 24
+        print(f"--- {n:,} rows ({len(stores):,} stores x {args.days} days x 24 h)")
+
+        if not args.skip_old and rows <= 1_000_000:
+            t0 = time.perf_counter()
+            old_generate_days(stores, days=args.days)
+            print(f"old loop, in memory:      {time.perf_counter() - t0:8.2f}s  peak RSS {peak_rss_mb():8.0f} MB")
+
+        if rows <= 1_000_000:
+            t0 = time.perf_counter()
+            total = sum(len(c) for c in iter_chunks(stores, days=args.days, seed=0))
+            elapsed = time.perf_counter() - t0
+            print(f"vectorized, generate only:{elapsed:8.2f}s  peak RSS {peak_rss_mb():8.0f} MB"
+                  f"  ({total / elapsed / 1e6:.1f}M rows/s)")
+
+        out = os.path.join(out_dir, f"footfall_{n}.{args.format}")
+        t0 = time.perf_counter()
+        write_chunks(iter_chunks(stores, days=args.days, seed=0), out, args.format)
+        elapsed = time.perf_counter() - t0
+        print(f"vectorized -> {args.format:<8}:    {elapsed:8.2f}s  peak RSS {peak_rss_mb():8.0f} MB"
+              f"  {os.path.getsize(out) / 1e6:,.0f} MB on disk")
+        os.remove(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_geo.py
+"""
+Proximity queries over N synthetic stores spread across a city: brute-force
+haversine over every store vs GeoIndex (grid cells + haversine on candidates).
+Every GeoIndex answer is checked against the brute-force one.
+
+    python benchmarks/bench_geo.py --stores 100000 --queries 500
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath("src"))
+
+from geo_index import GeoIndex, haversine_m  # noqa: E402
+
+# roughly Bengaluru's extent, around the stores in stores.csv
+LAT, LON, SPAN_DEG = 12.97, 77.59, 0.25
+
+
+def brute_within(ids, lats, lons, lat, lon, radius_m):
+    d = haversine_m(lat, lon, lats, lons)
+    keep = np.flatnonzero(d <= radius_m)
+    keep = keep[np.argsort(d[keep], kind="stable")]
+    return [(int(ids[i]), float(d[i])) for i in keep]
+
+
+def brute_nearest(ids, lats, lons, lat, lon, k):
+    d = haversine_m(lat, lon, lats, lons)
+    top = np.argpartition(d, k - 1)[:k]
+    top = top[np.argsort(d[top], kind="stable")]
+    return [(int(ids[i]), float(d[i])) for i in top]
+
+
+def timed(fn, points):
+    t0 = time.perf_counter()
+    out = [fn(lat, lon) for lat, lon in points]
+    return (time.perf_counter() - t0) / len(points) * 1000, out
+
+
+def same(a, b):
+    """Equal hit lists; ties at equal distance may come in either order."""
+    return len(a) == len(b) and sorted(a) == sorted(b) and all(
+        abs(x[1] - y[1]) < 1e-6 for x, y in zip(a, b))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stores", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--radius", type=float, default=500.0)
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ids = np.arange(1, args.stores + 1, dtype="int64")
+    lats = LAT + rng.uniform(-SPAN_DEG, SPAN_DEG, args.stores)
+    lons = LON + rng.uniform(-SPAN_DEG, SPAN_DEG, args.stores)
+    points = list(zip(LAT + rng.uniform(-SPAN_DEG, SPAN_DEG, args.queries),
+                      LON + rng.uniform(-SPAN_DEG, SPAN_DEG, args.queries)))
+
+    t0 = time.perf_counter()
+    geo = GeoIndex(ids, lats, lons)
+    print(f"{args.stores} stores, index build {time.perf_counter() - t0:.3f}s")
+
+    cases = [
+        (f"within {args.radius:.0f} m",
+         lambda la, lo: brute_within(ids, lats, lons, la, lo, args.radius),
+         lambda la, lo: geo.within(la, lo, args.radius)),
+        (f"nearest k={args.k}",
+         lambda la, lo: brute_nearest(ids, lats, lons, la, lo, args.k),
+         lambda la, lo: geo.nearest(la, lo, args.k)),
+    ]
+    for name, brute, indexed in cases:
+        old_ms, expected = timed(brute, points)
+        new_ms, got = timed(indexed, points)
+        ok = all(same(e, g) for e, g in zip(expected, got))
+        print(f"{name:<14} brute {old_ms:7.3f} ms/query   grid {new_ms:7.3f} ms/query   "
+              f"x{old_ms / new_ms:5.1f}   exact={'yes' if ok else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
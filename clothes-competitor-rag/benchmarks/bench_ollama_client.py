@@ -0,0 +1,92 @@
+# benchmarks/bench_ollama_client.py
+"""
+Per-call overhead: keep-alive HTTP to the Ollama API vs spawning a process per prompt.
+
+By default both sides are stubs, so only transport overhead is measured:
+  http   OllamaHTTPClient -> local stub server that answers /api/generate instantly
+  spawn  subprocess.Popen of a tiny CLI stand-in that echoes stdin (like `ollama run`)
+With --real the same comparison runs against a live Ollama (`ollama run MODEL` vs
+POST /api/generate) using a one-token generation.
+
+Run from the project root:
+    python benchmarks/bench_ollama_client.py --calls 200
+    python benchmarks/bench_ollama_client.py --real --model llama3.2:3b --calls 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath("src"))
+
+from ollama_client import OllamaHTTPClient  # noqa: E402
+
+FAKE_CLI = [sys.executable, "-c", "import sys; sys.stdout.write('echo: ' + sys.stdin.read())"]
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # like the real (Go) server
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        data = json.dumps({"response": "echo: " + body["prompt"], "done": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def spawn_call(cmd, prompt):
+    p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    out, _ = p.communicate(prompt)
+    return out
+
+
+def measure(fn, calls):
+    samples = []
+    for i in range(calls):
+        t0 = time.perf_counter()
+        fn(f"prompt {i}")
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.99 * (len(samples) - 1))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--real", action="store_true")
+    ap.add_argument("--model", default="llama3.2:3b")
+    args = ap.parse_args()
+
+    if args.real:
+        client = OllamaHTTPClient()
+        http_fn = lambda p: client.generate(p, args.model, options={"num_predict": 1})  # noqa: E731
+        spawn_fn = lambda p: spawn_call(["ollama", "run", args.model], p)  # noqa: E731
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = OllamaHTTPClient(f"http://127.0.0.1:{server.server_address[1]}")
+        http_fn = lambda p: client.generate(p, "stub")  # noqa: E731
+        spawn_fn = lambda p: spawn_call(FAKE_CLI, p)  # noqa: E731
+
+    http_fn("warm up")
+    print(f"{'backend':>8} | {'p50 ms':>8} | {'p99 ms':>8}")
+    for name, fn in (("spawn", spawn_fn), ("http", http_fn)):
+        p50, p99 = measure(fn, args.calls)
+        print(f"{name:>8} | {p50:>8.2f} | {p99:>8.2f}")
+    print(f"http connections opened: {client.connections_opened}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_preprocess.py
+"""
+Footfall aggregation: in-memory (parse_dates + one groupby) vs streaming chunks vs
+streaming over worker shards. Each run is a fresh interpreter so peak RSS is its own.
+Inputs of --stores x --days x 24 rows are generated with generate_synthetic into a
+temporary directory.
+
+Run from the project root:
+    python benchmarks/bench_preprocess.py --stores 1000 10000 --days 28 --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath("src"))
+
+from generate_synthetic import iter_chunks, synthetic_stores, write_chunks  # noqa: E402
+
+RUN = """
+import resource, sys, time; sys.path.append({src!r})
+import preprocess
+t0 = time.perf_counter()
+if {mode!r} == "memory":
+    agg = preprocess.aggregate_in_memory({path!r})
+else:
+    agg = preprocess.aggregate_streaming({path!r}, chunksize={chunksize}, workers={workers})
+elapsed = time.perf_counter() - t0
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+peak_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print(elapsed, max(peak, peak_children) / 1024)
+"""
+
+
+def run(mode, path, chunksize, workers):
+    code = RUN.format(src=os.path.abspath("src"), mode=mode, path=path, chunksize=chunksize, workers=workers)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return map(float, out.stdout.split()[-2:])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stores", type=int, nargs="+", default=[1000, 10000])
+    ap.add_argument("--days", type=int, default=28)
+    ap.add_argument("--chunksize", type=int, default=250_000)
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_preprocess_")
+    for n in args.stores:
+        path = os.path.join(tmp, f"footfall_{n}.csv")
+        rows = write_chunks(iter_chunks(synthetic_stores(n), days=args.days, seed=0), path)
+        print(f"--- {rows:,} rows, {os.path.getsize(path) / 1e6:,.0f} MB")
+        for label, mode, workers in [("in memory", "memory", 1), ("streaming", "stream", 1),
+                                     (f"streaming x{args.workers}", "stream", args.workers)]:
+            elapsed, rss = run(mode, path, args.chunksize, workers)
+            print(f"{label:<14} {elapsed:8.2f}s  peak RSS {rss:8.0f} MB")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_reports.py
+"""
+PDFs per second: make_report called once per (query, answer) pair (stylesheet,
+table reads and merge repeated every time) vs make_reports (shared resources,
+process pool), plus one combined multi-section PDF.
+
+Run from the project root after the pipeline has produced the peaks table:
+    python benchmarks/bench_reports.py --reports 200 --workers 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath("src"))
+
+from report_gen_reportlab import make_combined_report, make_report, make_reports  # noqa: E402
+
+ANSWER = "\n".join(f"{i}. Open an extra till before the competitor's 18:00 rush." for i in range(1, 6))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    args = ap.parse_args()
+
+    items = [(f"Question {i}: which competitors peak in the evening?", ANSWER) for i in range(args.reports)]
+    tmp = tempfile.mkdtemp(prefix="bench_reports_")
+    try:
+        t0 = time.perf_counter()
+        for i, (q, a) in enumerate(items):
+            make_report(q, a, os.path.join(tmp, f"old_{i}.pdf"), quiet=True)
+        old = time.perf_counter() - t0
+        print(f"make_report per pair:        {args.reports / old:7.1f} PDFs/s")
+
+        for workers in (1, args.workers):
+            t0 = time.perf_counter()
+            make_reports(items, out_dir=os.path.join(tmp, f"batch_{workers}"), workers=workers)
+            new = time.perf_counter() - t0
+            print(f"make_reports workers={workers:<3}:    {args.reports / new:7.1f} PDFs/s")
+
+        t0 = time.perf_counter()
+        make_combined_report(items, os.path.join(tmp, "combined.pdf"))
+        print(f"combined PDF, {args.reports} sections: {time.perf_counter() - t0:7.2f}s")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_retrieve.py
+"""
+Per-query retrieval latency: reload-per-query (old retrieve) vs the long-lived FaissRetriever.
+
+Builds a synthetic FAISS index in a temp dir for each corpus size, with both the
+legacy metadata pickle and the current SQLite + .npy store, and reports p50/p99.
+A random-vector encoder is used so the numbers isolate load + search; with the real
+MiniLM model add a constant ~5-15 ms encode cost to both columns.
+
+Run from the project root:
+    python benchmarks/bench_retrieve.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.abspath("src"))
+
+from index_factory import build_index, save_index  # noqa: E402
+from meta_store import write_store  # noqa: E402
+from rag_query import FaissRetriever  # noqa: E402
+
+DIM = 384  # all-MiniLM-L6-v2
+
+
+class RandomEncoder:
+    def __init__(self, dim=DIM, seed=0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, texts, **kwargs):
+        return self.rng.standard_normal((len(texts), self.dim)).astype("float32")
+
+
+def build_corpus(n, workdir):
+    """Writes both the legacy pickle (for the old path) and the current metadata store.
+    Store ids are 0..n-1 so the ID-mapped index also answers the position-based lookup."""
+    rng = np.random.default_rng(42)
+    emb = rng.standard_normal((n, DIM)).astype("float32")
+    ids = np.arange(n)
+    idx, config = build_index(emb, "flat", ids=ids)
+    index_path = os.path.join(workdir, "faiss_index.idx")
+    pkl_path = os.path.join(workdir, "faiss_meta.pkl")
+    db_path = os.path.join(workdir, "faiss_meta.sqlite")
+    emb_path = os.path.join(workdir, "faiss_embeddings.npy")
+    save_index(idx, config, index_path)
+    docs = [f"Store {i}. Address: Road {i % 97}. Usual busiest hour: {i % 24}." for i in range(n)]
+    meta = [dict(store_id=i, name=f"Store {i}", lat=12.9, lon=77.6) for i in range(n)]
+    with open(pkl_path, "wb") as f:
+        pickle.dump({"docs": docs, "meta": meta, "embeddings": emb}, f)
+    write_store(ids, docs, meta, emb, db_path, emb_path)
+    return index_path, pkl_path, db_path, emb_path
+
+
+def make_retriever(paths, encoder):
+    index_path, _, db_path, emb_path = paths
+    return FaissRetriever(index_path, db_path, encoder=encoder, emb_path=emb_path).load()
+
+
+def old_retrieve(index_path, meta_path, encoder, query, k):
+    # mirrors the previous rag_query.retrieve
+    with open(meta_path, "rb") as f:
+        meta = pickle.load(f)
+    idx = faiss.read_index(index_path)
+    q_emb = encoder.encode([query])[0].astype("float32")
+    D, I = idx.search(np.array([q_emb]), k)
+    return [meta["docs"][i] for i in I[0]]
+
+
+def percentiles(samples):
+    arr = np.array(samples) * 1000.0
+    return np.percentile(arr, 50), np.percentile(arr, 99)
+
+
+def time_calls(fn, n):
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--old-queries", type=int, default=10, help="old path is slow at 1M; sample fewer")
+    ap.add_argument("-k", type=int, default=4)
+    args = ap.parse_args()
+
+    encoder = RandomEncoder()
+    print(f"{'docs':>10} | {'old p50':>9} {'old p99':>9} | {'new p50':>9} {'new p99':>9} (ms)")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = build_corpus(n, tmp)
+            index_path, pkl_path = paths[:2]
+            q = "List competitors and their busiest hours"
+
+            old = time_calls(lambda: old_retrieve(index_path, pkl_path, encoder, q, args.k), args.old_queries)
+
+            r = make_retriever(paths, encoder)
+            new = time_calls(lambda: r.search(q, args.k), args.queries)
+
+            o50, o99 = percentiles(old)
+            n50, n99 = percentiles(new)
+            print(f"{n:>10} | {o50:>9.2f} {o99:>9.2f} | {n50:>9.2f} {n99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_retrieve_many.py
+"""
+Throughput of batched retrieve_many vs a loop of single-query searches.
+
+Uses the real all-MiniLM-L6-v2 encoder by default (batching the encoder is where most
+of the win comes from); pass --random-encoder to measure the index search alone.
+
+Run from the project root:
+    python benchmarks/bench_retrieve_many.py --docs 100000 --queries 100 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath("src"))
+sys.path.append(os.path.abspath("benchmarks"))
+
+from bench_retrieve import RandomEncoder, build_corpus, make_retriever  # noqa: E402
+
+
+def make_queries(n):
+    names = ["Zudio", "Max Fashion", "Pantaloons", "Lifestyle", "Trends", "Reliance"]
+    return [f"When is {names[i % len(names)]} busiest on day {i}?" for i in range(n)]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, nargs="+", default=[100, 500])
+    ap.add_argument("-k", type=int, default=4)
+    ap.add_argument("--random-encoder", action="store_true")
+    args = ap.parse_args()
+
+    if args.random_encoder:
+        encoder = RandomEncoder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer("all-MiniLM-L6-v2")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        r = make_retriever(build_corpus(args.docs, tmp), encoder)
+        r.search_many(make_queries(8), args.k)  # warm up
+
+        print(f"{'queries':>8} | {'loop q/s':>10} | {'batch q/s':>10} | speedup")
+        for n in args.queries:
+            queries = make_queries(n)
+
+            t0 = time.perf_counter()
+            for q in queries:
+                r.search(q, args.k)
+            loop_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            r.search_many(queries, args.k)
+            batch_s = time.perf_counter() - t0
+
+            print(f"{n:>8} | {n / loop_s:>10.1f} | {n / batch_s:>10.1f} | {loop_s / batch_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
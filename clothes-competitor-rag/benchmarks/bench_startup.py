@@ -0,0 +1,57 @@
+# benchmarks/bench_startup.py
+"""
+Startup cost of the RAG modules: import time and time to first query embedding.
+
+"eager" reproduces the old behaviour (build SentenceTransformer at import, once per
+module); "lazy" imports rag_query + embeddings_faiss with the model registry.
+Each measurement runs in a fresh interpreter.
+
+Run from the project root:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+EAGER = """
+import time; t0 = time.perf_counter()
+from sentence_transformers import SentenceTransformer
+a = SentenceTransformer('all-MiniLM-L6-v2')   # rag_query at import
+b = SentenceTransformer('all-MiniLM-L6-v2')   # embeddings_faiss at import
+t1 = time.perf_counter()
+a.encode(['List competitors and their busiest hours'])
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t0)
+"""
+
+LAZY = """
+import sys, time; sys.path.append('src'); t0 = time.perf_counter()
+import rag_query, embeddings_faiss
+t1 = time.perf_counter()
+rag_query.embedder.encode(['List competitors and their busiest hours'])
+t2 = time.perf_counter()
+print(t1 - t0, t2 - t0)
+"""
+
+
+def run(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    import_s, first_s = map(float, out.stdout.split()[-2:])
+    return import_s, first_s
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+    print(f"{'mode':>6} | {'import ms (median)':>18} | {'first encode ms (median)':>24}")
+    for name, code in (("eager", EAGER), ("lazy", LAZY)):
+        samples = [run(code) for _ in range(args.runs)]
+        imp = statistics.median(s[0] for s in samples) * 1000
+        first = statistics.median(s[1] for s in samples) * 1000
+        print(f"{name:>6} | {imp:>18.1f} | {first:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
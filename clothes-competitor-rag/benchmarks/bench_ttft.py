@@ -0,0 +1,51 @@
+# benchmarks/bench_ttft.py
+"""
+Time to first token (streaming) vs time to full answer (blocking) against a live Ollama.
+
+Run from the project root with the server up:
+    python benchmarks/bench_ttft.py --model llama3.2:3b --runs 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath("src"))
+
+from ollama_client import OllamaHTTPClient  # noqa: E402
+
+PROMPT = ("You are an assistant helping a clothing store owner. List three ways to handle "
+          "a competitor whose busiest hour is 18:00.")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--model", default="llama3.2:3b")
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    client = OllamaHTTPClient()
+    client.generate("hi", args.model, options={"num_predict": 1})  # load the model first
+
+    blocking, first, total = [], [], []
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        client.generate(PROMPT, args.model)
+        blocking.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        t_first = None
+        for _tok in client.generate_stream(PROMPT, args.model):
+            if t_first is None:
+                t_first = time.perf_counter() - t0
+        first.append(t_first)
+        total.append(time.perf_counter() - t0)
+
+    print(f"blocking answer:       {statistics.median(blocking):.2f}s (median)")
+    print(f"streaming first token: {statistics.median(first):.2f}s (median)")
+    print(f"streaming full answer: {statistics.median(total):.2f}s (median)")
+
+
+if __name__ == "__main__":
+    main()
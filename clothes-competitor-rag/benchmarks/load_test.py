@@ -0,0 +1,135 @@
+# benchmarks/load_test.py
+"""
+Throughput and tail latency of CompetitorService (src/service.py) at 1, 8 and 32
+concurrent users. Each user sends --requests questions back to back.
+
+By default Ollama is a local stub that takes --llm-ms per answer and, like a single
+GPU, serves at most --server-slots generations at once; retrieval is a stub that
+sleeps --retrieve-ms in the service's thread pool. With --real the live Ollama and
+FAISS index are used instead.
+
+Rejected / timed-out requests (ServiceBusy) are counted separately; they are the
+intended behaviour once more than max_pending requests wait for an LLM slot.
+
+Run from the project root:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --max-concurrent-llm 4 --max-pending 8
+    python benchmarks/load_test.py --real --model llama3.2:3b --users 1 8 --requests 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath("src"))
+
+QUESTIONS = ["Which competitor stores peak at 18:00?",
+             "List stores near the mall with a lunchtime rush.",
+             "When is the quietest hour for the downtown competitors?"]
+
+
+def make_stub(llm_seconds, slots):
+    gpu = threading.Semaphore(slots)
+
+    class StubOllama(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with gpu:
+                time.sleep(llm_seconds)
+            data = json.dumps({"response": "stub answer to " + body["prompt"][-40:], "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return StubOllama
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+async def run_level(service, users, requests, ServiceBusy):
+    latencies, busy, failed = [], 0, 0
+
+    async def user(uid):
+        nonlocal busy, failed
+        for i in range(requests):
+            t0 = time.perf_counter()
+            try:
+                await service.answer(f"{QUESTIONS[(uid + i) % len(QUESTIONS)]} (user {uid}, #{i})")
+            except ServiceBusy:
+                busy += 1
+                continue
+            except Exception:
+                failed += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user(u) for u in range(users)))
+    return time.perf_counter() - t0, latencies, busy, failed
+
+
+async def main_async(args):
+    if not args.real:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_stub(args.llm_ms / 1000, args.server_slots))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        # also picked up by call_ollama when httpx is missing
+        os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_address[1]}"
+
+    from service import HTTPX_AVAILABLE, CompetitorService, ServiceBusy
+
+    def stub_retrieve(query, k):
+        time.sleep(args.retrieve_ms / 1000)
+        return [f"store {i}: busiest hour 18:00" for i in range(k)]
+
+    print(f"generation via {'httpx' if HTTPX_AVAILABLE else 'call_ollama in threads'}; "
+          f"max_concurrent_llm={args.max_concurrent_llm} max_pending={args.max_pending}")
+    print(f"{'users':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'busy':>5} {'failed':>6}")
+    for users in args.users:
+        service = CompetitorService(
+            model=args.model, max_concurrent_llm=args.max_concurrent_llm, max_pending=args.max_pending,
+            queue_timeout=args.queue_timeout, host=os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434"),
+            retrieve_fn=None if args.real else stub_retrieve, use_cache=False)
+        async with service:
+            elapsed, lat, busy, failed = await run_level(service, users, args.requests, ServiceBusy)
+        if lat:
+            ms = [x * 1000 for x in lat]
+            print(f"{users:>5} {len(lat) / elapsed:>8.1f} {percentile(ms, 50):>8.0f} "
+                  f"{percentile(ms, 95):>8.0f} {percentile(ms, 99):>8.0f} {busy:>5} {failed:>6}")
+        else:
+            print(f"{users:>5} {'-':>8} {'-':>8} {'-':>8} {'-':>8} {busy:>5} {failed:>6}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    ap.add_argument("--requests", type=int, default=10, help="questions per user")
+    ap.add_argument("--max-concurrent-llm", type=int, default=2)
+    ap.add_argument("--max-pending", type=int, default=16)
+    ap.add_argument("--queue-timeout", type=float, default=60.0)
+    ap.add_argument("--llm-ms", type=float, default=200.0, help="stub generation time")
+    ap.add_argument("--server-slots", type=int, default=2, help="stub parallel generations")
+    ap.add_argument("--retrieve-ms", type=float, default=5.0, help="stub retrieval time")
+    ap.add_argument("--real", action="store_true")
+    ap.add_argument("--model", default="llama3.2:3b")
+    args = ap.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
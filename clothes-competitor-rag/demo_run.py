@@ -2,15 +2,21 @@
 # 1. generate synthetic (if not generated)
 # 2. preprocess
 # 3. build embeddings
+#    (1-3 run in-process through src/pipeline.py and are skipped when their inputs are unchanged)
 # 4. run a sample query and save report
 
-import os
-os.system("python src/generate_synthetic.py")
-os.system("python src/preprocess.py")
-os.system("python src/embeddings_faiss.py")
+import os, sys
+sys.path.append(os.path.abspath("src"))
+
+from model_registry import warm_up
+from pipeline import run_pipeline
+
+# load the embedding model while the data stages run
+warm_up()
+run_pipeline()
 # sample query
-from src.rag_query import answer
+from rag_query import answer
 resp = answer("List competitors and their busiest hours, suggest 3 actions")
 print(resp)
-from src.report_gen_reportlab import make_report
+from report_gen_reportlab import make_report
 make_report("List competitors and their busiest hours", resp, out_pdf="demo_report.pdf")
@@ -0,0 +1,128 @@
+# src/bm25_index.py
+"""
+In-process BM25 inverted index over the store documents.
+
+Exact-token questions ("Zudio", "80 Feet Road") are where MiniLM vectors are
+weakest, so embeddings_faiss builds this next to the FAISS index
+(data/faiss_index.idx -> data/faiss_index.bm25.npz) and rag_query fuses both
+rankings with reciprocal-rank fusion.
+
+Postings are stored CSR-style (term -> doc positions + term frequencies) in one
+.npz, so loading is a few array reads and scoring a query touches only the
+postings of its terms. Search can be restricted to an allowed set of store_ids
+(metadata pre-filter) before scoring.
+"""
+import os
+import re
+
+import numpy as np
+
+K1 = 1.5
+B = 0.75
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def bm25_path(index_path):
+    root, _ = os.path.splitext(index_path)
+    return root + ".bm25.npz"
+
+
+class BM25Index:
+    def __init__(self, ids, vocab, indptr, postings, tfs, doc_len, k1=K1, b=B):
+        self.ids = np.asarray(ids, dtype="int64")
+        self.vocab = {t: i for i, t in enumerate(vocab)}
+        self.indptr = indptr
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_len = doc_len.astype("float32")
+        self.k1 = k1
+        self.b = b
+        n = len(self.ids)
+        df = np.diff(indptr).astype("float32")
+        self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        self.avg_len = float(self.doc_len.mean()) if n else 0.0
+        self._pos = {int(s): i for i, s in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, ids, docs, k1=K1, b=B):
+        """Index docs (aligned with store ids)."""
+        term_docs = {}
+        doc_len = np.zeros(len(docs), dtype="int32")
+        for pos, doc in enumerate(docs):
+            toks = tokenize(doc)
+            doc_len[pos] = len(toks)
+            counts = {}
+            for t in toks:
+                counts[t] = counts.get(t, 0) + 1
+            for t, c in counts.items():
+                term_docs.setdefault(t, []).append((pos, c))
+        vocab = sorted(term_docs)
+        indptr = np.zeros(len(vocab) + 1, dtype="int64")
+        postings, tfs = [], []
+        for i, t in enumerate(vocab):
+            plist = term_docs[t]
+            indptr[i + 1] = indptr[i] + len(plist)
+            postings.extend(p for p, _ in plist)
+            tfs.extend(c for _, c in plist)
+        return cls(ids, vocab, indptr, np.asarray(postings, dtype="int32"),
+                   np.asarray(tfs, dtype="float32"), doc_len, k1, b)
+
+    def save(self, path):
+        tmp = path + ".tmp.npz"
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        np.savez(tmp, ids=self.ids, vocab=np.asarray(vocab, dtype=str), indptr=self.indptr,
+                 postings=self.postings, tfs=self.tfs, doc_len=self.doc_len,
+                 params=np.asarray([self.k1, self.b], dtype="float64"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as z:
+            k1, b = z["params"]
+            return cls(z["ids"], z["vocab"].tolist(), z["indptr"], z["postings"], z["tfs"], z["doc_len"],
+                       float(k1), float(b))
+
+    def scores(self, query, allowed=None):
+        """BM25 score per document position (0 where no term matches)."""
+        out = np.zeros(len(self.ids), dtype="float32")
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / (self.avg_len or 1.0))
+        for t in set(tokenize(query)):
+            i = self.vocab.get(t)
+            if i is None:
+                continue
+            lo, hi = self.indptr[i], self.indptr[i + 1]
+            docs, tf = self.postings[lo:hi], self.tfs[lo:hi]
+            out[docs] += self.idf[i] * tf * (self.k1 + 1) / (tf + norm[docs])
+        if allowed is not None:
+            out[~allowed] = 0.0
+        return out
+
+    def allowed_mask(self, store_ids):
+        """Boolean mask over document positions for a set of store_ids."""
+        mask = np.zeros(len(self.ids), dtype=bool)
+        pos = [self._pos[int(s)] for s in store_ids if int(s) in self._pos]
+        mask[pos] = True
+        return mask
+
+    def search(self, query, k=10, allowed_ids=None):
+        """[(store_id, score)] of the k best matching docs (only docs with a term match)."""
+        allowed = None if allowed_ids is None else self.allowed_mask(allowed_ids)
+        s = self.scores(query, allowed)
+        hits = np.flatnonzero(s > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-s[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-s[hits], kind="stable")]
+        return [(int(self.ids[h]), float(s[h])) for h in hits]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse ranked id lists: score(id) = sum 1 / (k + rank). Returns [(id, score)] best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, sid in enumerate(ranking, 1):
+            fused[sid] = fused.get(sid, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: -kv[1])
@@ -1,8 +1,6 @@
 import pandas as pd
-import os
 
-# Ensure the data folder exists
-os.makedirs("data", exist_ok=True)
+from data_store import write_table
 
 # Sample Koramangala clothing stores (fictional but realistic)
 data = [
@@ -16,6 +14,6 @@ data = [
 
 df = pd.DataFrame(data, columns=["store_id", "name", "address", "lat", "lon"])
 
-df.to_csv("data/stores.csv", index=False)
+path = write_table("stores", df)
 
-print("Created data/stores.csv successfully!")
+print(f"Created {path} successfully!")
@@ -0,0 +1,216 @@
+# src/data_store.py
+"""
+Table access for everything under data/.
+
+Each logical table (stores, footfall, hourly_agg, peaks) is stored as typed,
+zstd-compressed Parquet when pyarrow is installed, otherwise as the CSV the
+project always used (same file names, same bytes). Readers pass a column list and
+filters, which Parquet applies while scanning (only the requested columns and row
+groups are decoded):
+
+    read_table("peaks", columns=["store_id", "peak_hour"],
+               filters=[("store_id", "in", [1, 4])])
+
+Filters are (column, op, value) tuples, ANDed, with op one of
+= == != < <= > >= in "not in"; the CSV fallback applies the same filters after
+parsing. DATA_DIR moves the directory, DATA_FORMAT=csv|parquet picks what is written.
+When both files of a table exist, the newer one is read.
+"""
+import hashlib
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except Exception:
+    PARQUET_AVAILABLE = False
+
+DATA_DIR = os.environ.get("DATA_DIR", "data")
+DATA_FORMAT = os.environ.get("DATA_FORMAT", "parquet" if PARQUET_AVAILABLE else "csv")
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+COMPRESSION = "zstd"
+
+# table -> (file stem, column types used for Parquet)
+TABLES = {
+    "stores": ("stores", {"store_id": "int64", "name": "string", "address": "string",
+                          "lat": "float64", "lon": "float64"}),
+    "footfall": ("footfall_synthetic", {"store_id": "int64", "timestamp": "datetime",
+                                        "footfall": "int32"}),
+    "hourly_agg": ("footfall_hourly_agg", {"store_id": "int64", "hour": "int8", "footfall": "int64"}),
+    "peaks": ("store_peak_hours", {"store_id": "int64", "peak_hour": "int8", "peak_count": "int64"}),
+}
+
+_OPS = {
+    "=": lambda s, v: s == v,
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "in": lambda s, v: s.isin(list(v)),
+    "not in": lambda s, v: ~s.isin(list(v)),
+}
+
+
+def _format_of(path):
+    return "parquet" if path.endswith(".parquet") else "csv"
+
+
+def table_path(name, fmt=None):
+    """Path of `name` in format fmt (default DATA_FORMAT)."""
+    stem, _ = TABLES[name]
+    return os.path.join(DATA_DIR, f"{stem}.{fmt or DATA_FORMAT}")
+
+
+def existing_path(name):
+    """The table's file to read: the newer of the Parquet / CSV files that exist."""
+    found = [p for p in (table_path(name, "parquet"), table_path(name, "csv")) if os.path.exists(p)]
+    if not found:
+        raise FileNotFoundError(f"No data for table {name!r} in {DATA_DIR}/ (run the pipeline first)")
+    if len(found) == 2 and not PARQUET_AVAILABLE:
+        return found[1]
+    return max(found, key=os.path.getmtime)
+
+
+def table_mtime(name):
+    """Modification time of the table's current file (for cache keys)."""
+    return os.path.getmtime(existing_path(name))
+
+
+def coerce(df, name):
+    """Cast df's columns to the table's declared types (timestamps parsed with TIMESTAMP_FORMAT)."""
+    _, types = TABLES[name]
+    out = {}
+    for col, typ in types.items():
+        if col not in df.columns:
+            continue
+        if typ == "datetime":
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                out[col] = pd.to_datetime(df[col], format=TIMESTAMP_FORMAT).astype("datetime64[s]")
+        elif str(df[col].dtype) != typ:
+            out[col] = df[col].astype(typ)
+    return df.assign(**out) if out else df
+
+
+def _filter_columns(filters):
+    return [col for col, _, _ in filters or ()]
+
+
+def _apply_filters(df, filters):
+    for col, op, value in filters or ():
+        if op not in _OPS:
+            raise ValueError(f"Unsupported filter op {op!r}; use one of {sorted(_OPS)}")
+        df = df[_OPS[op](df[col], value)]
+    return df
+
+
+def read_path(path, columns=None, filters=None):
+    """Read one Parquet or CSV file with column projection and filters."""
+    if _format_of(path) == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError(f"Reading {path} needs pyarrow (pip install pyarrow).")
+        return pq.read_table(path, columns=columns, filters=filters or None).to_pandas()
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + _filter_columns(filters)))
+    df = _apply_filters(pd.read_csv(path, usecols=usecols), filters)
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+def read_table(name, columns=None, filters=None):
+    return read_path(existing_path(name), columns, filters)
+
+
+def iter_batches(path, columns=None, batch_size=250_000, row_groups=None):
+    """Stream a file as DataFrames of about batch_size rows (row_groups selects Parquet row groups)."""
+    if _format_of(path) == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError(f"Reading {path} needs pyarrow (pip install pyarrow).")
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=batch_size, columns=columns, row_groups=row_groups):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(path, usecols=columns, chunksize=batch_size)
+
+
+def parquet_row_groups(path):
+    return pq.ParquetFile(path).num_row_groups
+
+
+def parquet_fingerprint(path, n_row_groups):
+    """
+    sha1 of the first n row groups' metadata (row counts, sizes, column statistics),
+    to recognise a Parquet file that was rewritten with row groups appended.
+    """
+    meta = pq.ParquetFile(path).metadata
+    h = hashlib.sha1()
+    for i in range(n_row_groups):
+        rg = meta.row_group(i)
+        h.update(repr((rg.num_rows, rg.total_byte_size)).encode("utf8"))
+        for c in range(rg.num_columns):
+            stats = rg.column(c).statistics
+            if stats is not None and stats.has_min_max:
+                h.update(repr((stats.min, stats.max, stats.null_count)).encode("utf8"))
+    return h.hexdigest()
+
+
+def write_table(name, df, fmt=None):
+    """Write a whole table (atomically) and return its path."""
+    fmt = fmt or DATA_FORMAT
+    path = table_path(name, fmt)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).")
+        pq.write_table(pa.Table.from_pandas(coerce(df, name), preserve_index=False), tmp,
+                       compression=COMPRESSION)
+    elif fmt == "csv":
+        df.to_csv(tmp, index=False)
+    else:
+        raise ValueError(f"Unknown data format {fmt!r}; use 'csv' or 'parquet'.")
+    os.replace(tmp, path)
+    return path
+
+
+def write_chunks(chunks, path, fmt=None, name=None):
+    """
+    Stream DataFrame chunks into one CSV or Parquet file (one row group per chunk);
+    returns the number of rows written. `name` applies that table's column types.
+    """
+    fmt = fmt or _format_of(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    rows = 0
+    if fmt == "parquet":
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(coerce(chunk, name) if name else chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp, table.schema, compression=COMPRESSION)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    elif fmt == "csv":
+        with open(tmp, "w", newline="", encoding="utf8") as f:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=header)
+                header = False
+                rows += len(chunk)
+    else:
+        raise ValueError(f"Unknown output format {fmt!r}; use 'csv' or 'parquet'.")
+    if os.path.exists(tmp):
+        os.replace(tmp, path)
+    return rows
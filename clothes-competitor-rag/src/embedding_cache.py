@@ -0,0 +1,180 @@
+# src/embedding_cache.py
+"""
+Embedding cache shared by the indexing (embeddings_faiss) and query (rag_query) paths.
+
+Keys are sha1(model name + normalized text); normalisation collapses whitespace and,
+only for models whose tokenizer is uncased (UNCASED_MODELS, or lowercase=True), also
+lower-cases, so a cased model never gets one vector for "Next" and "next".
+Tier 1 is an in-memory LRU with a size cap; tier 2 (optional) is a SQLite table
+so hits survive restarts, capped at `max_disk_rows` with the least recently used
+rows evicted (a full index build writes every document vector through it).
+Misses in a batch are encoded in one model call.
+
+    cache = get_cache("all-MiniLM-L6-v2", model)
+    vecs = cache.encode(["List competitors ..."])   # same shape as model.encode
+    cache.stats()  # {'hits': .., 'disk_hits': .., 'misses': .., 'size': ..}
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DISK_CACHE_PATH = "data/embedding_cache.sqlite"
+DEFAULT_MAX_ITEMS = 10_000
+DEFAULT_MAX_DISK_ROWS = 50_000  # ~75 MB of 384-dim float32 vectors
+# models whose tokenizer lower-cases its input, so case folding cannot change a vector
+UNCASED_MODELS = frozenset({"all-MiniLM-L6-v2", "sentence-transformers/all-MiniLM-L6-v2"})
+
+
+def normalize(text, lowercase=False):
+    text = " ".join(str(text).split())
+    return text.lower() if lowercase else text
+
+
+def cache_key(model_name, text, lowercase=False):
+    return hashlib.sha1(f"{model_name}\0{normalize(text, lowercase)}".encode("utf8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Drop-in for SentenceTransformer.encode(list_of_texts) with an LRU + optional disk tier.
+    lowercase=None folds case in the keys only for models listed in UNCASED_MODELS.
+    """
+
+    def __init__(self, model, model_name, max_items=DEFAULT_MAX_ITEMS, disk_path=DISK_CACHE_PATH,
+                 max_disk_rows=DEFAULT_MAX_DISK_ROWS, lowercase=None):
+        self.model = model
+        self.model_name = model_name
+        self.lowercase = model_name in UNCASED_MODELS if lowercase is None else lowercase
+        self.max_items = max_items
+        self.disk_path = disk_path
+        self.max_disk_rows = max_disk_rows
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ---- disk tier -------------------------------------------------
+    def _disk(self):
+        if self.disk_path is None:
+            return None
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS emb ("
+                           " key TEXT PRIMARY KEY, dim INTEGER, vec BLOB, last_used REAL NOT NULL DEFAULT 0)")
+                if "last_used" not in [r[1] for r in db.execute("PRAGMA table_info(emb)")]:
+                    # tables written before eviction existed; their rows go first
+                    db.execute("ALTER TABLE emb ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                db.execute("CREATE INDEX IF NOT EXISTS emb_last_used ON emb(last_used)")
+            self._db = db
+        return self._db
+
+    def _disk_get(self, keys):
+        db = self._disk()
+        if db is None or not keys:
+            return {}
+        out = {}
+        for start in range(0, len(keys), 900):
+            chunk = keys[start:start + 900]
+            marks = ",".join("?" * len(chunk))
+            for key, dim, blob in db.execute(f"SELECT key, dim, vec FROM emb WHERE key IN ({marks})", chunk):
+                out[key] = np.frombuffer(blob, dtype="float32", count=dim)
+        if out:
+            now = time.time()
+            with db:
+                db.executemany("UPDATE emb SET last_used = ? WHERE key = ?", [(now, k) for k in out])
+        return out
+
+    def _disk_put(self, items):
+        db = self._disk()
+        if db is None or not items:
+            return
+        now = time.time()
+        with db:
+            db.executemany("INSERT OR REPLACE INTO emb VALUES (?,?,?,?)",
+                           [(k, v.shape[0], v.astype("float32").tobytes(), now) for k, v in items])
+            self._disk_evict(db)
+
+    def _disk_evict(self, db):
+        if self.max_disk_rows is None:
+            return
+        (count,) = db.execute("SELECT COUNT(*) FROM emb").fetchone()
+        if count > self.max_disk_rows:
+            db.execute("DELETE FROM emb WHERE key IN (SELECT key FROM emb ORDER BY last_used LIMIT ?)",
+                       (count - self.max_disk_rows,))
+
+    # ---- LRU ---------------------------------------------------------
+    def _remember(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def encode(self, texts, **kwargs):
+        """Return a float32 (len(texts), dim) array, encoding only cache misses."""
+        if isinstance(texts, str):
+            texts = [texts]
+        keys = [cache_key(self.model_name, t, self.lowercase) for t in texts]
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for key in unique:
+                vec = self._lru.get(key)
+                if vec is not None:
+                    self._lru.move_to_end(key)
+                    found[key] = vec
+            self.hits += len(found)
+            missing = [k for k in unique if k not in found]
+            on_disk = self._disk_get(missing)
+            self.disk_hits += len(on_disk)
+            for key, vec in on_disk.items():
+                self._remember(key, vec)
+            found.update(on_disk)
+
+        todo = [k for k in missing if k not in on_disk]
+        if todo:
+            text_of = dict(zip(keys, texts))
+            kwargs["convert_to_numpy"] = True
+            vecs = np.asarray(self.model.encode([text_of[k] for k in todo], **kwargs), dtype="float32")
+            fresh = list(zip(todo, vecs))
+            with self._lock:
+                self.misses += len(todo)
+                for key, vec in fresh:
+                    self._remember(key, vec)
+                self._disk_put(fresh)
+            found.update(fresh)
+        if not keys:
+            return np.empty((0, 0), dtype="float32")
+        return np.stack([found[k] for k in keys])
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, disk_hits=self.disk_hits, misses=self.misses, size=len(self._lru))
+
+    def clear(self, disk=False):
+        with self._lock:
+            self._lru.clear()
+            if disk and self._disk() is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM emb")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(model_name, model, **kwargs):
+    """Process-wide cache per model name, so indexing and querying share one LRU."""
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = _caches[model_name] = EmbeddingCache(model, model_name, **kwargs)
+        return cache
@@ -1,29 +1,149 @@
 # src/embeddings_faiss.py
-import pandas as pd
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
-import pickle
+import argparse
+import json
+import os
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from bm25_index import BM25Index, bm25_path
+from data_store import read_table
+from index_factory import DEFAULTS, INDEX_TYPES, build_index, load_index, save_index, supports_remove
+from meta_store import MetaStore, apply_changes, doc_hash, migrate_pickle, write_store, LEGACY_META_PKL
+from embedding_cache import get_cache
+from model_registry import EMBED_MODEL, LazyModel
 
-def build_vector_store():
-    stores = pd.read_csv("data/stores.csv")
-    peaks = pd.read_csv("data/store_peak_hours.csv")
+model = LazyModel(EMBED_MODEL)
+embedder = get_cache(EMBED_MODEL, model)
+
+INDEX_PATH = "data/faiss_index.idx"
+
+
+def make_documents():
+    """One document per store from the stores x store_peak_hours merge.
+    Returns (ids, docs, meta) with ids = store_id."""
+    stores = read_table("stores", columns=["store_id", "name", "address", "lat", "lon"])
+    peaks = read_table("peaks", columns=["store_id", "peak_hour", "peak_count"])
     merged = stores.merge(peaks, on="store_id")
+    ids = []
     docs = []
     meta=[]
     for _, r in merged.iterrows():
         txt = f"{r['name']}. Address: {r['address']}. Usual busiest hour: {int(r['peak_hour'])}. Typical peak footfall: {int(r['peak_count'])}."
+        ids.append(int(r['store_id']))
         docs.append(txt)
         meta.append(dict(store_id=int(r['store_id']), name=r['name'], lat=r['lat'], lon=r['lon']))
-    embeddings = model.encode(docs, convert_to_numpy=True)
-    dim = embeddings.shape[1]
-    idx = faiss.IndexFlatL2(dim)
-    idx.add(embeddings)
-    faiss.write_index(idx, "data/faiss_index.idx")
-    with open("data/faiss_meta.pkl","wb") as f:
-        pickle.dump({"docs":docs,"meta":meta,"embeddings":embeddings}, f)
-    print("Saved faiss_index and meta")
+    return ids, docs, meta
+
+
+def build_vector_store(index_type="flat", incremental=False, store_ids=None, **index_params):
+    """Embed the store docs and write the FAISS index (+ its config) and metadata store.
+    index_params are passed to index_factory.build_index (nlist, nprobe, ef_search, ...).
+    With incremental=True an existing store is updated in place (see update_vector_store)."""
+    if incremental and os.path.exists(INDEX_PATH):
+        return update_vector_store(store_ids)
+    ids, docs, meta = make_documents()
+    embeddings = embedder.encode(docs, convert_to_numpy=True)
+    idx, config = build_index(embeddings, index_type, ids=ids, **index_params)
+    save_index(idx, config, INDEX_PATH)
+    write_store(ids, docs, meta, embeddings)
+    # keyword side of hybrid retrieval, stored next to the FAISS index
+    BM25Index.build(ids, docs).save(bm25_path(INDEX_PATH))
+    print(f"Saved faiss_index ({config['index_type']}) and meta")
+
+
+def update_vector_store(store_ids=None):
+    """
+    Incremental rebuild keyed on store_id.
+
+    Every generated document is hashed; only new or changed stores are re-encoded,
+    stores that disappeared are removed from the ID-mapped index, and the new
+    vectors are appended to the metadata store's matrix in place
+    (meta_store.apply_changes), so encoding and embeddings I/O scale with the number
+    of changes rather than the corpus size. Superseded and deleted rows are holes;
+    once they pass meta_store.COMPACT_RATIO of the matrix the live rows are copied
+    into a fresh file once, so it stays within 1 / (1 - COMPACT_RATIO) of the corpus.
+    Documents are still generated and hashed for every store, and the FAISS and
+    BM25 index files are rewritten whole.
+    Falls back to a full build, with the index type and build parameters stored in
+    the index config, when the existing index is not ID-mapped (written before
+    incremental mode) or is an HNSW index that would need vectors removed.
+    store_ids (e.g. the re-embed list from preprocess --incremental) limits the
+    new/changed check to those stores; deletions are always detected.
+    Returns dict(added=[...], changed=[...], deleted=[...], rebuilt=bool, compacted=bool).
+    """
+    store = MetaStore()
+    if not store.exists() and os.path.exists(LEGACY_META_PKL):
+        migrate_pickle(index_path=INDEX_PATH)
+    idx, config = load_index(INDEX_PATH)
+    ids, docs, meta = make_documents()
+    has_store = store.exists()
+    old_hash = store.hashes() if has_store else {}
+    store.close()
+    new_hash = {sid: doc_hash(d) for sid, d in zip(ids, docs)}
+
+    wanted = None if store_ids is None else {int(s) for s in store_ids}
+    candidates = ids if wanted is None else [sid for sid in ids if sid in wanted]
+    added = [sid for sid in candidates if sid not in old_hash]
+    changed = [sid for sid in candidates if sid in old_hash and old_hash[sid] != new_hash[sid]]
+    deleted = [sid for sid in old_hash if sid not in new_hash]
+    summary = dict(added=added, changed=changed, deleted=deleted, rebuilt=False, compacted=False)
+    if not config.get("id_mapped") or not has_store:
+        print("Existing index is not ID-mapped; doing a full rebuild")
+        return _rebuild(config, summary)
+    if not (added or changed or deleted):
+        if not os.path.exists(bm25_path(INDEX_PATH)):
+            BM25Index.build(ids, docs).save(bm25_path(INDEX_PATH))
+        print("Vector store is up to date")
+        return summary
+
+    if (changed or deleted) and not supports_remove(config):
+        print(f"{config['index_type']} index cannot remove vectors; doing a full rebuild")
+        return _rebuild(config, summary)
+
+    stale = changed + deleted
+    if stale:
+        idx.remove_ids(np.array(stale, dtype="int64"))
+
+    embed_ids = added + changed
+    pos = {sid: i for i, sid in enumerate(ids)}
+    emb = np.empty((0, config["dim"]), dtype="float32")
+    if embed_ids:
+        emb = embedder.encode([docs[pos[sid]] for sid in embed_ids], convert_to_numpy=True)
+        idx.add_with_ids(emb, np.array(embed_ids, dtype="int64"))
+
+    summary["compacted"] = apply_changes(embed_ids, [docs[pos[s]] for s in embed_ids],
+                                         [meta[pos[s]] for s in embed_ids], emb, deleted)
+    config["ntotal"] = int(idx.ntotal)
+    save_index(idx, config, INDEX_PATH)
+    # the BM25 index is cheap to rebuild from the docs (no encoding involved)
+    BM25Index.build(ids, docs).save(bm25_path(INDEX_PATH))
+    print(f"Updated faiss_index: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted")
+    return summary
+
+
+def _rebuild(config, summary):
+    """Full build with the index type and build parameters recorded in `config`."""
+    params = {k: config[k] for k in DEFAULTS if config.get(k) is not None}
+    build_vector_store(config.get("index_type", "flat"), **params)
+    summary["rebuilt"] = True
+    return summary
+
+
 if __name__=='__main__':
-    build_vector_store()
+    ap = argparse.ArgumentParser(description="Build the competitor FAISS vector store")
+    ap.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    ap.add_argument("--nlist", type=int)
+    ap.add_argument("--nprobe", type=int)
+    ap.add_argument("--ef-search", type=int)
+    ap.add_argument("--hnsw-m", type=int)
+    ap.add_argument("--incremental", action="store_true",
+                    help="only re-embed new/changed stores and drop deleted ones")
+    ap.add_argument("--stores-file", help="JSON list of store_ids to check (with --incremental), "
+                                          "e.g. data/reembed_store_ids.json from preprocess --incremental")
+    args = ap.parse_args()
+    store_ids = None
+    if args.stores_file:
+        with open(args.stores_file, encoding="utf8") as f:
+            store_ids = json.load(f)
+    build_vector_store(args.index_type, incremental=args.incremental, store_ids=store_ids, nlist=args.nlist,
+                       nprobe=args.nprobe, ef_search=args.ef_search, hnsw_m=args.hnsw_m)
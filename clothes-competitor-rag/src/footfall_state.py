@@ -0,0 +1,225 @@
+# src/footfall_state.py
+"""
+Incremental footfall aggregation state for the nightly pipeline.
+
+data/footfall_state.sqlite keeps
+  hourly(store_id, hour, footfall)       running hourly sums
+  peaks(store_id, peak_hour, peak_count) current peak per store
+  watermark(store_id, last_ts)           last timestamp folded in per store
+  source(path, offset, tail_sha1)        how far the footfall file has been read
+
+New footfall is appended to the CSV, so a run seeks to the saved byte offset and
+reads only what was added since (up to the last complete line). A Parquet table
+grows by row groups instead: the offset is the number of row groups read, and a
+run reads only the groups after it. Rows at or before a store's watermark are
+dropped, so re-delivered hours are not counted twice. If what was read before no
+longer matches (the bytes before the CSV offset, or the metadata of the Parquet
+row groups already read), the whole file is rescanned with the same watermark filter.
+
+Peaks are recomputed only for stores that received rows, and the stores whose
+peak hour or count changed are reported: their documents need re-embedding.
+
+    python src/preprocess.py --incremental
+    python src/embeddings_faiss.py --incremental --stores-file data/reembed_store_ids.json
+"""
+import hashlib
+import io
+import os
+import sqlite3
+
+import pandas as pd
+
+from data_store import TIMESTAMP_FORMAT, iter_batches, parquet_fingerprint, parquet_row_groups
+from preprocess import COLUMNS, RangeReader, merge_partials
+
+STATE_DB = "data/footfall_state.sqlite"
+REEMBED_PATH = "data/reembed_store_ids.json"
+_TAIL = 4096  # bytes before the offset used to recognise an appended file
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    store_id  INTEGER NOT NULL,
+    hour      INTEGER NOT NULL,
+    footfall  INTEGER NOT NULL,
+    PRIMARY KEY (store_id, hour)
+);
+CREATE TABLE IF NOT EXISTS peaks (
+    store_id   INTEGER PRIMARY KEY,
+    peak_hour  INTEGER NOT NULL,
+    peak_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS watermark (
+    store_id INTEGER PRIMARY KEY,
+    last_ts  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS source (
+    path      TEXT PRIMARY KEY,
+    offset    INTEGER NOT NULL,
+    tail_sha1 TEXT NOT NULL
+);
+"""
+
+_MAX_PARAMS = 900
+
+
+def _is_parquet(path):
+    return path.endswith(".parquet")
+
+
+def _tail_sha1(path, offset):
+    if _is_parquet(path):
+        return parquet_fingerprint(path, offset)
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - _TAIL))
+        return hashlib.sha1(f.read(offset - max(0, offset - _TAIL))).hexdigest()
+
+
+def _last_complete_line(path):
+    """Byte offset just past the last newline (a half-written last line is left for next run)."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        pos = size
+        while pos > 0:
+            step = min(65536, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            nl = block.rfind(b"\n")
+            if nl >= 0:
+                return pos - step + nl + 1
+            pos -= step
+    return 0
+
+
+def _fold(chunk, marks):
+    """(partial sums, per-store max timestamp, row count) of the rows after their store's watermark."""
+    ts = pd.to_datetime(chunk["timestamp"], format=TIMESTAMP_FORMAT)
+    mark = pd.Series(marks.reindex(chunk["store_id"].to_numpy()).to_numpy(), index=chunk.index)
+    keep = mark.isna() | (ts > mark)
+    if not keep.all():
+        chunk, ts = chunk[keep], ts[keep]
+    if not len(chunk):
+        return None
+    sums = chunk["footfall"].groupby([chunk["store_id"], ts.dt.hour.rename("hour")]).sum()
+    return sums, ts.groupby(chunk["store_id"]).max(), len(chunk)
+
+
+class FootfallState:
+    def __init__(self, db_path=STATE_DB):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    # ---- reading new rows ------------------------------------------------------
+    def _start_offset(self, path):
+        """Where to resume reading `path`: saved offset if the file was only appended to."""
+        row = self._db.execute("SELECT offset, tail_sha1 FROM source WHERE path = ?", (path,)).fetchone()
+        if row is not None:
+            offset, tail = row
+            size = parquet_row_groups(path) if _is_parquet(path) else os.path.getsize(path)
+            if offset <= size and _tail_sha1(path, offset) == tail:
+                return offset
+        if _is_parquet(path):
+            return 0
+        with open(path, "rb") as f:
+            f.readline()  # header
+            return f.tell()
+
+    def watermarks(self):
+        return dict(self._db.execute("SELECT store_id, last_ts FROM watermark"))
+
+    def _marks(self):
+        wm = self.watermarks()
+        return pd.Series(pd.to_datetime(list(wm.values()), format=TIMESTAMP_FORMAT),
+                         index=pd.Index(list(wm.keys()), dtype="int64"))
+
+    def read_range(self, path, start, end, chunksize):
+        """
+        Yield (partial sums, per-store max timestamp, row count) per chunk of bytes
+        [start, end), skipping rows at or before their store's watermark.
+        """
+        if end <= start:
+            return
+        marks = self._marks()
+        reader = io.BufferedReader(RangeReader(path, start, end))
+        with reader:
+            for chunk in pd.read_csv(reader, header=None, names=COLUMNS, chunksize=chunksize,
+                                     dtype={"store_id": "int64", "timestamp": "str", "footfall": "int64"}):
+                folded = _fold(chunk, marks)
+                if folded is not None:
+                    yield folded
+
+    def read_row_groups(self, path, start, end, chunksize):
+        """read_range for a Parquet file: row groups [start, end) instead of bytes."""
+        if end <= start:
+            return
+        marks = self._marks()
+        for chunk in iter_batches(path, COLUMNS, chunksize, list(range(start, end))):
+            folded = _fold(chunk, marks)
+            if folded is not None:
+                yield folded
+
+    # ---- folding in ------------------------------------------------------------
+    def update(self, path, chunksize=250_000):
+        """
+        Fold rows appended to `path` since the last run into the state.
+        Returns dict(new_rows, changed=[store_ids with new rows], reembed=[store_ids whose peak changed]).
+        """
+        if _is_parquet(path):
+            start, end = self._start_offset(path), parquet_row_groups(path)
+            parts = self.read_row_groups(path, start, end, chunksize)
+        else:
+            start, end = self._start_offset(path), _last_complete_line(path)
+            parts = self.read_range(path, start, end, chunksize)
+        sums, latest, rows = [], [], 0
+        for part, last, n in parts:
+            sums.append(part)
+            latest.append(last)
+            rows += n
+        new = merge_partials(sums)
+        changed = sorted(int(s) for s in new.index.get_level_values("store_id").unique())
+        reembed = []
+        with self._db:
+            if len(new):
+                self._db.executemany(
+                    "INSERT INTO hourly VALUES (?,?,?) ON CONFLICT(store_id, hour)"
+                    " DO UPDATE SET footfall = footfall + excluded.footfall",
+                    [(int(s), int(h), int(v)) for (s, h), v in new.items()])
+                last_ts = pd.concat(latest).groupby(level=0).max()
+                self._db.executemany(
+                    "INSERT INTO watermark VALUES (?,?) ON CONFLICT(store_id)"
+                    " DO UPDATE SET last_ts = max(last_ts, excluded.last_ts)",
+                    [(int(s), t.isoformat()) for s, t in last_ts.items()])
+                reembed = self._recompute_peaks(changed)
+            self._db.execute("INSERT OR REPLACE INTO source VALUES (?,?,?)",
+                             (path, end, _tail_sha1(path, end)))
+        return dict(new_rows=rows, changed=changed, reembed=reembed)
+
+    def _recompute_peaks(self, store_ids):
+        """Peak (first hour with the highest total) for store_ids; returns the ids whose peak changed."""
+        reembed = []
+        for lo in range(0, len(store_ids), _MAX_PARAMS):
+            ids = store_ids[lo:lo + _MAX_PARAMS]
+            marks = ",".join("?" * len(ids))
+            old = {s: (h, c) for s, h, c in self._db.execute(
+                f"SELECT store_id, peak_hour, peak_count FROM peaks WHERE store_id IN ({marks})", ids)}
+            best = {}
+            for s, h, v in self._db.execute(
+                    f"SELECT store_id, hour, footfall FROM hourly WHERE store_id IN ({marks})"
+                    " ORDER BY store_id, hour", ids):
+                if s not in best or v > best[s][1]:
+                    best[s] = (h, v)
+            self._db.executemany("INSERT OR REPLACE INTO peaks VALUES (?,?,?)",
+                                 [(s, h, v) for s, (h, v) in best.items()])
+            reembed.extend(s for s, peak in best.items() if old.get(s) != peak)
+        return sorted(reembed)
+
+    # ---- outputs ---------------------------------------------------------------
+    def hourly_frame(self):
+        return pd.read_sql_query("SELECT store_id, hour, footfall FROM hourly ORDER BY store_id, hour", self._db)
+
+    def peaks_frame(self):
+        return pd.read_sql_query("SELECT store_id, peak_hour, peak_count FROM peaks ORDER BY store_id", self._db)
@@ -1,36 +1,100 @@
 # src/generate_synthetic.py
-import pandas as pd
+"""
+Synthetic hourly footfall: one row per (store, day, hour).
+
+Each store gets a baseline (20..79) and a peak hour from PEAK_HOURS; every day is a
+gaussian bump around the peak hour with multiplicative noise. The whole
+(store x day x hour) grid is built with numpy broadcasting from one seeded
+np.random.Generator, and large outputs are produced in chunks of stores so memory
+stays flat and rows can be streamed straight to CSV or Parquet:
+
+    python src/generate_synthetic.py --days 28 --seed 7
+    python src/generate_synthetic.py --stores 100000 --days 42 --format parquet
+
+For a given seed the output is the same whatever the chunk size: store parameters
+are drawn first, then the noise is drawn store by store in output order.
+"""
+import argparse
+
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
 
-def generate_for_store(base, peak_hour=15, noise=0.2):
+from data_store import DATA_FORMAT, read_table, table_path, write_chunks  # noqa: F401 (write_chunks re-exported)
+
+START = "2025-11-01"  # example start date
+PEAK_HOURS = np.array([12, 13, 14, 15, 18, 19, 20])
+NOISE = 0.2
+STORES_PER_CHUNK = 2000
+
+
+def generate_for_store(base, peak_hour=15, noise=NOISE, rng=None):
     # returns 24-length series for a day
+    rng = rng if rng is not None else np.random.default_rng()
+    return footfall_curves(np.array([base]), np.array([peak_hour]), 1, rng, noise)[0, 0]
+
+
+def footfall_curves(base, peak_hour, days, rng, noise=NOISE):
+    """(n_stores, days, 24) int32 footfall for per-store base / peak_hour arrays."""
     hours = np.arange(24)
-    # gaussian peak
-    peak = base * (1 + np.exp(-0.5*((hours-peak_hour)/3)**2)*2)
-    peak = peak * (1 + np.random.randn(24)*noise)
-    return np.clip(peak.round().astype(int), 0, None)
-
-def generate_days(stores_df, days=14):
-    rows=[]
-    start = datetime(2025,11,1)  # example start date
-    for i, r in stores_df.iterrows():
-        base = np.random.randint(20,80)  # baseline footfall
-        peak_hour = np.random.choice([12,13,14,15,18,19,20])
-        for d in range(days):
-            day = start + timedelta(days=d)
-            series = generate_for_store(base, peak_hour)
-            for h, val in enumerate(series):
-                ts = datetime(day.year, day.month, day.day, h)
-                rows.append({
-                    "store_id": r['store_id'],
-                    "timestamp": ts.isoformat(),
-                    "footfall": int(val)
-                })
-    return pd.DataFrame(rows)
+    # gaussian peak, (n_stores, 1, 24)
+    bump = np.exp(-0.5 * ((hours[None, :] - peak_hour[:, None]) / 3) ** 2)
+    curve = (base[:, None] * (1 + bump * 2))[:, None, :]
+    noisy = curve * (1 + rng.standard_normal((len(base), days, 24)) * noise)
+    return np.clip(noisy.round(), 0, None).astype(np.int32)
+
+
+def hour_labels(days, start=START):
+    """ISO timestamps ("2025-11-01T00:00:00", ...) for days * 24 hours."""
+    stamps = np.datetime64(start, "h") + np.arange(days * 24)
+    return np.datetime_as_string(stamps.astype("datetime64[s]"), unit="s")
+
+
+def iter_chunks(stores_df, days=14, start=START, seed=None, stores_per_chunk=STORES_PER_CHUNK):
+    """Yield DataFrames (store_id, timestamp, footfall) covering stores_per_chunk stores each."""
+    rng = np.random.default_rng(seed)
+    store_ids = stores_df["store_id"].to_numpy()
+    base = rng.integers(20, 80, size=len(store_ids))  # baseline footfall
+    peak_hour = rng.choice(PEAK_HOURS, size=len(store_ids))
+    # timestamps repeat for every store: keep them as a categorical over one day-range
+    labels = pd.Index(hour_labels(days, start))
+    per_store = days * 24
+    for lo in range(0, len(store_ids), stores_per_chunk):
+        hi = min(lo + stores_per_chunk, len(store_ids))
+        footfall = footfall_curves(base[lo:hi], peak_hour[lo:hi], days, rng)
+        codes = np.tile(np.arange(per_store, dtype=np.int32), hi - lo)
+        yield pd.DataFrame({
+            "store_id": np.repeat(store_ids[lo:hi], per_store),
+            "timestamp": pd.Categorical.from_codes(codes, categories=labels),
+            "footfall": footfall.ravel(),
+        })
+
+
+def generate_days(stores_df, days=14, start=START, seed=None):
+    chunks = list(iter_chunks(stores_df, days, start, seed))
+    if not chunks:
+        return pd.DataFrame(columns=["store_id", "timestamp", "footfall"])
+    df = pd.concat(chunks, ignore_index=True)
+    df["timestamp"] = df["timestamp"].astype(str)
+    return df
+
+
+def synthetic_stores(n):
+    return pd.DataFrame({"store_id": np.arange(1, n + 1)})
+
 
 if __name__=='__main__':
-    stores = pd.read_csv("data/stores.csv")
-    df = generate_days(stores, days=28)
-    df.to_csv("data/footfall_synthetic.csv", index=False)
-    print("Saved data/footfall_synthetic.csv")
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=28)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--stores", type=int, default=None,
+                    help="generate this many synthetic store ids instead of reading the stores table")
+    ap.add_argument("--format", choices=["csv", "parquet"], default=DATA_FORMAT)
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--chunk-stores", type=int, default=STORES_PER_CHUNK)
+    args = ap.parse_args()
+
+    stores = synthetic_stores(args.stores) if args.stores else read_table("stores", columns=["store_id"])
+    out = args.out or table_path("footfall", args.format)
+    n = write_chunks(iter_chunks(stores, days=args.days, seed=args.seed, stores_per_chunk=args.chunk_stores),
+                     out, args.format, name="footfall")
+    print(f"Saved {out} ({n} rows)")
@@ -0,0 +1,127 @@
+# src/geo_index.py
+"""
+Grid index over store coordinates for exact proximity queries.
+
+Stores are bucketed into square cells of about `cell_m` metres (lat/lon
+degrees, with the longitude step sized for the highest latitude in the data so
+no cell is narrower than cell_m). Points are sorted by cell key, so one grid row
+of a bounding box is one contiguous slice found with np.searchsorted. A query
+gathers the slices of the cells overlapping the radius and checks only those
+candidates with a vectorized haversine, so results are exact and the cost
+depends on the local density, not the number of stores.
+
+    geo = GeoIndex.from_table()              # or GeoIndex(ids, lats, lons)
+    geo.within(12.9352, 77.6158, 500)        # [(store_id, metres)] nearest first
+    geo.nearest(12.9352, 77.6158, k=5)
+
+City-scale data is assumed: cells do not wrap around the antimeridian.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_M = 6_371_000.0
+M_PER_DEG_LAT = math.pi * EARTH_RADIUS_M / 180
+CELL_M = 250.0
+
+
+def haversine_m(lat, lon, lats, lons):
+    """Great-circle distance in metres from (lat, lon) to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeoIndex:
+    def __init__(self, ids, lats, lons, cell_m=CELL_M):
+        ids = np.asarray(ids, dtype="int64")
+        lats = np.asarray(lats, dtype="float64")
+        lons = np.asarray(lons, dtype="float64")
+        self.cell_m = cell_m
+        self.size = len(ids)
+        if self.size:
+            self.lat0, self.lon0 = float(lats.min()), float(lons.min())
+            max_abs_lat = min(float(np.abs(lats).max()), 89.0)
+        else:
+            self.lat0 = self.lon0 = max_abs_lat = 0.0
+        self.dlat = cell_m / M_PER_DEG_LAT
+        self.dlon = cell_m / (M_PER_DEG_LAT * math.cos(math.radians(max_abs_lat)))
+        rows, cols = self._cell(lats, lons)
+        self.ncols = int(cols.max()) + 1 if self.size else 1
+        self.nrows = int(rows.max()) + 1 if self.size else 1
+        keys = rows * self.ncols + cols
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.lat1 = float(lats.max()) if self.size else 0.0
+        self.lon1 = float(lons.max()) if self.size else 0.0
+        self.ids = ids[order]
+        self.lats = lats[order]
+        self.lons = lons[order]
+
+    @classmethod
+    def from_store(cls, store, cell_m=CELL_M):
+        """From a meta_store.MetaStore (the stores behind the FAISS index)."""
+        return cls(*store.locations(), cell_m=cell_m)
+
+    @classmethod
+    def from_table(cls, cell_m=CELL_M):
+        """From the stores table (data_store)."""
+        from data_store import read_table
+        stores = read_table("stores", columns=["store_id", "lat", "lon"]).dropna()
+        return cls(stores["store_id"], stores["lat"], stores["lon"], cell_m=cell_m)
+
+    def _cell(self, lats, lons):
+        rows = np.floor((np.asarray(lats) - self.lat0) / self.dlat).astype("int64")
+        cols = np.floor((np.asarray(lons) - self.lon0) / self.dlon).astype("int64")
+        return rows, cols
+
+    def _candidates(self, lat, lon, radius_m):
+        """Positions of the points in the cells overlapping the radius' bounding box."""
+        if not self.size:
+            return np.empty(0, dtype="int64")
+        dlat = radius_m / M_PER_DEG_LAT
+        cos_lat = max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6)
+        dlon = radius_m / (M_PER_DEG_LAT * cos_lat)
+        (r0, r1), (c0, c1) = self._cell([lat - dlat, lat + dlat], [lon - dlon, lon + dlon])
+        r0, r1 = max(int(r0), 0), min(int(r1), self.nrows - 1)
+        c0, c1 = max(int(c0), 0), min(int(c1), self.ncols - 1)
+        if r0 > r1 or c0 > c1:
+            return np.empty(0, dtype="int64")
+        row_keys = np.arange(r0, r1 + 1, dtype="int64") * self.ncols
+        lo = np.searchsorted(self.keys, row_keys + c0, side="left")
+        hi = np.searchsorted(self.keys, row_keys + c1, side="right")
+        spans = [np.arange(a, b) for a, b in zip(lo, hi) if b > a]
+        return np.concatenate(spans) if spans else np.empty(0, dtype="int64")
+
+    def within(self, lat, lon, radius_m, ids_only=False):
+        """Stores within radius_m metres: [(store_id, metres)] nearest first (or an id array)."""
+        pos = self._candidates(lat, lon, radius_m)
+        d = haversine_m(lat, lon, self.lats[pos], self.lons[pos])
+        keep = d <= radius_m
+        pos, d = pos[keep], d[keep]
+        if ids_only:
+            return self.ids[pos]
+        order = np.argsort(d, kind="stable")
+        return [(int(self.ids[p]), float(x)) for p, x in zip(pos[order], d[order])]
+
+    def nearest(self, lat, lon, k=5, max_radius_m=None):
+        """k nearest stores [(store_id, metres)], optionally no further than max_radius_m."""
+        if not self.size or k <= 0:
+            return []
+        radius = self.cell_m
+        # beyond this radius every store is inside (farthest corner of the data's bounding box)
+        extent = 1.01 * float(haversine_m(lat, lon, np.array([self.lat0, self.lat0, self.lat1, self.lat1]),
+                                          np.array([self.lon0, self.lon1, self.lon0, self.lon1])).max())
+        while True:
+            if max_radius_m is not None:
+                radius = min(radius, max_radius_m)
+            pos = self._candidates(lat, lon, radius)
+            d = haversine_m(lat, lon, self.lats[pos], self.lons[pos])
+            inside = d <= radius
+            # exact once k points lie inside the searched radius (nothing outside can be closer)
+            if inside.sum() >= k or radius >= extent or radius == max_radius_m:
+                pos, d = pos[inside], d[inside]
+                order = np.argsort(d, kind="stable")[:k]
+                return [(int(self.ids[p]), float(x)) for p, x in zip(pos[order], d[order])]
+            radius *= 2
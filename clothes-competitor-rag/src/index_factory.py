@@ -0,0 +1,168 @@
+# src/index_factory.py
+"""
+FAISS index factory shared by the indexing (embeddings_faiss) and query (rag_query) paths.
+
+Supported index types:
+  flat      exact IndexFlatL2 (default, fine for a few thousand docs)
+  ivf_flat  inverted lists over a coarse quantizer, tune `nprobe`
+  ivf_pq    IVF + product quantization (compressed vectors), tune `nprobe`
+  hnsw      graph index, tune `ef_search`
+
+The index type and its parameters are written next to the index file
+(data/faiss_index.idx -> data/faiss_index.json) so the query side can rebuild
+the right searcher and apply the stored search-time parameters.
+"""
+import json
+import math
+import os
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# faiss warns below ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+DEFAULTS = {
+    "nlist": None,          # None -> ~4*sqrt(n), capped by the training set size
+    "nprobe": 8,
+    "pq_m": None,           # None -> dim // 8 sub-quantizers
+    "pq_nbits": 8,
+    "hnsw_m": 32,
+    "ef_construction": 80,
+    "ef_search": 64,
+    "train_size": 100_000,  # max vectors sampled for training
+    "seed": 0,
+}
+
+
+def config_path(index_path):
+    return os.path.splitext(index_path)[0] + ".json"
+
+
+def _default_nlist(n):
+    nlist = int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_CENTROID))
+
+
+def _default_pq_m(dim):
+    for m in (dim // 8, dim // 4, dim // 2, dim):
+        if m > 0 and dim % m == 0:
+            return m
+    return 1
+
+
+def _training_sample(embeddings, train_size, seed):
+    n = embeddings.shape[0]
+    if n <= train_size:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    pick = np.sort(rng.choice(n, size=train_size, replace=False))
+    return embeddings[pick]
+
+
+def build_index(embeddings, index_type="flat", ids=None, **params):
+    """
+    Build, train (on a sample) and fill an index of the given type.
+    Returns (index, config) where config is what save_index persists.
+    Tiny corpora that cannot train an IVF/PQ quantizer fall back to flat.
+
+    With `ids` (int64 labels, e.g. store_id) the index is ID-mapped: search
+    returns those labels instead of row positions, and vectors can later be
+    removed / re-added per id (see embeddings_faiss incremental mode).
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}.")
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown index parameters: {sorted(unknown)}")
+    cfg = dict(DEFAULTS, **{k: v for k, v in params.items() if v is not None})
+
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n, dim = embeddings.shape
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = cfg["nlist"] or _default_nlist(n)
+        min_train = nlist * MIN_POINTS_PER_CENTROID
+        if index_type == "ivf_pq":
+            min_train = max(min_train, (1 << cfg["pq_nbits"]) * MIN_POINTS_PER_CENTROID)
+        if n < min_train:
+            print(f"Only {n} vectors, not enough to train {index_type} (need {min_train}); using flat index")
+            index_type = "flat"
+        else:
+            cfg["nlist"] = nlist
+
+    if index_type == "flat":
+        idx = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        idx = faiss.IndexHNSWFlat(dim, cfg["hnsw_m"])
+        idx.hnsw.efConstruction = cfg["ef_construction"]
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            idx = faiss.IndexIVFFlat(quantizer, dim, cfg["nlist"], faiss.METRIC_L2)
+        else:
+            cfg["pq_m"] = cfg["pq_m"] or _default_pq_m(dim)
+            if dim % cfg["pq_m"]:
+                raise ValueError(f"pq_m={cfg['pq_m']} must divide the embedding dim {dim}")
+            idx = faiss.IndexIVFPQ(quantizer, dim, cfg["nlist"], cfg["pq_m"], cfg["pq_nbits"])
+        idx.train(_training_sample(embeddings, cfg["train_size"], cfg["seed"]))
+
+    if ids is None:
+        idx.add(embeddings)
+    else:
+        if index_type in ("flat", "hnsw"):
+            # IVF indexes store ids natively, flat/HNSW need the IDMap wrapper
+            idx = faiss.IndexIDMap(idx)
+        idx.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype="int64"))
+
+    config = {"index_type": index_type, "dim": dim, "ntotal": int(idx.ntotal), "id_mapped": ids is not None}
+    if index_type in ("ivf_flat", "ivf_pq"):
+        config.update(nlist=cfg["nlist"], nprobe=cfg["nprobe"])
+    if index_type == "ivf_pq":
+        config.update(pq_m=cfg["pq_m"], pq_nbits=cfg["pq_nbits"])
+    if index_type == "hnsw":
+        config.update(hnsw_m=cfg["hnsw_m"], ef_construction=cfg["ef_construction"], ef_search=cfg["ef_search"])
+    set_search_params(idx, config)
+    return idx, config
+
+
+def set_search_params(idx, config):
+    """Apply search-time knobs (nprobe / efSearch) from a config dict."""
+    index_type = config.get("index_type", "flat")
+    if index_type in ("ivf_flat", "ivf_pq") and config.get("nprobe"):
+        faiss.extract_index_ivf(idx).nprobe = int(config["nprobe"])
+    elif index_type == "hnsw" and config.get("ef_search"):
+        base = idx.index if isinstance(idx, faiss.IndexIDMap) else idx
+        faiss.downcast_index(base).hnsw.efSearch = int(config["ef_search"])
+    return idx
+
+
+def supports_remove(config):
+    """HNSW graphs cannot drop vectors; everything else can remove_ids."""
+    return config.get("index_type", "flat") != "hnsw"
+
+
+def save_index(idx, config, index_path):
+    with open(config_path(index_path), "w", encoding="utf8") as f:
+        json.dump(config, f, indent=2)
+    faiss.write_index(idx, index_path)
+
+
+def read_config(index_path):
+    """Stored index config; indexes written before the factory existed are flat."""
+    try:
+        with open(config_path(index_path), encoding="utf8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"index_type": "flat"}
+
+
+def load_index(index_path, **search_overrides):
+    """Read an index and apply its stored search params (overridable, e.g. nprobe=32)."""
+    idx = faiss.read_index(index_path)
+    config = read_config(index_path)
+    config.update({k: v for k, v in search_overrides.items() if v is not None})
+    set_search_params(idx, config)
+    return idx, config
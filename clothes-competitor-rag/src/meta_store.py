@@ -0,0 +1,338 @@
+# src/meta_store.py
+"""
+Document metadata + embeddings store for the FAISS index.
+
+Replaces the single faiss_meta.pkl blob (docs, meta and the full embeddings array
+unpickled by every reader) with:
+  data/faiss_meta.sqlite            one row per store_id: doc text, hash, name, lat, lon, row,
+                                    plus an info table naming the current matrix file
+  data/faiss_embeddings.<gen>.f32   raw float32 matrix (n_rows x dim), memory-mapped read-only
+
+A top-k lookup is a primary-key SELECT of k rows, and the embeddings are only paged
+in when touched. Because the matrix is memory-mapped read-only, several Streamlit
+workers on one box share the same page-cache pages instead of each holding a copy.
+
+The SQLite file is the single pointer to a consistent store. A full write creates a
+new generation (matrix file + database) and switches to it with one os.replace of
+the database; an incremental update appends rows to the current matrix in place
+and then commits the rows that point at them. Rows of changed or deleted stores
+become holes, and once they pass COMPACT_RATIO of the matrix the live rows are
+copied into a new generation. Stores written before generations (a single .npy
+next to the database) are still read and are converted on their first update.
+
+Migrate an existing pickle with:
+    python src/meta_store.py --migrate
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+
+import numpy as np
+
+META_DB = "data/faiss_meta.sqlite"
+# base name of the matrix files (data/faiss_embeddings.<gen>.f32); the .npy itself is
+# only read for stores written before generations
+EMB_PATH = "data/faiss_embeddings.npy"
+LEGACY_META_PKL = "data/faiss_meta.pkl"
+# compact once superseded / deleted rows make up this share of the matrix
+COMPACT_RATIO = 0.25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    store_id INTEGER PRIMARY KEY,
+    row      INTEGER NOT NULL,
+    doc      TEXT NOT NULL,
+    hash     TEXT NOT NULL,
+    name     TEXT,
+    lat      REAL,
+    lon      REAL
+);
+CREATE TABLE IF NOT EXISTS info (
+    key   TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# SQLite's default limit on host parameters is 999 on older builds
+_MAX_PARAMS = 900
+
+
+def doc_hash(txt):
+    return hashlib.sha1(txt.encode("utf8")).hexdigest()
+
+
+def matrix_path(emb_path, generation):
+    return f"{os.path.splitext(emb_path)[0]}.{generation}.f32"
+
+
+def _read_info(conn):
+    """{key: value} from the info table; {} for a store written before generations."""
+    try:
+        return dict(conn.execute("SELECT key, value FROM info"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def _open_matrix(path, n_rows, dim):
+    if n_rows == 0:
+        return np.empty((0, dim), dtype="float32")
+    return np.memmap(path, dtype="float32", mode="r", shape=(n_rows, dim))
+
+
+class MetaStore:
+    """Read side. Connections are per-thread, so one instance can be shared."""
+
+    def __init__(self, db_path=META_DB, emb_path=EMB_PATH):
+        self.db_path = db_path
+        self.emb_path = emb_path
+        self._local = threading.local()
+
+    def exists(self):
+        if not os.path.exists(self.db_path):
+            return False
+        info = self.info()
+        if not info:
+            return os.path.exists(self.emb_path)
+        return os.path.exists(matrix_path(self.emb_path, info["generation"]))
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _select_in(self, columns, ids):
+        ids = [int(i) for i in ids]
+        out = []
+        for start in range(0, len(ids), _MAX_PARAMS):
+            chunk = ids[start:start + _MAX_PARAMS]
+            marks = ",".join("?" * len(chunk))
+            out.extend(self._conn().execute(
+                f"SELECT store_id, {columns} FROM docs WHERE store_id IN ({marks})", chunk))
+        return out
+
+    def docs_for(self, ids):
+        """Doc texts aligned with `ids` (None for ids that are not in the store)."""
+        found = dict(self._select_in("doc", ids))
+        return [found.get(int(i)) for i in ids]
+
+    def meta_for(self, ids):
+        """{store_id: dict(store_id, name, lat, lon)} for the given ids."""
+        return {sid: dict(store_id=sid, name=name, lat=lat, lon=lon)
+                for sid, name, lat, lon in self._select_in("name, lat, lon", ids)}
+
+    def hashes(self):
+        return dict(self._conn().execute("SELECT store_id, hash FROM docs"))
+
+    def rows(self):
+        return dict(self._conn().execute("SELECT store_id, row FROM docs"))
+
+    def rows_for(self, ids):
+        """{store_id: row} for the given ids only (missing ids are left out)."""
+        return dict(self._select_in("row", ids))
+
+    def info(self):
+        return _read_info(self._conn())
+
+    def locations(self):
+        """(store_ids, lat, lon) numpy arrays for stores with coordinates."""
+        rows = list(self._conn().execute("SELECT store_id, lat, lon FROM docs WHERE lat IS NOT NULL AND lon IS NOT NULL"))
+        arr = np.asarray(rows, dtype="float64").reshape(-1, 3)
+        return arr[:, 0].astype("int64"), arr[:, 1], arr[:, 2]
+
+    def ids(self):
+        return [r[0] for r in self._conn().execute("SELECT store_id FROM docs ORDER BY row")]
+
+    def all_docs(self):
+        """[(store_id, doc)] in row order, for callers that really need everything."""
+        return list(self._conn().execute("SELECT store_id, doc FROM docs ORDER BY row"))
+
+    def embeddings(self):
+        """
+        Memory-mapped, read-only embeddings matrix. Look up rows (rows() / rows_for())
+        first: the matrix only grows within a generation, so rows read earlier on this
+        store's connection are always inside it.
+        """
+        info = self.info()
+        if not info:
+            return np.load(self.emb_path, mmap_mode="r")
+        return _open_matrix(matrix_path(self.emb_path, info["generation"]), info["n_rows"], info["dim"])
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _rows(ids, docs, meta, row_start=0):
+    for i, (sid, txt, m) in enumerate(zip(ids, docs, meta)):
+        yield (int(sid), row_start + i, txt, doc_hash(txt), m.get("name"),
+               float(m["lat"]) if m.get("lat") is not None else None,
+               float(m["lon"]) if m.get("lon") is not None else None)
+
+
+def write_store(ids, docs, meta, embeddings, db_path=META_DB, emb_path=EMB_PATH):
+    """
+    Full (re)write as a new generation: the matrix goes to a new file, the database
+    is written next to the target, and one os.replace of the database switches
+    readers over, so they see either the old or the new store, never a mix.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    _write_generation(db_path, emb_path, list(_rows(ids, docs, meta)), [embeddings], embeddings.shape[1])
+
+
+def _write_generation(db_path, emb_path, rows, blocks, dim):
+    """Write `blocks` (float32 arrays, concatenated in row order) and `rows` as the next generation."""
+    previous = {}
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        previous = _read_info(conn)
+        conn.close()
+    generation = int(previous.get("generation", 0)) + 1
+    path = matrix_path(emb_path, generation)
+    n_rows = 0
+    with open(path, "wb") as f:
+        for block in blocks:
+            f.write(np.ascontiguousarray(block, dtype="float32").tobytes())
+            n_rows += len(block)
+        f.flush()
+        os.fsync(f.fileno())
+
+    tmp_db = db_path + ".tmp"
+    if os.path.exists(tmp_db):
+        os.remove(tmp_db)
+    conn = sqlite3.connect(tmp_db)
+    with conn:
+        conn.executescript(_SCHEMA)
+        conn.executemany("INSERT INTO docs VALUES (?,?,?,?,?,?,?)", rows)
+        conn.executemany("INSERT INTO info VALUES (?,?)", list(dict(
+            generation=generation, dim=int(dim), n_rows=n_rows, holes=0).items()))
+    conn.close()
+    os.replace(tmp_db, db_path)
+    _prune(emb_path, keep={generation, generation - 1}, keep_legacy=not previous)
+
+
+def _prune(emb_path, keep, keep_legacy):
+    """
+    Delete matrix files of older generations. The previous one is kept for readers
+    that opened the old database just before the switch (they reload on the next
+    query); open memory maps survive the delete anyway.
+    """
+    root = os.path.basename(os.path.splitext(emb_path)[0]) + "."
+    folder = os.path.dirname(emb_path) or "."
+    for name in os.listdir(folder):
+        gen = name[len(root):-len(".f32")]
+        if name.startswith(root) and name.endswith(".f32") and gen.isdigit() and int(gen) not in keep:
+            os.remove(os.path.join(folder, name))
+    if not keep_legacy and os.path.exists(emb_path):
+        os.remove(emb_path)
+
+
+def compact(db_path=META_DB, emb_path=EMB_PATH, chunk_rows=65536):
+    """Copy the live rows, in row order, into a new generation (drops all holes)."""
+    store = MetaStore(db_path, emb_path)
+    try:
+        live = list(store._conn().execute(
+            "SELECT store_id, row, doc, hash, name, lat, lon FROM docs ORDER BY row"))
+        old = store.embeddings()
+        dim = old.shape[1]
+        rows = [(sid, i, doc, h, name, lat, lon) for i, (sid, _, doc, h, name, lat, lon) in enumerate(live)]
+        old_rows = np.asarray([r[1] for r in live], dtype="int64")
+        blocks = (np.asarray(old[old_rows[i:i + chunk_rows]]) for i in range(0, len(old_rows), chunk_rows))
+        _write_generation(db_path, emb_path, rows, blocks, dim)
+    finally:
+        store.close()
+
+
+def apply_changes(upsert_ids, docs, meta, embeddings, deleted_ids, db_path=META_DB, emb_path=EMB_PATH):
+    """
+    Incremental update, O(changes): the upserted vectors (new or changed ids) are
+    appended to the current matrix file in place and fsync-ed, then one SQLite
+    transaction points the ids at the new rows, drops deleted ids and records the
+    new row count. Readers map only the rows the database had committed when they
+    looked, and no row a reader can address is ever rewritten. The rows this
+    supersedes or deletes are counted as holes; past COMPACT_RATIO of the matrix the
+    store is compacted into a new generation. Returns True when it compacted.
+    """
+    store = MetaStore(db_path, emb_path)
+    legacy = store.exists() and not store.info()
+    store.close()
+    if legacy:
+        compact(db_path, emb_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        info = _read_info(conn)
+        n_rows, dim = int(info["n_rows"]), int(info["dim"])
+        embeddings = np.asarray(embeddings, dtype="float32").reshape(-1, dim)
+        touched = [int(s) for s in upsert_ids] + [int(s) for s in deleted_ids]
+        existing = set()
+        for start in range(0, len(touched), _MAX_PARAMS):
+            chunk = touched[start:start + _MAX_PARAMS]
+            marks = ",".join("?" * len(chunk))
+            existing.update(r[0] for r in conn.execute(
+                f"SELECT store_id FROM docs WHERE store_id IN ({marks})", chunk))
+        rows = {int(sid): n_rows + i for i, sid in enumerate(upsert_ids)}
+
+        if rows:
+            row_bytes = dim * 4
+            with open(matrix_path(emb_path, info["generation"]), "r+b") as f:
+                # anything past n_rows is left over from an update that never committed
+                f.seek(n_rows * row_bytes)
+                f.write(np.ascontiguousarray(embeddings).tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+
+        n_rows += len(rows)
+        holes = int(info.get("holes", 0)) + len(existing)
+        with conn:
+            conn.executemany("DELETE FROM docs WHERE store_id = ?", [(int(s),) for s in deleted_ids])
+            conn.executemany(
+                "INSERT OR REPLACE INTO docs VALUES (?,?,?,?,?,?,?)",
+                [next(_rows([sid], [docs[i]], [meta[i]], rows[int(sid)])) for i, sid in enumerate(upsert_ids)],
+            )
+            conn.executemany("INSERT OR REPLACE INTO info VALUES (?,?)", [("n_rows", n_rows), ("holes", holes)])
+    finally:
+        conn.close()
+    if n_rows and holes > COMPACT_RATIO * n_rows:
+        compact(db_path, emb_path)
+        return True
+    return False
+
+
+def migrate_pickle(pkl_path=LEGACY_META_PKL, db_path=META_DB, emb_path=EMB_PATH, index_path=None):
+    """
+    Convert a faiss_meta.pkl into the SQLite + .npy store. If the pickle predates
+    ID-mapped indexes (no "ids"), the index at `index_path` is rebuilt ID-mapped
+    from the pickled embeddings so its labels become store_ids (no re-encoding).
+    """
+    with open(pkl_path, "rb") as f:
+        old = pickle.load(f)
+    docs, meta = old["docs"], old["meta"]
+    embeddings = np.asarray(old["embeddings"], dtype="float32")
+    ids = old.get("ids") or [int(m["store_id"]) for m in meta]
+    write_store(ids, docs, meta, embeddings, db_path, emb_path)
+
+    if index_path and "ids" not in old:
+        from index_factory import build_index, read_config, save_index
+        config = read_config(index_path)
+        idx, config = build_index(embeddings, config.get("index_type", "flat"), ids=ids)
+        save_index(idx, config, index_path)
+    print(f"Migrated {len(ids)} docs from {pkl_path} to {db_path} + {emb_path}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="FAISS metadata store utilities")
+    ap.add_argument("--migrate", action="store_true", help=f"convert {LEGACY_META_PKL} to SQLite + .npy")
+    ap.add_argument("--index", default="data/faiss_index.idx")
+    args = ap.parse_args()
+    if args.migrate:
+        migrate_pickle(index_path=args.index)
+    else:
+        ap.print_help()
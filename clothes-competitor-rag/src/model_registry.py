@@ -0,0 +1,61 @@
+# src/model_registry.py
+"""
+Process-wide, lazily loaded SentenceTransformer models.
+
+Importing rag_query / embeddings_faiss used to construct a SentenceTransformer at
+import time (and each module built its own). Models are now loaded on first
+encode, once per process, and sentence_transformers itself (which pulls in torch)
+is only imported at that point. Call warm_up() to start loading in a background
+thread while the UI renders.
+"""
+import threading
+
+EMBED_MODEL = 'all-MiniLM-L6-v2'
+
+_models = {}
+_lock = threading.Lock()
+_warmups = {}
+
+
+def get_model(name=EMBED_MODEL):
+    """Return the shared model, loading it on first use (thread-safe, loads once)."""
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = _models[name] = SentenceTransformer(name)
+        return model
+
+
+def is_loaded(name=EMBED_MODEL):
+    return name in _models
+
+
+def warm_up(name=EMBED_MODEL, background=True):
+    """Load the model ahead of the first query. Returns the loader thread (or None)."""
+    if not background:
+        get_model(name)
+        return None
+    with _lock:
+        t = _warmups.get(name)
+        if t is None:
+            t = _warmups[name] = threading.Thread(target=get_model, args=(name,), daemon=True,
+                                                  name=f"warm-up {name}")
+            t.start()
+        return t
+
+
+class LazyModel:
+    """Stand-in with the SentenceTransformer.encode interface that loads on first call."""
+
+    def __init__(self, name=EMBED_MODEL):
+        self.name = name
+
+    def encode(self, *args, **kwargs):
+        return get_model(self.name).encode(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(get_model(self.name), attr)
@@ -0,0 +1,190 @@
+# src/ollama_client.py
+"""
+Keep-alive HTTP client for the Ollama REST API (POST /api/generate).
+generate() returns the whole answer; generate_stream() yields tokens as the
+server produces them (NDJSON lines with "stream": true).
+
+`ollama run` starts a new CLI process per prompt, which itself talks to the same
+local server over HTTP. Talking to the server directly over a small pool of
+persistent connections removes the fork/exec + CLI start-up from every call.
+Only the standard library is used (http.client), so there is nothing to install.
+(The Mathematics Agent carries the same client as src/utils/ollama_http.py.)
+
+Connect and read timeouts are separate: a down server fails fast (connect) while
+a slow generation on a CPU box is allowed to take its time (read).
+OLLAMA_HOST is honoured the same way the ollama CLI does.
+"""
+import http.client
+import json
+import os
+import queue
+import socket
+import threading
+from urllib.parse import urlsplit
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+CONNECT_TIMEOUT = 2.0   # seconds
+READ_TIMEOUT = 300.0    # seconds; generation on CPU can be slow
+
+
+class OllamaUnavailable(RuntimeError):
+    """The server could not be reached (callers may fall back to the CLI)."""
+
+
+class OllamaHTTPClient:
+    def __init__(self, host=OLLAMA_HOST, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, pool_size=4):
+        if "://" not in host:
+            host = "http://" + host
+        parts = urlsplit(host)
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or 11434
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self.connections_opened = 0
+        self._count_lock = threading.Lock()
+
+    # ---- connection pool ----------------------------------------------
+    def _new_connection(self):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.connect_timeout)
+        try:
+            conn.connect()
+        except OSError as e:
+            raise OllamaUnavailable(f"Could not connect to Ollama at {self.host}:{self.port}: {e}") from e
+        conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self._count_lock:
+            self.connections_opened += 1
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # ---- requests ---------------------------------------------------------
+    def request(self, method, path, payload=None, timeout=None, stream=False):
+        """
+        Send one request on a pooled connection and return (status, body_bytes).
+        A pooled connection the server already closed is retried once on a fresh one.
+        `timeout` overrides the read timeout for this call. With stream=True the
+        body is not read; (conn, response) is returned and the caller must hand
+        the connection back with _finish_stream.
+        """
+        read_timeout = timeout or self.read_timeout
+        body = json.dumps(payload).encode("utf8") if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        for attempt in (0, 1):
+            conn, reused = self._acquire()
+            try:
+                conn.sock.settimeout(read_timeout)
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise OllamaUnavailable(f"Ollama connection dropped: {e}") from e
+            except socket.timeout as e:
+                conn.close()
+                raise RuntimeError(f"Ollama call timed out after {read_timeout}s") from e
+            except OSError as e:
+                conn.close()
+                raise OllamaUnavailable(f"Ollama request failed: {e}") from e
+            if stream:
+                return conn, resp
+            try:
+                data = resp.read()
+            except socket.timeout as e:
+                conn.close()
+                raise RuntimeError(f"Ollama call timed out after {read_timeout}s") from e
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return resp.status, data
+        raise OllamaUnavailable("Ollama connection dropped")  # pragma: no cover
+
+    def generate(self, prompt, model, options=None, timeout=None):
+        """Non-streaming /api/generate; returns the full response text."""
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        status, data = self.request("POST", "/api/generate", payload, timeout=timeout)
+        if status != 200:
+            raise RuntimeError(f"Ollama returned HTTP {status}: {data.decode('utf8', errors='ignore')}")
+        out = json.loads(data).get("response", "")
+        if not out.strip():
+            raise RuntimeError("Ollama returned empty output.")
+        return out
+
+    def _finish_stream(self, conn, resp):
+        # only a fully consumed keep-alive response leaves the connection reusable
+        if resp.isclosed() and not resp.will_close:
+            self._release(conn)
+        else:
+            conn.close()
+
+    def generate_stream(self, prompt, model, options=None, timeout=None):
+        """Streaming /api/generate: yields response fragments as they arrive."""
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        conn, resp = self.request("POST", "/api/generate", payload, timeout=timeout, stream=True)
+        read_timeout = timeout or self.read_timeout
+        try:
+            if resp.status != 200:
+                raise RuntimeError(f"Ollama returned HTTP {resp.status}: {resp.read().decode('utf8', errors='ignore')}")
+            while True:
+                try:
+                    line = resp.readline()
+                except socket.timeout as e:
+                    raise RuntimeError(f"Ollama stream stalled for {read_timeout}s") from e
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    resp.read()  # drain the chunked terminator so the connection can be reused
+                    break
+        finally:
+            self._finish_stream(conn, resp)
+
+    def is_available(self):
+        try:
+            status, _ = self.request("GET", "/api/tags")
+            return status == 200
+        except (OllamaUnavailable, RuntimeError):
+            return False
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client, so every call reuses the same keep-alive pool."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OllamaHTTPClient()
+    return _client
@@ -0,0 +1,286 @@
+# src/pipeline.py
+"""
+In-process, cached pipeline runner (generate -> preprocess -> embed).
+
+Each Stage declares its inputs and outputs (files, or "table:<name>" for a
+data_store table, resolved to whichever file currently holds it) plus the source
+files of the code it runs. A stage is skipped when the content hashes of all its
+inputs match the last successful run and its outputs are still there, unchanged.
+Stages whose inputs do not depend on each other run in parallel threads, and
+every run appends per-stage wall time and peak RSS to data/pipeline_runs.jsonl.
+
+File hashes are cached by (size, mtime) in data/pipeline_state.json, so a no-op
+re-run only stat()s the files and imports nothing heavy.
+
+    python src/pipeline.py                 # run what is stale
+    python src/pipeline.py --force embed   # rerun a stage (and whatever it changes)
+    python src/pipeline.py --dry-run       # show what would run
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from data_store import existing_path, table_path
+
+STATE_PATH = "data/pipeline_state.json"
+LOG_PATH = "data/pipeline_runs.jsonl"
+SRC = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = "data/faiss_index.idx"
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=(), outputs=(), code=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = [os.path.join(SRC, c) for c in code]
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+def _resolve(ref, for_output=False):
+    if ref.startswith("table:"):
+        name = ref[len("table:"):]
+        if for_output:
+            return table_path(name)
+        try:
+            return existing_path(name)
+        except FileNotFoundError:
+            return table_path(name)
+    return ref
+
+
+# ---- hashing ---------------------------------------------------------------
+class _Hasher:
+    """sha1 of file contents, recomputed only when (size, mtime_ns) changes."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = [st.st_size, st.st_mtime_ns]
+        with self._lock:
+            hit = self.cache.get(path)
+        if hit and hit[:2] == key:
+            return hit[2]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        with self._lock:
+            self.cache[path] = key + [h.hexdigest()]
+        return h.hexdigest()
+
+
+# ---- peak RSS ----------------------------------------------------------------
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss * 1024 if os.uname().sysname != "Darwin" else rss
+
+
+class _RssSampler:
+    """Samples process RSS every `interval` s while a stage runs (stages share the process,
+    so with parallel stages this is the process peak during the stage's window)."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+# ---- runner ------------------------------------------------------------------
+class Pipeline:
+    def __init__(self, stages, state_path=STATE_PATH, log_path=LOG_PATH, max_workers=4):
+        self.stages = {s.name: s for s in stages}
+        self.state_path = state_path
+        self.log_path = log_path
+        self.max_workers = max_workers
+        self.deps = self._dependencies()
+
+    def _dependencies(self):
+        producer = {}
+        for s in self.stages.values():
+            for ref in s.outputs:
+                producer[ref] = s.name
+        deps = {name: {producer[ref] for ref in s.inputs if ref in producer and producer[ref] != name}
+                for name, s in self.stages.items()}
+        # fail early on cycles
+        seen, done = set(), set()
+
+        def visit(n):
+            if n in done:
+                return
+            if n in seen:
+                raise ValueError(f"Pipeline has a cycle through stage {n!r}")
+            seen.add(n)
+            for d in deps[n]:
+                visit(d)
+            done.add(n)
+
+        for n in deps:
+            visit(n)
+        return deps
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"files": {}, "stages": {}}
+
+    def _save_state(self, state):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def _fingerprint(self, stage, hasher):
+        paths = [_resolve(r) for r in stage.inputs] + stage.code
+        return {p: hasher(p) for p in paths}
+
+    def _outputs(self, stage, hasher):
+        return {p: hasher(p) for p in (_resolve(r, for_output=True) for r in stage.outputs)}
+
+    def is_fresh(self, stage, state, hasher):
+        last = state["stages"].get(stage.name)
+        if not last or last.get("inputs") != self._fingerprint(stage, hasher):
+            return False
+        outputs = self._outputs(stage, hasher)
+        return all(outputs.values()) and outputs == last.get("outputs")
+
+    def run(self, force=(), dry_run=False):
+        """Run stale stages (plus `force`d ones) in dependency order. Returns the per-stage records."""
+        state = self._load_state()
+        hasher = _Hasher(state["files"])
+        force = set(force)
+        unknown = force - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {sorted(unknown)}")
+        records, pending, running = {}, dict(self.deps), {}
+        lock = threading.Lock()
+        t_start = time.perf_counter()
+
+        def execute(stage, upstream_runs=False):
+            t0 = time.perf_counter()
+            # in a dry run nothing upstream actually changes, so a stage downstream of one that
+            # would run is reported as such instead of being judged on today's inputs
+            if not (upstream_runs and dry_run) and stage.name not in force and self.is_fresh(stage, state, hasher):
+                return dict(stage=stage.name, status="skipped", wall_s=round(time.perf_counter() - t0, 4))
+            if dry_run:
+                return dict(stage=stage.name, status="would run", wall_s=0.0)
+            with _RssSampler() as rss:
+                stage.fn()
+            entry = dict(inputs=self._fingerprint(stage, hasher), outputs=self._outputs(stage, hasher))
+            with lock:
+                state["stages"][stage.name] = entry
+            return dict(stage=stage.name, status="ran", wall_s=round(time.perf_counter() - t0, 3),
+                        peak_rss_mb=round(rss.peak / 2**20, 1))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as pool:
+            while pending or running:
+                ready = [n for n, d in pending.items() if not (d - set(records))]
+                for name in ready:
+                    del pending[name]
+                    upstream_runs = any(records[d]["status"] != "skipped" for d in self.deps[name])
+                    running[pool.submit(execute, self.stages[name], upstream_runs)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name = running.pop(fut)
+                    try:
+                        records[name] = fut.result()
+                    except Exception as e:
+                        for f in running:
+                            f.cancel()
+                        self._save_state(state)
+                        raise RuntimeError(f"Pipeline stage {name!r} failed: {e}") from e
+
+        if not dry_run:
+            self._save_state(state)
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf8") as f:
+                f.write(json.dumps(dict(time=time.time(), total_s=round(time.perf_counter() - t_start, 3),
+                                        stages=list(records.values()))) + "\n")
+        return [records[n] for n in self.stages if n in records]
+
+
+# ---- the competitor pipeline --------------------------------------------------------
+def _generate():
+    from generate_synthetic import iter_chunks, write_chunks
+    from data_store import read_table
+    stores = read_table("stores", columns=["store_id"])
+    write_chunks(iter_chunks(stores, days=28), table_path("footfall"), name="footfall")
+
+
+def _preprocess():
+    from preprocess import preprocess
+    preprocess()
+
+
+def _embed():
+    from embeddings_faiss import build_vector_store
+    build_vector_store(incremental=os.path.exists(INDEX_PATH))
+
+
+def default_stages():
+    """The competitor stages. `code` lists every project module a stage imports."""
+    # the metadata database names the current embeddings matrix file (see meta_store)
+    from meta_store import META_DB
+    index_root = INDEX_PATH[:-len(".idx")]
+    return [
+        Stage("generate", _generate, inputs=["table:stores"], outputs=["table:footfall"],
+              code=["generate_synthetic.py", "data_store.py"]),
+        Stage("preprocess", _preprocess, inputs=["table:footfall"], outputs=["table:hourly_agg", "table:peaks"],
+              code=["preprocess.py", "data_store.py"]),
+        Stage("embed", _embed, inputs=["table:stores", "table:peaks"],
+              outputs=[INDEX_PATH, index_root + ".json", index_root + ".bm25.npz", META_DB],
+              code=["embeddings_faiss.py", "index_factory.py", "bm25_index.py", "meta_store.py",
+                    "data_store.py", "embedding_cache.py", "model_registry.py"]),
+    ]
+
+
+def run_pipeline(force=(), dry_run=False, max_workers=4):
+    records = Pipeline(default_stages(), max_workers=max_workers).run(force=force, dry_run=dry_run)
+    for r in records:
+        rss = f"  peak RSS {r['peak_rss_mb']:.0f} MB" if "peak_rss_mb" in r else ""
+        print(f"{r['stage']:<12} {r['status']:<10} {r['wall_s']:8.3f}s{rss}")
+    return records
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run the stale stages of the competitor data pipeline")
+    ap.add_argument("--force", nargs="*", default=[], help="stages to rerun even if fresh")
+    ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument("--workers", type=int, default=4)
+    args = ap.parse_args()
+    run_pipeline(args.force, args.dry_run, args.workers)
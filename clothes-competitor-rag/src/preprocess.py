@@ -1,16 +1,189 @@
 # src/preprocess.py
+"""
+Hourly footfall aggregates and per-store peak hours.
+
+    python src/preprocess.py                    # whole file in memory (original path)
+    python src/preprocess.py --chunksize 250000  # streaming: flat memory
+    python src/preprocess.py --workers 4         # streaming over 4 byte-range shards
+    python src/preprocess.py --incremental       # fold in only rows appended since last run
+
+The streaming mode reads the footfall table in chunks, parses timestamps with the
+fixed TIMESTAMP_FORMAT (no inference), and folds each chunk's (store_id, hour)
+partial sums into a running table, so memory is bounded by stores x 24 whatever
+the history length. With workers > 1 a CSV is split into newline-aligned byte
+ranges (a Parquet file into its row groups), each summed by its own process, and
+the partial tables are merged. Both modes write byte-identical outputs.
+Tables are read and written through data_store (Parquet or CSV). The incremental mode keeps running sums
+and per-store watermarks in footfall_state (see there).
+"""
+import argparse
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-def preprocess():
-    stores = pd.read_csv("data/stores.csv")
-    foot = pd.read_csv("data/footfall_synthetic.csv", parse_dates=['timestamp'])
-    foot['hour'] = foot['timestamp'].dt.hour
-    agg = foot.groupby(['store_id','hour']).footfall.sum().reset_index()
-    # compute peak hour per store
+
+from data_store import (TIMESTAMP_FORMAT, existing_path, iter_batches, parquet_row_groups, read_path,
+                        table_path, write_table)
+
+CHUNKSIZE = 250_000
+COLUMNS = ["store_id", "timestamp", "footfall"]
+
+
+def hourly_partial(chunk):
+    """(store_id, hour) -> footfall sum for one chunk, as an int64 Series."""
+    hour = pd.to_datetime(chunk["timestamp"], format=TIMESTAMP_FORMAT).dt.hour.rename("hour")
+    return chunk["footfall"].groupby([chunk["store_id"], hour]).sum()
+
+
+def merge_partials(partials):
+    """Sum partial (store_id, hour) Series into one, sorted by store_id, hour."""
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return pd.Series([], dtype="int64", name="footfall",
+                         index=pd.MultiIndex.from_arrays([[], []], names=["store_id", "hour"]))
+    return pd.concat(partials).groupby(level=["store_id", "hour"]).sum().astype("int64")
+
+
+class RangeReader(io.RawIOBase):
+    """File object over bytes [start, end) of a file, for pd.read_csv."""
+
+    def __init__(self, path, start, end):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        n = self._f.readinto(memoryview(buf)[:max(0, min(len(buf), self._left))])
+        self._left -= n
+        return n
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+def shard_ranges(path, n):
+    """Split the data part of a CSV (after its header) into n newline-aligned byte ranges."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        f.readline()
+        start = f.tell()
+        cuts = [start]
+        for i in range(1, n):
+            f.seek(max(cuts[-1], start + (size - start) * i // n))
+            f.readline()
+            cuts.append(min(f.tell(), size))
+    cuts.append(size)
+    return [(a, b) for a, b in zip(cuts, cuts[1:]) if b > a]
+
+
+def aggregate_range(path, start, end, chunksize=CHUNKSIZE):
+    """Streamed (store_id, hour) sums over one byte range of the footfall CSV."""
+    total = None
+    reader = io.BufferedReader(RangeReader(path, start, end))
+    with reader:
+        for chunk in pd.read_csv(reader, header=None, names=COLUMNS, chunksize=chunksize,
+                                 dtype={"store_id": "int64", "timestamp": "str", "footfall": "int64"}):
+            part = hourly_partial(chunk)
+            total = part if total is None else merge_partials([total, part])
+    return total if total is not None else merge_partials([])
+
+
+def aggregate_row_groups(path, row_groups, chunksize=CHUNKSIZE):
+    """Streamed (store_id, hour) sums over some row groups of a Parquet footfall file."""
+    total = None
+    for chunk in iter_batches(path, COLUMNS, chunksize, row_groups):
+        part = hourly_partial(chunk)
+        total = part if total is None else merge_partials([total, part])
+    return total if total is not None else merge_partials([])
+
+
+def aggregate_streaming(path=None, chunksize=CHUNKSIZE, workers=1):
+    path = path or existing_path("footfall")
+    if path.endswith(".parquet"):
+        groups = list(range(parquet_row_groups(path)))
+        shards = [groups[i::workers] for i in range(max(1, workers)) if groups[i::workers]]
+        if workers <= 1 or len(shards) <= 1:
+            return aggregate_row_groups(path, groups, chunksize)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(aggregate_row_groups, [path] * len(shards), shards, [chunksize] * len(shards)))
+        return merge_partials(parts)
+    ranges = shard_ranges(path, max(1, workers))
+    if workers <= 1 or len(ranges) <= 1:
+        return merge_partials([aggregate_range(path, a, b, chunksize) for a, b in ranges])
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(aggregate_range, [path] * len(ranges), *zip(*ranges), [chunksize] * len(ranges)))
+    return merge_partials(parts)
+
+
+def aggregate_in_memory(path=None):
+    foot = read_path(path or existing_path("footfall"), columns=COLUMNS)
+    foot['hour'] = pd.to_datetime(foot['timestamp'], format=TIMESTAMP_FORMAT).dt.hour
+    return foot.groupby(['store_id','hour']).footfall.sum()
+
+
+def peak_hours(agg):
+    """First hour with the highest total per store (agg is a store_id, hour, footfall frame)."""
     peak = agg.loc[agg.groupby('store_id').footfall.idxmax()][['store_id','hour','footfall']]
-    peak = peak.rename(columns={'hour':'peak_hour','footfall':'peak_count'})
-    peak.to_csv("data/store_peak_hours.csv", index=False)
+    return peak.rename(columns={'hour':'peak_hour','footfall':'peak_count'})
+
+
+def write_outputs(agg):
+    agg = agg.rename("footfall").reset_index()
+    # compute peak hour per store
+    write_table("peaks", peak_hours(agg))
     # Also save hourly aggregates per store
-    agg.to_csv("data/footfall_hourly_agg.csv", index=False)
+    write_table("hourly_agg", agg)
+
+
+def preprocess_incremental(path=None, chunksize=CHUNKSIZE):
+    """
+    Update the aggregates from rows appended to the footfall table (CSV lines or
+    Parquet row groups) since the last run and write both tables.
+    The store_ids whose peak changed (their documents need re-embedding) are written
+    to REEMBED_PATH and returned in the summary dict.
+    """
+    from footfall_state import REEMBED_PATH, FootfallState
+
+    state = FootfallState()
+    try:
+        summary = state.update(path or existing_path("footfall"), chunksize)
+        if summary["changed"] or not os.path.exists(table_path("hourly_agg")):
+            write_table("peaks", state.peaks_frame())
+            write_table("hourly_agg", state.hourly_frame())
+    finally:
+        state.close()
+    with open(REEMBED_PATH, "w", encoding="utf8") as f:
+        json.dump(summary["reembed"], f)
+    print(f"Folded in {summary['new_rows']} rows for {len(summary['changed'])} stores; "
+          f"{len(summary['reembed'])} stores to re-embed ({REEMBED_PATH})")
+    return summary
+
+
+def preprocess(chunksize=None, workers=1, path=None):
+    """Aggregate footfall and write both tables. chunksize or workers > 1 selects streaming."""
+    if chunksize or workers > 1:
+        agg = aggregate_streaming(path, chunksize or CHUNKSIZE, workers)
+    else:
+        agg = aggregate_in_memory(path)
+    write_outputs(agg)
     print("Saved aggregates")
+
+
 if __name__=='__main__':
-    preprocess()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunksize", type=int, default=None, help="rows per chunk (enables streaming)")
+    ap.add_argument("--workers", type=int, default=1, help="processes over file shards (streaming)")
+    ap.add_argument("--incremental", action="store_true",
+                    help="only fold in rows appended since the last --incremental run")
+    ap.add_argument("--input", default=None, help="footfall file (default: the footfall table)")
+    args = ap.parse_args()
+    if args.incremental:
+        preprocess_incremental(args.input, args.chunksize or CHUNKSIZE)
+    else:
+        preprocess(args.chunksize, args.workers, args.input)
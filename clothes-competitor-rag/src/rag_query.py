@@ -1,10 +1,15 @@
 # src/rag_query.py
-import faiss, pickle
-from sentence_transformers import SentenceTransformer
-import subprocess, json
+import codecs, hashlib, os, subprocess, tempfile, threading
 import numpy as np
 
-import subprocess
+from bm25_index import BM25Index, bm25_path, reciprocal_rank_fusion
+from geo_index import GeoIndex
+from index_factory import config_path, load_index
+from meta_store import EMB_PATH, LEGACY_META_PKL, META_DB, MetaStore, migrate_pickle
+from embedding_cache import get_cache
+from model_registry import EMBED_MODEL, LazyModel
+from llm_cache import cached_call, cached_stream
+from ollama_client import OllamaUnavailable, get_client
 
 # def call_ollama(prompt, model="llama3.2b"):
 #     cmd = ["ollama", "run", model]
@@ -14,17 +19,269 @@ import subprocess
 #         raise RuntimeError(f"Ollama run failed: {err}")
 #     return out
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# loaded on first encode, shared with embeddings_faiss (see model_registry)
+model = LazyModel(EMBED_MODEL)
+# shared with embeddings_faiss; embedder.stats() reports hits/misses
+embedder = get_cache(EMBED_MODEL, model)
 
-def retrieve(query, k=3):
-    with open("data/faiss_meta.pkl","rb") as f:
-        meta = pickle.load(f)
-    idx = faiss.read_index("data/faiss_index.idx")
-    q_emb = model.encode([query])[0].astype('float32')
-    D, I = idx.search(np.array([q_emb]), k)
-    docs = [meta['docs'][i] for i in I[0]]
+INDEX_PATH = "data/faiss_index.idx"
+META_PATH = META_DB
+# filtered vector search scores the allowed rows exactly up to this many stores
+EXACT_FILTER_MAX = 4096
+
+
+class FaissRetriever:
+    """
+    Long-lived retriever that keeps the FAISS index and document metadata in memory.
+
+    The files (index, metadata, index config, BM25 index) are stat()-ed on every
+    query and reloaded only when their mtime/size changes. With verify_hash=True a
+    changed mtime triggers a content hash check of the same files first, so a file
+    that was merely touched (or rewritten with identical bytes) is not reloaded.
+    Safe to share between threads: the loaded index + metadata tuple is swapped
+    atomically and loading is serialised by a lock.
+
+    Only the index lives in RAM; document text is looked up per query in the
+    SQLite metadata store (k rows), see meta_store. A legacy faiss_meta.pkl is
+    migrated on first load.
+
+    Searches are vector-only (L2 scores) unless hybrid is asked for: hybrid=True
+    fuses vector and BM25 candidates (BM25 index written by build_vector_store) with
+    reciprocal-rank fusion. store_ids / near=(lat, lon, radius_m) restrict both
+    sides to matching stores before scoring; radius filters and nearest() use a
+    GeoIndex over the store coordinates, built once per load.
+    """
+
+    def __init__(self, index_path=INDEX_PATH, meta_path=META_PATH, encoder=None, verify_hash=False,
+                 nprobe=None, ef_search=None, emb_path=EMB_PATH, legacy_meta_path=LEGACY_META_PKL,
+                 fetch_k=20, rrf_k=60):
+        self.index_path = index_path
+        self.bm25_path = bm25_path(index_path)
+        # candidates taken from each side before fusion, and the RRF damping constant
+        self.fetch_k = fetch_k
+        self.rrf_k = rrf_k
+        self.meta_path = meta_path
+        self.emb_path = emb_path
+        self.legacy_meta_path = legacy_meta_path
+        self.encoder = encoder or embedder
+        self.verify_hash = verify_hash
+        # search-time overrides for IVF / HNSW indexes (None -> value stored with the index)
+        self.search_params = dict(nprobe=nprobe, ef_search=ef_search)
+        self.index_config = {}
+        self._lock = threading.Lock()
+        self._loaded = None  # (index, MetaStore, BM25Index or None, GeoIndex)
+        self._stamp = None
+        self._digest = None
+        self.reloads = 0
+
+    def _stat_stamp(self):
+        stamp = []
+        for path in (self.index_path, self.meta_path):
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        # editing nprobe/ef_search in the index config also triggers a reload
+        for path in (config_path(self.index_path), self.bm25_path):
+            try:
+                stamp.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def _content_digest(self):
+        # every file _load() reads: a change to the index config or the BM25 index alone
+        # must reload too (the optional files hash as "missing" when absent)
+        h = hashlib.sha1()
+        for path in (self.index_path, self.meta_path, config_path(self.index_path), self.bm25_path):
+            try:
+                with open(path, "rb") as f:
+                    for block in iter(lambda: f.read(1 << 20), b""):
+                        h.update(block)
+            except FileNotFoundError:
+                if path in (self.index_path, self.meta_path):
+                    raise
+                h.update(b"missing")
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def _load(self):
+        idx, self.index_config = load_index(self.index_path, **self.search_params)
+        bm25 = BM25Index.load(self.bm25_path) if os.path.exists(self.bm25_path) else None
+        store = MetaStore(self.meta_path, self.emb_path)
+        return idx, store, bm25, GeoIndex.from_store(store)
+
+    def _migrate_if_needed(self):
+        if os.path.exists(self.meta_path) or not self.legacy_meta_path:
+            return
+        with self._lock:
+            if not os.path.exists(self.meta_path) and os.path.exists(self.legacy_meta_path):
+                migrate_pickle(self.legacy_meta_path, self.meta_path, self.emb_path, self.index_path)
+
+    def _snapshot(self):
+        self._migrate_if_needed()
+        stamp = self._stat_stamp()
+        loaded = self._loaded
+        if loaded is not None and stamp == self._stamp:
+            return loaded
+        with self._lock:
+            if self._loaded is not None and stamp == self._stamp:
+                return self._loaded
+            digest = self._content_digest() if self.verify_hash else None
+            if self._loaded is None or digest is None or digest != self._digest:
+                self._loaded = self._load()
+                self.reloads += 1
+            self._stamp = stamp
+            self._digest = digest
+            return self._loaded
+
+    def load(self):
+        """Load (or reload if the files changed) eagerly, e.g. at app start."""
+        self._snapshot()
+        return self
+
+    def search(self, query, k=3, **kwargs):
+        """Return (docs, scores) for the k best documents (see search_many)."""
+        return self.search_many([query], k, **kwargs)[0]
+
+    def nearest(self, lat, lon, k=5, radius_m=None):
+        """Exact k nearest stores [(store_id, metres)], optionally within radius_m."""
+        geo = self._snapshot()[3]
+        if radius_m is not None and k is None:
+            return geo.within(lat, lon, radius_m)
+        return geo.nearest(lat, lon, k, max_radius_m=radius_m)
+
+    def _allowed_ids(self, geo, store_ids=None, near=None):
+        """store_ids matching the metadata pre-filter, or None when there is no filter."""
+        if store_ids is None and near is None:
+            return None
+        allowed = None
+        if near is not None:
+            lat, lon, radius_m = near
+            allowed = geo.within(lat, lon, radius_m, ids_only=True)
+        if store_ids is not None:
+            wanted = np.asarray(list(store_ids), dtype="int64")
+            allowed = wanted if allowed is None else np.intersect1d(allowed, wanted)
+        return np.unique(allowed)
+
+    def _vector_search(self, idx, store, q_emb, k, allowed):
+        """(labels, distances) arrays per query, L2, restricted to `allowed` store_ids if given."""
+        if allowed is None:
+            return idx.search(q_emb, k)
+        if len(allowed) <= EXACT_FILTER_MAX:
+            # pre-filter: score only the allowed rows, exactly, from the memory-mapped matrix
+            rows = store.rows_for(allowed)
+            allowed = np.asarray([s for s in allowed if int(s) in rows], dtype="int64")
+            emb = np.asarray(store.embeddings()[[rows[int(s)] for s in allowed]]) if len(allowed) else None
+            D = np.full((len(q_emb), k), np.inf, dtype="float32")
+            I = np.full((len(q_emb), k), -1, dtype="int64")
+            if emb is None:
+                return D, I
+            d = ((q_emb[:, None, :] - emb[None, :, :]) ** 2).sum(-1)
+            order = np.argsort(d, axis=1, kind="stable")[:, :k]
+            n = order.shape[1]
+            D[:, :n] = np.take_along_axis(d, order, axis=1)
+            I[:, :n] = allowed[order]
+            return D, I
+        # large allowed sets: over-fetch from the index and drop the rest, widening the
+        # fetch for queries still short of k hits (IVF / HNSW can only return what
+        # nprobe / ef_search reach, so those may still come back short)
+        out_d = np.full((len(q_emb), k), np.inf, dtype="float32")
+        out_i = np.full((len(q_emb), k), -1, dtype="int64")
+        want = min(k, len(allowed))
+        fetch = min(idx.ntotal, k * 8)
+        todo = np.arange(len(q_emb))
+        while len(todo):
+            D, I = idx.search(q_emb[todo], fetch)
+            keep = np.isin(I, allowed)
+            short = []
+            for j, r in enumerate(todo):
+                sel = np.flatnonzero(keep[j])[:k]
+                out_d[r, :len(sel)] = D[j, sel]
+                out_i[r, :len(sel)] = I[j, sel]
+                if len(sel) < want:
+                    short.append(r)
+            if fetch >= idx.ntotal:
+                break
+            todo = np.asarray(short, dtype="int64")
+            fetch = min(idx.ntotal, fetch * 4)
+        return out_d, out_i
+
+    def search_many(self, queries, k=3, hybrid=False, store_ids=None, near=None):
+        """
+        Encode all queries in one batch and run a single matrix search.
+        Returns a list of (docs, scores), one per query, in input order. The score kind
+        follows `hybrid` only: L2 distances (lower is better) when False, fused RRF
+        scores (higher is better) when True, which needs the BM25 index.
+        hybrid="auto" uses BM25 when its index exists, for callers that ignore scores.
+        store_ids / near=(lat, lon, radius_m) pre-filter the candidate stores.
+        """
+        if not queries:
+            return []
+        idx, store, bm25, geo = self._snapshot()
+        if hybrid == "auto":
+            hybrid = bm25 is not None
+        elif hybrid and bm25 is None:
+            raise FileNotFoundError(f"hybrid search needs the BM25 index {self.bm25_path} "
+                                    "(written by embeddings_faiss.build_vector_store)")
+        allowed = self._allowed_ids(geo, store_ids, near)
+        q_emb = np.ascontiguousarray(self.encoder.encode(list(queries)), dtype='float32')
+        D, I = self._vector_search(idx, store, q_emb, max(k, self.fetch_k) if hybrid else k, allowed)
+
+        ranked = []
+        for q, row_i, row_d in zip(queries, I, D):
+            vec = [(int(i), float(d)) for i, d in zip(row_i, row_d) if i >= 0]
+            if hybrid:
+                kw = bm25.search(q, self.fetch_k, allowed_ids=allowed)
+                fused = reciprocal_rank_fusion([[i for i, _ in vec], [i for i, _ in kw]], self.rrf_k)
+                ranked.append(fused[:k])
+            else:
+                ranked.append(vec[:k])
+        # labels are store_ids; fetch the texts for all queries in one lookup
+        labels = sorted({i for hits in ranked for i, _ in hits})
+        text = dict(zip(labels, store.docs_for(labels)))
+        results = []
+        for hits in ranked:
+            hits = [(text[i], s) for i, s in hits if text.get(i) is not None]
+            results.append(([h[0] for h in hits], [h[1] for h in hits]))
+        return results
+
+
+_retriever = None
+_retriever_lock = threading.Lock()
+
+
+def get_retriever():
+    """Process-wide FaissRetriever over the default data/ files."""
+    global _retriever
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = FaissRetriever()
+    return _retriever
+
+
+def retrieve(query, k=3, hybrid="auto", **filters):
+    """Top-k docs (hybrid BM25 + vector when available); filters: store_ids=, near=(lat, lon, radius_m)."""
+    docs, _ = get_retriever().search(query, k, hybrid=hybrid, **filters)
     return docs
 
+
+def nearest_stores(lat, lon, k=5, radius_m=None):
+    """
+    Exact proximity answer: [(store_id, name, metres)] for the k nearest stores
+    (k=None with radius_m: every store within radius_m), nearest first.
+    """
+    r = get_retriever()
+    hits = r.nearest(lat, lon, k, radius_m)
+    meta = r._snapshot()[1].meta_for([sid for sid, _ in hits])
+    return [(sid, meta.get(sid, {}).get("name"), d) for sid, d in hits]
+
+
+def retrieve_many(queries, k=3, **filters):
+    """Batched retrieve: one encode call and one index search for all queries.
+    Returns [(docs, scores), ...] aligned with `queries`; scores are L2 distances
+    unless hybrid=True (see FaissRetriever.search_many)."""
+    return get_retriever().search_many(queries, k, **filters)
+
 # def call_ollama(prompt):
 #     # Uses ollama CLI
 #     # Adjust the model name to the one you have: e.g. 'llama3-3b' or as shown by ollama list
@@ -33,13 +290,22 @@ def retrieve(query, k=3):
 #     return res.stdout
 
 # src/rag_query.py (update or replace call_ollama)
-import subprocess
-
-def call_ollama(prompt, model="llama3.2:3b", timeout=None):
+def call_ollama(prompt, model="llama3.2:3b", timeout=None, use_cache=True):
     """
-    Calls ollama run <model> and sends the prompt via stdin.
-    Returns stdout string on success or raises RuntimeError with stderr.
+    Sends the prompt to the local Ollama server over a keep-alive HTTP connection,
+    falling back to `ollama run <model>` (prompt via stdin) if the server can't be reached.
+    Returns the response text or raises RuntimeError.
+    Responses are cached by (model, prompt) in llm_cache; use_cache=False bypasses it.
     """
+    return cached_call(lambda p: _generate(p, model, timeout), model, prompt, use_cache=use_cache)
+
+def _generate(prompt, model, timeout=None):
+    try:
+        return get_client().generate(prompt, model, timeout=timeout)
+    except OllamaUnavailable:
+        return _run_ollama_cli(prompt, model, timeout)
+
+def _run_ollama_cli(prompt, model, timeout=None):
     cmd = ["ollama", "run", model]
     try:
         p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
@@ -58,15 +324,131 @@ def call_ollama(prompt, model="llama3.2:3b", timeout=None):
 
     return out
 
-def answer(query, model="llama3.2:3b", top_k=4):
-    docs = retrieve(query, k=top_k)
+def stream_ollama(prompt, model="llama3.2:3b", timeout=None, use_cache=True):
+    """
+    Generator version of call_ollama: yields text fragments as the model produces them
+    (Ollama streaming API, or incremental reads of the CLI's stdout as a fallback).
+    The full text is cached once the stream finishes.
+    """
+    return cached_stream(lambda p: _generate_stream(p, model, timeout), model, prompt, use_cache=use_cache)
+
+def _generate_stream(prompt, model, timeout=None):
+    stream = get_client().generate_stream(prompt, model, timeout=timeout)
+    try:
+        first = next(stream, None)  # the request is sent here
+    except OllamaUnavailable:
+        yield from _stream_ollama_cli(prompt, model, timeout)
+        return
+    if first is None:
+        raise RuntimeError("Ollama returned empty output.")
+    yield first
+    yield from stream
+
+def _stream_ollama_cli(prompt, model, timeout=None):
+    # stderr goes to a temp file so a chatty CLI can't fill the pipe while we read stdout
+    with tempfile.TemporaryFile() as err_file:
+        p = subprocess.Popen(["ollama", "run", model], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=err_file)
+        # `timeout` bounds the whole call: a stalled CLI is killed mid-read, which ends the read loop
+        expired = threading.Event()
+        watchdog = threading.Timer(timeout, lambda: (expired.set(), p.kill())) if timeout else None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        got_output = False
+        try:
+            if watchdog:
+                watchdog.start()
+            p.stdin.write(prompt.encode("utf-8"))
+            p.stdin.close()
+            while True:
+                chunk = p.stdout.read1(4096)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    got_output = got_output or bool(text.strip())
+                    yield text
+                if not chunk:
+                    break
+            p.wait()
+        except OSError:
+            if not expired.is_set():
+                raise
+        finally:
+            if watchdog:
+                watchdog.cancel()
+            if p.poll() is None:
+                p.kill()
+                p.wait()
+        err_file.seek(0)
+        err = err_file.read().decode("utf-8", errors="ignore")
+    if expired.is_set():
+        raise RuntimeError(f"Ollama call timed out after {timeout}s. Stderr:\n{err}")
+    if p.returncode != 0:
+        raise RuntimeError(f"Ollama returned non-zero exit code {p.returncode}. Stderr:\n{err}")
+    if not got_output:
+        raise RuntimeError(f"Ollama returned empty output. Stderr:\n{err}")
+
+def build_prompt(query, docs):
     retrieved = "\n\n".join(docs)
-    prompt = (
+    return (
         "You are an assistant helping a clothing store owner. Use only the information below.\n\n"
         f"Retrieved context:\n{retrieved}\n\nUser question: {query}\n\n"
         "Answer concisely (1) competitor list, (2) busiest hour summary, (3) 3 actionable recommendations."
     )
-    return call_ollama(prompt, model=model)
+
+def answer(query, model="llama3.2:3b", top_k=4, use_cache=True, docs=None):
+    """Answer one question, or a list of questions (retrieved in a single batch).
+    Pass `docs` to reuse an earlier retrieve() result instead of searching again."""
+    if not isinstance(query, str):
+        return answer_many(query, model=model, top_k=top_k, use_cache=use_cache)
+    if docs is None:
+        docs = retrieve(query, k=top_k)
+    return call_ollama(build_prompt(query, docs), model=model, use_cache=use_cache)
+
+def answer_stream(query, model="llama3.2:3b", top_k=4, use_cache=True, docs=None):
+    """Like answer() but yields the response incrementally (e.g. for st.write_stream)."""
+    if docs is None:
+        docs = retrieve(query, k=top_k)
+    yield from stream_ollama(build_prompt(query, docs), model=model, use_cache=use_cache)
+
+
+class RagPipeline:
+    """
+    Retrieve-then-generate for one UI session: the docs shown to the user are the
+    exact docs sent to the LLM, retrieved once with the session's top_k and model.
+    """
+
+    def __init__(self, model="llama3.2:3b", top_k=4, use_cache=True):
+        self.model = model
+        self.top_k = top_k
+        self.use_cache = use_cache
+        self.query = None
+        self.docs = []
+
+    def configure(self, model=None, top_k=None, use_cache=None):
+        if model:
+            self.model = model
+        if top_k:
+            self.top_k = top_k
+        if use_cache is not None:
+            self.use_cache = use_cache
+        return self
+
+    def retrieve(self, query):
+        # drop the previous docs first so a failed retrieval can't leave them paired with the new query
+        self.query, self.docs = query, []
+        self.docs = retrieve(query, k=self.top_k)
+        return self.docs
+
+    def stream_answer(self):
+        """Stream the answer for the last retrieve() call, reusing its docs."""
+        return answer_stream(self.query, model=self.model, use_cache=self.use_cache, docs=self.docs)
+
+    def answer(self):
+        return answer(self.query, model=self.model, use_cache=self.use_cache, docs=self.docs)
+
+def answer_many(queries, model="llama3.2:3b", top_k=4, use_cache=True):
+    """Retrieve context for all queries with retrieve_many, then generate one answer per query."""
+    results = retrieve_many(queries, k=top_k, hybrid="auto")
+    return [call_ollama(build_prompt(q, docs), model=model, use_cache=use_cache)
+            for q, (docs, _) in zip(queries, results)]
 
 if __name__=='__main__':
     print(answer("Which competitors are busiest around 6pm and what should I do?"))
@@ -1,18 +1,48 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-import pandas as pd
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+
+from data_store import read_table
+
+PEAKS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
+    ('ALIGN',(0,0),(-1,-1),'CENTER'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('FONTSIZE', (0,0), (-1,-1), 9),
+    ('VALIGN',(0,0),(-1,-1),'MIDDLE'),
+])
+
+
+class ReportResources:
+    """
+    What every report shares: the stylesheet and the peak-hours table rows (stores x
+    store_peak_hours merge). Build once with load_resources() and pass it to
+    make_report / make_reports instead of re-reading the tables for every PDF.
+    """
 
-def make_report(query, ai_answer, out_pdf="final_report.pdf"):
-    doc = SimpleDocTemplate(out_pdf, pagesize=A4, rightMargin=30,leftMargin=30, topMargin=30,bottomMargin=18)
+    def __init__(self, styles, peaks_data=None, peaks_error=None):
+        self.styles = styles
+        self.peaks_data = peaks_data
+        self.peaks_error = peaks_error
+
+
+def load_resources():
     styles = getSampleStyleSheet()
-    story = []
+    try:
+        peaks = read_table("peaks").merge(read_table("stores"), on="store_id")
+        # table header + rows
+        data = [list(peaks.columns)] + peaks.astype(object).values.tolist()
+        return ReportResources(styles, peaks_data=data)
+    except Exception as e:
+        return ReportResources(styles, peaks_error=e)
 
-    # Title
-    story.append(Paragraph("Competitor Analysis Report", styles['Title']))
-    story.append(Spacer(1, 12))
 
+def _query_section(story, query, ai_answer, styles):
     # Query
     story.append(Paragraph("<b>Query:</b>", styles['Heading2']))
     story.append(Paragraph(query, styles['BodyText']))
@@ -24,30 +54,20 @@ def make_report(query, ai_answer, out_pdf="final_report.pdf"):
         story.append(Paragraph(line, styles['BodyText']))
     story.append(Spacer(1, 12))
 
-    # Peak hours table
-    try:
-        peaks = pd.read_csv("data/store_peak_hours.csv").merge(pd.read_csv("data/stores.csv"), on="store_id")
-        story.append(Paragraph("<b>Peak Hours Table:</b>", styles['Heading2']))
-        # table header
-        data = [list(peaks.columns)]
-        # rows
-        for _, row in peaks.iterrows():
-            data.append([row[c] for c in peaks.columns])
-        t = Table(data, repeatRows=1)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.grey),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
-            ('ALIGN',(0,0),(-1,-1),'CENTER'),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-            ('FONTSIZE', (0,0), (-1,-1), 9),
-            ('VALIGN',(0,0),(-1,-1),'MIDDLE'),
-        ]))
+
+def _peaks_section(story, res):
+    # Peak hours table (a fresh Table per document: flowables are not reusable once laid out)
+    if res.peaks_data is not None:
+        story.append(Paragraph("<b>Peak Hours Table:</b>", res.styles['Heading2']))
+        t = Table(res.peaks_data, repeatRows=1)
+        t.setStyle(PEAKS_TABLE_STYLE)
         story.append(t)
-        story.append(Spacer(1, 12))
-    except Exception as e:
-        story.append(Paragraph(f"Could not load peak hours table: {e}", styles['BodyText']))
-        story.append(Spacer(1, 12))
+    else:
+        story.append(Paragraph(f"Could not load peak hours table: {res.peaks_error}", res.styles['BodyText']))
+    story.append(Spacer(1, 12))
+
 
+def _closing_sections(story, styles):
     # Screenshot placeholders
     story.append(Paragraph("<b>Visualizations / Screenshots:</b>", styles['Heading2']))
     # placeholders = [
@@ -63,8 +83,84 @@ def make_report(query, ai_answer, out_pdf="final_report.pdf"):
     story.append(Paragraph("<b>Conclusion</b>", styles['Heading2']))
     story.append(Paragraph("This report was generated locally with free tools. Replace placeholders with screenshots before submission.", styles['BodyText']))
 
-    doc.build(story)
+
+def _doc(out_pdf):
+    return SimpleDocTemplate(out_pdf, pagesize=A4, rightMargin=30,leftMargin=30, topMargin=30,bottomMargin=18)
+
+
+def make_report(query, ai_answer, out_pdf="final_report.pdf", resources=None, quiet=False):
+    res = resources or load_resources()
+    styles = res.styles
+    story = []
+
+    # Title
+    story.append(Paragraph("Competitor Analysis Report", styles['Title']))
+    story.append(Spacer(1, 12))
+
+    _query_section(story, query, ai_answer, styles)
+    _peaks_section(story, res)
+    _closing_sections(story, styles)
+
+    _doc(out_pdf).build(story)
+    if not quiet:
+        print(f"Saved PDF: {out_pdf}")
+    return out_pdf
+
+
+def make_combined_report(items, out_pdf="combined_report.pdf", resources=None):
+    """One PDF with a section per (query, answer) pair and the peak-hours table once at the end."""
+    res = resources or load_resources()
+    styles = res.styles
+    story = [Paragraph("Competitor Analysis Report", styles['Title']), Spacer(1, 12)]
+    for i, (query, ai_answer) in enumerate(items, 1):
+        if i > 1:
+            story.append(PageBreak())
+        story.append(Paragraph(f"Section {i}", styles['Heading1']))
+        _query_section(story, query, ai_answer, styles)
+    story.append(PageBreak())
+    _peaks_section(story, res)
+    _closing_sections(story, styles)
+    _doc(out_pdf).build(story)
     print(f"Saved PDF: {out_pdf}")
+    return out_pdf
+
+
+# ---- batch API -------------------------------------------------------------
+_worker_resources = None
+
+
+def _init_worker():
+    global _worker_resources
+    _worker_resources = load_resources()
+
+
+def _render(job):
+    query, ai_answer, out_pdf = job
+    return make_report(query, ai_answer, out_pdf, resources=_worker_resources, quiet=True)
+
+
+def make_reports(items, out_dir="reports", workers=None, combined_pdf=None, chunksize=8):
+    """
+    Render one PDF per (query, answer) pair into out_dir (report_0000.pdf, ...).
+
+    Styles and the peaks table are built once per worker process, not per PDF;
+    workers=1 renders in this process. With combined_pdf set, one multi-section PDF
+    is written as well. Returns the list of per-report paths.
+    """
+    items = list(items)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(q, a, os.path.join(out_dir, f"report_{i:04d}.pdf")) for i, (q, a) in enumerate(items)]
+    if workers == 1 or len(jobs) <= 1:
+        res = load_resources()
+        paths = [make_report(q, a, p, resources=res, quiet=True) for q, a, p in jobs]
+    else:
+        res = None
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            paths = list(pool.map(_render, jobs, chunksize=chunksize))
+    if combined_pdf:
+        make_combined_report(items, combined_pdf, resources=res)
+    print(f"Saved {len(paths)} PDFs to {out_dir}/")
+    return paths
 
 # quick test
 if __name__ == "__main__":
@@ -0,0 +1,271 @@
+# src/service.py
+"""
+asyncio service layer for the competitor assistant.
+
+Many analysts share one Ollama server. Instead of each Streamlit session blocking in
+its own `ollama run`, requests go through one CompetitorService per process:
+
+  * retrieval (FAISS + SQLite, CPU bound) runs in a small thread pool
+  * generation goes to the Ollama API on an async HTTP client (httpx) with a
+    semaphore capping concurrent LLM calls (max_concurrent_llm)
+  * at most max_pending requests may wait for an LLM slot; beyond that requests
+    are rejected immediately (ServiceBusy), and a waiting request gives up after
+    queue_timeout seconds, so overload shows up as fast errors, not growing latency
+
+Without httpx installed, or when the server can't be reached through it,
+generation falls back to rag_query's blocking HTTP client / `ollama run` CLI in a
+worker thread (same limits apply). Answers go through the same llm_cache as
+call_ollama (cached_acall / cached_astream); a hit never waits for an LLM slot.
+
+Synchronous callers (Streamlit) use BackgroundService, which runs the loop in a
+daemon thread:
+
+    svc = BackgroundService(CompetitorService())
+    text = svc.run(svc.service.answer("Which stores peak at 6pm?"))
+    for tok in svc.iterate(svc.service.answer_stream("...")): ...
+"""
+import asyncio
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except Exception:
+    HTTPX_AVAILABLE = False
+
+import rag_query
+from llm_cache import cached_acall, cached_astream
+from ollama_client import CONNECT_TIMEOUT, OLLAMA_HOST, READ_TIMEOUT
+
+
+class ServiceBusy(RuntimeError):
+    """Rejected: the pending-request queue is full or the wait for an LLM slot timed out."""
+
+
+async def _iterate_in_thread(gen, pool):
+    """Drive a blocking generator from the loop, one next() per hop to `pool`."""
+    done = object()
+    step = None
+    try:
+        while True:
+            step = pool.submit(next, gen, done)
+            item = await asyncio.wrap_future(step)
+            if item is done:
+                return
+            yield item
+    finally:
+        # closing kills a CLI whose output is no longer wanted; if we were cancelled
+        # while next() is still running, close right after it returns
+        if step is not None and not step.done():
+            step.add_done_callback(lambda _: gen.close())
+        else:
+            gen.close()
+
+
+class CompetitorService:
+    def __init__(self, model="llama3.2:3b", top_k=4, max_concurrent_llm=2, max_pending=16,
+                 queue_timeout=60.0, retrieval_workers=4, host=OLLAMA_HOST,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retrieve_fn=None, use_cache=True):
+        self.model = model
+        self.top_k = top_k
+        self.max_concurrent_llm = max_concurrent_llm
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.host = host if "://" in host else "http://" + host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retrieve_fn = retrieve_fn or rag_query.retrieve
+        self.use_cache = use_cache
+        self._pool = ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="retrieve")
+        # blocking generation fallbacks; the LLM semaphore already bounds their number
+        self._llm_pool = ThreadPoolExecutor(max_workers=max_concurrent_llm, thread_name_prefix="llm")
+        self._llm_slots = None
+        self._pending = 0
+        self._http = None
+        self.stats = dict(completed=0, rejected=0, timed_out=0, failed=0)
+
+    # ---- lifecycle ---------------------------------------------------------
+    async def start(self):
+        """Bind loop-specific primitives; call from inside the event loop."""
+        self._llm_slots = asyncio.Semaphore(self.max_concurrent_llm)
+        if HTTPX_AVAILABLE:
+            self._http = httpx.AsyncClient(
+                base_url=self.host,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrent_llm,
+                                    max_keepalive_connections=self.max_concurrent_llm),
+            )
+        return self
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+        self._pool.shutdown(wait=False)
+        self._llm_pool.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # ---- stages ----------------------------------------------------------------
+    async def retrieve(self, query, k=None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self.retrieve_fn, query, k or self.top_k)
+
+    async def _llm_slot(self):
+        """Admission control: reject when too many are waiting, time out a long wait."""
+        if self._pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise ServiceBusy(f"Too many pending requests ({self._pending}); try again shortly.")
+        self._pending += 1
+        try:
+            await asyncio.wait_for(self._llm_slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            raise ServiceBusy(f"No LLM slot free after {self.queue_timeout}s.")
+        finally:
+            self._pending -= 1
+
+    async def generate(self, prompt, model=None, use_cache=None):
+        model = model or self.model
+        use_cache = self.use_cache if use_cache is None else use_cache
+        return await cached_acall(lambda p: self._generate(p, model), model, prompt, use_cache=use_cache)
+
+    async def _generate(self, prompt, model):
+        await self._llm_slot()
+        try:
+            out = None
+            if self._http is not None:
+                try:
+                    resp = await self._http.post("/api/generate", json={"model": model, "prompt": prompt, "stream": False})
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    pass  # server unreachable: try the CLI below
+                else:
+                    if resp.status_code != 200:
+                        raise RuntimeError(f"Ollama returned HTTP {resp.status_code}: {resp.text}")
+                    out = resp.json().get("response", "")
+            if out is None:
+                fallback = rag_query._run_ollama_cli if self._http is not None else rag_query._generate
+                loop = asyncio.get_running_loop()
+                out = await loop.run_in_executor(self._llm_pool, fallback, prompt, model, self.read_timeout)
+        finally:
+            self._llm_slots.release()
+        if not out.strip():
+            raise RuntimeError("Ollama returned empty output.")
+        return out
+
+    async def generate_stream(self, prompt, model=None, use_cache=None):
+        model = model or self.model
+        use_cache = self.use_cache if use_cache is None else use_cache
+        async for part in cached_astream(lambda p: self._generate_stream(p, model), model, prompt,
+                                         use_cache=use_cache):
+            yield part
+
+    async def _generate_stream(self, prompt, model):
+        await self._llm_slot()
+        try:
+            if self._http is not None:
+                try:
+                    async for part in self._http_stream(prompt, model):
+                        yield part
+                    return
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    pass  # raised before the first token; stream from the CLI instead
+                fallback = rag_query._stream_ollama_cli(prompt, model, self.read_timeout)
+            else:
+                fallback = rag_query._generate_stream(prompt, model, self.read_timeout)
+            async for part in _iterate_in_thread(fallback, self._llm_pool):
+                yield part
+        finally:
+            self._llm_slots.release()
+
+    async def _http_stream(self, prompt, model):
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        async with self._http.stream("POST", "/api/generate", json=payload) as resp:
+            if resp.status_code != 200:
+                body = await resp.aread()
+                raise RuntimeError(f"Ollama returned HTTP {resp.status_code}: {body.decode('utf8', 'ignore')}")
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+
+    # ---- end-to-end -------------------------------------------------------------
+    async def answer(self, query, model=None, top_k=None, use_cache=None):
+        """Retrieve (thread pool) then generate (async HTTP, bounded). Returns (docs, text)."""
+        try:
+            docs = await self.retrieve(query, top_k)
+            text = await self.generate(rag_query.build_prompt(query, docs), model, use_cache)
+        except ServiceBusy:
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        self.stats["completed"] += 1
+        return docs, text
+
+    async def answer_stream(self, query, model=None, top_k=None, docs=None, use_cache=None):
+        if docs is None:
+            docs = await self.retrieve(query, top_k)
+        async for part in self.generate_stream(rag_query.build_prompt(query, docs), model, use_cache):
+            yield part
+        self.stats["completed"] += 1
+
+
+class BackgroundService:
+    """Runs a CompetitorService on an event loop in a daemon thread for sync callers."""
+
+    def __init__(self, service):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="competitor-service")
+        self._thread.start()
+        self.run(service.start())
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the service loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def iterate(self, agen):
+        """Consume an async generator from sync code (e.g. st.write_stream)."""
+        q = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in agen:
+                    q.put((item, None))
+                q.put((done, None))
+            except BaseException as e:  # forwarded to the consumer
+                q.put((done, e))
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                item, err = q.get()
+                if item is done:
+                    if err is not None:
+                        raise err
+                    return
+                yield item
+        finally:
+            # no-op once pumped to the end; if the consumer stopped early, cancelling the
+            # pump closes the generator, which ends the Ollama stream and frees its LLM slot
+            future.cancel()
+
+    def stop(self):
+        self.run(self.service.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
+import asyncio
 import os, sys
 # ensure src package importable
 sys.path.append(os.path.abspath("src"))
 
-from rag_query import answer, retrieve  # uses functions from src/rag_query.py
+from rag_query import RagPipeline, retrieve_many, build_prompt  # uses functions from src/rag_query.py
+from model_registry import warm_up
+from data_store import read_table, table_mtime
+from service import BackgroundService, CompetitorService, ServiceBusy
+
+# load the embedding model in the background while the page renders (no-op on reruns)
+warm_up()
 
 from report_gen_reportlab import make_report
 
@@ -32,26 +39,54 @@ st.markdown(
     "If the model seems slow or errors, check the logs printed below."
 )
 
+# keyed on the table file mtimes: reruns reuse the table until preprocess rewrites a file
+@st.cache_data
+def load_peaks(peaks_mtime, stores_mtime):
+    return read_table("peaks").merge(read_table("stores"), on="store_id")
+
+
+@st.cache_resource
+def peaks_chart(peaks_mtime, stores_mtime):
+    peaks = load_peaks(peaks_mtime, stores_mtime)
+    return alt.Chart(peaks).mark_bar().encode(x='name', y='peak_count').properties(height=300)
+
+
+@st.cache_resource
+def get_service():
+    # one service per server process: its LLM semaphore and pending-queue limit
+    # apply across all browser sessions
+    return BackgroundService(CompetitorService())
+
+
 # Sidebar config
 with st.sidebar:
     st.header("Options")
-    model_info = st.text_input("Model id (as shown by `ollama list`)", value="llama3.2b")
+    model_info = st.text_input("Model id (as shown by `ollama list`)", value="llama3.2:3b")
     top_k = st.slider("Top-k retrieved docs", min_value=1, max_value=8, value=4)
     gen_report = st.checkbox("Enable PDF report generation", value=True)
+    use_llm_cache = st.checkbox("Reuse cached LLM answers", value=True,
+                                help="Untick to force a fresh Ollama call for identical prompts")
 
 query = st.text_input("Ask about competitors or busiest times", value="List competitors and their busiest hours, suggest 3 actions")
 
+# one pipeline per browser session, re-configured from the sidebar on every rerun
+pipeline = st.session_state.setdefault("rag_pipeline", RagPipeline())
+pipeline.configure(model=model_info.strip(), top_k=top_k, use_cache=use_llm_cache)
+service = get_service()
+
 if st.button("Run RAG"):
     if not query.strip():
         st.error("Please type a query.")
     else:
+        retrieval_failed = False
         with st.spinner("Retrieving relevant docs..."):
             try:
-                # show retrieved docs first
-                docs = retrieve(query, k=top_k)
+                # show retrieved docs first; the same docs are used for generation
+                docs = pipeline.retrieve(query)
             except Exception as e:
                 st.error(f"Retrieval failed: {e}")
                 docs = []
+                retrieval_failed = True
 
         st.subheader("Retrieved context (top documents)")
         if docs:
@@ -62,28 +97,35 @@ if st.button("Run RAG"):
             st.info("No docs retrieved. Check embeddings/FAISS files or run embeddings script again.")
 
         st.subheader("LLM response (from local Ollama)")
-        with st.spinner("Calling local LLM..."):
-            try:
-                resp = answer(query)  # answer() internally does retrieval + LLM call
-                st.markdown(resp.replace("\n", "  \n"))
-            except Exception as e:
-                st.error("LLM call failed. See error below and check Ollama CLI:")
-                st.exception(e)
-                # Helpful debug hints
-                st.write(
-                    "Debug tips: run `ollama list` to confirm model id; "
-                    "if model OOM, try a smaller model or quantized variant; "
-                    "inspect terminal where you launched Ollama for logs."
-                )
-                resp = ""
+        if retrieval_failed:
+            st.info("LLM call skipped: there is no retrieved context to answer from.")
+            resp = ""
+        else:
+            with st.spinner("Calling local LLM..."):
+                try:
+                    # tokens are rendered as they arrive; write_stream returns the full text
+                    resp = st.write_stream(service.iterate(service.service.answer_stream(
+                        pipeline.query, model=pipeline.model, docs=pipeline.docs, use_cache=pipeline.use_cache)))
+                except ServiceBusy as e:
+                    st.warning(f"The assistant is busy serving other users: {e}")
+                    resp = ""
+                except Exception as e:
+                    st.error("LLM call failed. See error below and check Ollama CLI:")
+                    st.exception(e)
+                    # Helpful debug hints
+                    st.write(
+                        "Debug tips: run `ollama list` to confirm model id; "
+                        "if model OOM, try a smaller model or quantized variant; "
+                        "inspect terminal where you launched Ollama for logs."
+                    )
+                    resp = ""
 
         # Show peaks table and chart
         try:
-            peaks = pd.read_csv("data/store_peak_hours.csv").merge(pd.read_csv("data/stores.csv"), on="store_id")
+            stamps = (table_mtime("peaks"), table_mtime("stores"))
             st.subheader("Store peak hours")
-            st.dataframe(peaks)
-            chart = alt.Chart(peaks).mark_bar().encode(x='name', y='peak_count').properties(height=300)
-            st.altair_chart(chart, use_container_width=True)
+            st.dataframe(load_peaks(*stamps))
+            st.altair_chart(peaks_chart(*stamps), use_container_width=True)
         except Exception as e:
             st.warning(f"Could not load peak hours table: {e}")
 
@@ -102,6 +144,36 @@ if st.button("Run RAG"):
             else:
                 st.info("No LLM response to include in the report.")
 
+with st.expander("Batch questions (one per line)"):
+    batch_text = st.text_area("Questions", value="", height=150, key="batch_queries")
+    if st.button("Run batch"):
+        queries = [q.strip() for q in batch_text.splitlines() if q.strip()]
+        if not queries:
+            st.error("Please type at least one question.")
+        else:
+            with st.spinner(f"Retrieving docs for {len(queries)} questions..."):
+                try:
+                    # one encode batch + one index search for all questions
+                    results = retrieve_many(queries, k=top_k, hybrid="auto")
+                except Exception as e:
+                    st.error(f"Retrieval failed: {e}")
+                    results = []
+            async def generate_all():
+                # concurrent, but bounded by the service's LLM semaphore
+                return await asyncio.gather(
+                    *(service.service.generate(build_prompt(q, docs), model=pipeline.model, use_cache=use_llm_cache)
+                      for q, (docs, _) in zip(queries, results)),
+                    return_exceptions=True)
+
+            with st.spinner("Calling local LLM..."):
+                answers = service.run(generate_all()) if results else []
+            for q, resp in zip(queries, answers):
+                st.markdown(f"**Q:** {q}")
+                if isinstance(resp, Exception):
+                    st.error(f"LLM call failed: {resp}")
+                else:
+                    st.markdown(resp.replace("\n", "  \n"))
+
 st.write("---")
 st.caption("If you hit errors calling Ollama, try running `ollama run <model>` directly in a terminal to confirm the model is available and working.")
 
@@ -0,0 +1,72 @@
+# tests/test_bm25_index.py
+import math
+
+import pytest
+
+from bm25_index import BM25Index, bm25_path, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    11: "Zudio, 80 Feet Road, Koramangala. Peak hour 18 with 420 visitors.",
+    12: "Max Fashion, 100 Feet Road, Indiranagar. Peak hour 19.",
+    13: "Zudio, Brigade Road. Zudio value fashion. Peak hour 17.",
+    14: "Westside, MG Road. Peak hour 12.",
+    15: "Trends, Jayanagar 4th Block.",
+}
+
+
+def reference_scores(query, docs, k1=1.5, b=0.75):
+    """Textbook BM25 with the same idf as the index: log(1 + (n - df + 0.5) / (df + 0.5))."""
+    toks = {sid: tokenize(d) for sid, d in docs.items()}
+    n, avg = len(docs), sum(map(len, toks.values())) / len(docs)
+    out = {}
+    for sid, doc in toks.items():
+        s = 0.0
+        for t in set(tokenize(query)):
+            df = sum(t in d for d in toks.values())
+            tf = doc.count(t)
+            if tf:
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                s += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg))
+        if s > 0:
+            out[sid] = s
+    return out
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(list(DOCS), list(DOCS.values()))
+
+
+@pytest.mark.parametrize("query", ["Zudio", "80 Feet Road", "peak hour fashion", "nothing matches"])
+def test_scores_match_reference_bm25(index, query):
+    expected = reference_scores(query, DOCS)
+    hits = index.search(query, k=10)
+    assert [sid for sid, _ in hits] == sorted(expected, key=lambda s: -expected[s])
+    for sid, score in hits:
+        assert score == pytest.approx(expected[sid], rel=1e-5)
+
+
+def test_search_is_restricted_to_allowed_ids(index):
+    assert [sid for sid, _ in index.search("Zudio road", k=10, allowed_ids=[12, 13, 99])] == [13, 12]
+    assert index.search("Zudio", k=10, allowed_ids=[]) == []
+
+
+def test_top_k_cut(index):
+    full = index.search("peak hour road", k=10)
+    assert index.search("peak hour road", k=2) == full[:2]
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    path = bm25_path(str(tmp_path / "faiss_index.idx"))
+    assert path.endswith("faiss_index.bm25.npz")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    for query in ("Zudio", "MG Road", "jayanagar"):
+        assert loaded.search(query) == index.search(query)
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    assert [sid for sid, _ in fused] == [1, 3, 2, 4]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert reciprocal_rank_fusion([]) == []
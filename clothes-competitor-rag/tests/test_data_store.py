@@ -0,0 +1,74 @@
+# tests/test_data_store.py
+import os
+
+import pandas as pd
+import pytest
+
+import data_store
+from data_store import existing_path, read_table, write_chunks, write_table
+
+PEAKS = pd.DataFrame({"store_id": [1, 2, 3, 4, 5], "peak_hour": [9, 12, 17, 18, 12],
+                      "peak_count": [100, 250, 300, 50, 75]})
+
+FILTERS = [
+    [("store_id", "in", [1, 4])],
+    [("peak_hour", "=", 12)],
+    [("peak_hour", "==", 12), ("peak_count", ">", 100)],
+    [("peak_count", "<", 100)],
+    [("peak_count", "<=", 100), ("store_id", "!=", 1)],
+    [("peak_hour", ">=", 17)],
+    [("store_id", "not in", [2, 3])],
+]
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def fmt(request, tmp_path, monkeypatch):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_store, "DATA_FORMAT", request.param)
+    write_table("peaks", PEAKS)
+    return request.param
+
+
+def expected(filters, columns=None):
+    df = PEAKS
+    for col, op, value in filters:
+        df = df[data_store._OPS[op](df[col], value)]
+    return df[columns or list(PEAKS.columns)].values.tolist()
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filters_match_pandas_in_both_formats(fmt, filters):
+    assert existing_path("peaks").endswith("." + fmt)
+    assert read_table("peaks", filters=filters).values.tolist() == expected(filters)
+
+
+def test_columns_are_projected_after_filtering_on_other_columns(fmt):
+    df = read_table("peaks", columns=["store_id"], filters=[("peak_hour", "=", 12)])
+    assert list(df.columns) == ["store_id"] and df["store_id"].tolist() == [2, 5]
+
+
+def test_unknown_filter_op_is_rejected(fmt):
+    if fmt == "parquet":
+        pytest.skip("pyarrow validates its own ops")
+    with pytest.raises(ValueError, match="Unsupported filter op"):
+        read_table("peaks", filters=[("store_id", "~", 1)])
+
+
+def test_the_newer_file_is_read(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.chdir(tmp_path)
+    old = write_table("peaks", PEAKS, fmt="csv")
+    new = write_table("peaks", PEAKS.assign(peak_count=1), fmt="parquet")
+    os.utime(old, (1, 1))
+    assert existing_path("peaks") == new
+    assert read_table("peaks")["peak_count"].tolist() == [1] * 5
+
+
+def test_write_chunks_writes_one_row_group_per_chunk(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "peaks.parquet")
+    rows = write_chunks((PEAKS.iloc[i:i + 2] for i in range(0, 5, 2)), path, name="peaks")
+    assert rows == 5 and pq.ParquetFile(path).num_row_groups == 3
+    assert data_store.read_path(path).values.tolist() == PEAKS.values.tolist()
@@ -0,0 +1,41 @@
+# tests/test_embedding_cache.py
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    """Case-sensitive fake encoder that counts the texts it was asked to encode."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.stack([np.array([len(t), sum(c.isupper() for c in t)], dtype="float32") for t in texts])
+
+
+def test_cased_model_keeps_case_apart():
+    model = CountingModel()
+    cache = EmbeddingCache(model, "some-cased-model", disk_path=None)
+    a, b = cache.encode(["Next store", "next  store"])
+    assert a[1] == 1 and b[1] == 0
+    assert model.encoded == ["Next store", "next  store"]
+
+
+def test_uncased_model_folds_case_and_whitespace():
+    model = CountingModel()
+    cache = EmbeddingCache(model, "all-MiniLM-L6-v2", disk_path=None)
+    cache.encode(["Next store", "next  store"])
+    assert len(model.encoded) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lowercase_option_overrides_the_model_list(tmp_path):
+    model = CountingModel()
+    cache = EmbeddingCache(model, "all-MiniLM-L6-v2", disk_path=str(tmp_path / "c.sqlite"), lowercase=False)
+    cache.encode(["A", "a"])
+    assert model.encoded == ["A", "a"]
+    cache.clear()
+    cache.encode(["A"])
+    assert cache.stats()["disk_hits"] == 1
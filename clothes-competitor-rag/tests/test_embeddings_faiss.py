@@ -0,0 +1,85 @@
+# tests/test_embeddings_faiss.py
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("faiss")
+
+import model_registry
+from data_store import write_table
+from meta_store import MetaStore
+
+DIM = 16
+
+
+class HashEncoder:
+    """Deterministic stand-in for the SentenceTransformer (no model download)."""
+
+    def encode(self, texts, **kwargs):
+        out = []
+        for t in texts:
+            seed = int(hashlib.sha1(t.encode("utf8")).hexdigest()[:8], 16)
+            out.append(np.random.default_rng(seed).random(DIM, dtype="float32"))
+        return np.stack(out)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(model_registry._models, model_registry.EMBED_MODEL, HashEncoder())
+    import embeddings_faiss
+    return embeddings_faiss
+
+
+def write_data(n_stores, peak_of=lambda sid: 10):
+    ids = list(range(1, n_stores + 1))
+    write_table("stores", pd.DataFrame(dict(store_id=ids, name=[f"Store {i}" for i in ids],
+                                            address=[f"{i} Main St" for i in ids],
+                                            lat=[51.0 + i / 100 for i in ids], lon=[0.0] * n_stores)))
+    write_table("peaks", pd.DataFrame(dict(store_id=ids, peak_hour=[peak_of(i) for i in ids],
+                                           peak_count=[100 + i for i in ids])))
+
+
+def stored_vectors():
+    s = MetaStore()
+    try:
+        rows, emb = s.rows(), s.embeddings()
+        return {sid: np.asarray(emb[r]) for sid, r in rows.items()}, s.info()
+    finally:
+        s.close()
+
+
+def test_incremental_updates_match_a_full_build_and_stay_bounded(workdir):
+    write_data(6)
+    workdir.build_vector_store("flat")
+    for night in range(1, 4):
+        write_data(6, peak_of=lambda sid: 10 + night if sid <= 2 else 10)
+        summary = workdir.update_vector_store()
+        assert summary["changed"] == [1, 2] and not summary["rebuilt"]
+        vectors, info = stored_vectors()
+        # 2 of 6 rows superseded per night: compaction keeps the matrix near the corpus size
+        assert info["n_rows"] <= 6 / (1 - 0.25)
+
+    ids, docs, _ = workdir.make_documents()
+    expected = dict(zip(ids, HashEncoder().encode(docs)))
+    assert vectors.keys() == expected.keys()
+    for sid in ids:
+        np.testing.assert_array_equal(vectors[sid], expected[sid])
+
+    idx, _ = workdir.load_index(workdir.INDEX_PATH)
+    _, labels = idx.search(np.stack([expected[2]]), 1)
+    assert labels[0, 0] == 2
+
+
+def test_deleted_stores_leave_the_index_and_store(workdir):
+    write_data(5)
+    workdir.build_vector_store("flat")
+    write_data(4)
+    summary = workdir.update_vector_store()
+    assert summary["deleted"] == [5]
+    vectors, _ = stored_vectors()
+    assert sorted(vectors) == [1, 2, 3, 4]
+    idx, _ = workdir.load_index(workdir.INDEX_PATH)
+    assert idx.ntotal == 4
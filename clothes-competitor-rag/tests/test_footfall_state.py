@@ -0,0 +1,110 @@
+# tests/test_footfall_state.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import TIMESTAMP_FORMAT, write_chunks
+from footfall_state import FootfallState
+from preprocess import aggregate_in_memory, peak_hours
+
+
+def footfall(n_hours=48, stores=(1, 2, 3), seed=1):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2024-03-01", periods=n_hours, freq="h")
+    df = pd.DataFrame([(s, t) for t in ts for s in stores], columns=["store_id", "timestamp"])
+    df["footfall"] = rng.integers(0, 500, len(df))
+    return df
+
+
+def csv_text(df, header=True):
+    return df.assign(timestamp=df["timestamp"].dt.strftime(TIMESTAMP_FORMAT)).to_csv(index=False, header=header)
+
+
+@pytest.fixture
+def state(tmp_path):
+    s = FootfallState(str(tmp_path / "state.sqlite"))
+    yield s
+    s.close()
+
+
+def assert_matches_full_run(state, path):
+    expected = aggregate_in_memory(path).rename("footfall").reset_index()
+    hourly = state.hourly_frame()
+    assert hourly.values.tolist() == expected[["store_id", "hour", "footfall"]].values.tolist()
+    peaks = peak_hours(expected).reset_index(drop=True)
+    assert state.peaks_frame().values.tolist() == peaks.values.tolist()
+
+
+def test_appended_csv_rows_fold_in_like_a_full_run(tmp_path, state):
+    df = footfall()
+    path = tmp_path / "footfall.csv"
+    path.write_text(csv_text(df.iloc[:40]))
+    first = state.update(str(path), chunksize=16)
+    assert first["new_rows"] == 40 and first["changed"] == [1, 2, 3]
+
+    # the next delivery ends in a half-written line, which waits for the run after
+    rest = csv_text(df.iloc[40:], header=False)
+    cut = rest.index("\n", len(rest) // 2) + 5
+    with open(path, "a") as f:
+        f.write(rest[:cut])
+    second = state.update(str(path), chunksize=16)
+    with open(path, "a") as f:
+        f.write(rest[cut:])
+    third = state.update(str(path), chunksize=16)
+    assert first["new_rows"] + second["new_rows"] + third["new_rows"] == len(df)
+    assert_matches_full_run(state, str(path))
+    assert state.watermarks()[2] == df["timestamp"].max().isoformat()
+
+    assert state.update(str(path))["new_rows"] == 0
+
+
+def test_redelivered_rows_are_not_counted_twice(tmp_path, state):
+    df = footfall()
+    path = tmp_path / "footfall.csv"
+    path.write_text(csv_text(df.iloc[:60]))
+    state.update(str(path))
+    # hours already folded in arrive again together with new ones
+    with open(path, "a") as f:
+        f.write(csv_text(df.iloc[45:], header=False))
+    summary = state.update(str(path))
+    assert summary["new_rows"] == len(df) - 60
+    path.write_text(csv_text(df))
+    assert_matches_full_run(state, str(path))
+
+
+def test_rewritten_csv_is_rescanned_behind_the_watermarks(tmp_path, state):
+    df = footfall()
+    path = tmp_path / "footfall.csv"
+    path.write_text(csv_text(df.iloc[:30]))
+    state.update(str(path))
+    # not an append: the file was regenerated with the full history
+    path.write_text(csv_text(df.sample(frac=1, random_state=0).sort_values("timestamp", kind="stable")))
+    assert state.update(str(path))["new_rows"] == len(df) - 30
+    assert_matches_full_run(state, str(path))
+
+
+def test_parquet_row_groups_fold_in_like_a_full_run(tmp_path, state):
+    df = footfall()
+    path = str(tmp_path / "footfall.parquet")
+    chunks = [df.iloc[i:i + 24] for i in range(0, len(df), 24)]
+    write_chunks(iter(chunks[:2]), path, name="footfall")
+    assert state.update(path)["new_rows"] == 48
+    write_chunks(iter(chunks), path, name="footfall")
+    assert state.update(path)["new_rows"] == len(df) - 48
+    assert_matches_full_run(state, path)
+
+
+def test_only_stores_whose_peak_moved_need_reembedding(tmp_path, state):
+    df = pd.DataFrame({"store_id": [1, 2, 1, 2],
+                       "timestamp": pd.to_datetime(["2024-03-01 09:00", "2024-03-01 09:00",
+                                                    "2024-03-01 10:00", "2024-03-01 10:00"]),
+                       "footfall": [10, 10, 5, 5]})
+    path = tmp_path / "footfall.csv"
+    path.write_text(csv_text(df))
+    assert state.update(str(path))["reembed"] == [1, 2]
+    more = pd.DataFrame({"store_id": [1, 2], "timestamp": pd.to_datetime(["2024-03-02 10:00"] * 2),
+                         "footfall": [20, 1]})
+    with open(path, "a") as f:
+        f.write(csv_text(more, header=False))
+    summary = state.update(str(path))
+    assert summary["changed"] == [1, 2] and summary["reembed"] == [1]
@@ -0,0 +1,52 @@
+# tests/test_geo_index.py
+import numpy as np
+import pytest
+
+from geo_index import GeoIndex, haversine_m
+
+
+@pytest.fixture
+def city():
+    rng = np.random.default_rng(3)
+    n = 2000
+    ids = np.arange(100, 100 + n)
+    # Bengaluru-sized spread (~20 km) with a dense cluster around one junction
+    lats = np.concatenate([12.9 + rng.random(n - 200) * 0.2, 12.9352 + rng.normal(0, 0.002, 200)])
+    lons = np.concatenate([77.5 + rng.random(n - 200) * 0.2, 77.6158 + rng.normal(0, 0.002, 200)])
+    return ids, lats, lons
+
+
+def brute(ids, lats, lons, lat, lon):
+    d = haversine_m(lat, lon, lats, lons)
+    order = np.argsort(d, kind="stable")
+    return [(int(ids[i]), float(d[i])) for i in order]
+
+
+@pytest.mark.parametrize("radius", [50, 400, 3000])
+def test_within_matches_brute_force(city, radius):
+    geo = GeoIndex(*city)
+    for lat, lon in [(12.9352, 77.6158), (12.91, 77.69), (13.2, 77.5)]:
+        expected = [(sid, d) for sid, d in brute(*city, lat, lon) if d <= radius]
+        assert geo.within(lat, lon, radius) == expected
+        assert sorted(geo.within(lat, lon, radius, ids_only=True).tolist()) == sorted(s for s, _ in expected)
+
+
+@pytest.mark.parametrize("k", [1, 7, 50])
+def test_nearest_matches_brute_force(city, k):
+    geo = GeoIndex(*city)
+    # inside the dense cluster, in a sparse corner and well outside the data
+    for lat, lon in [(12.9352, 77.6158), (12.905, 77.695), (13.5, 78.0)]:
+        assert geo.nearest(lat, lon, k) == brute(*city, lat, lon)[:k]
+
+
+def test_nearest_respects_max_radius(city):
+    geo = GeoIndex(*city)
+    hits = geo.nearest(12.9352, 77.6158, k=500, max_radius_m=300)
+    assert hits == [h for h in brute(*city, 12.9352, 77.6158) if h[1] <= 300][:500]
+    assert geo.nearest(13.5, 78.0, k=3, max_radius_m=1000) == []
+
+
+def test_empty_index():
+    geo = GeoIndex(np.array([], dtype="int64"), np.array([]), np.array([]))
+    assert geo.nearest(12.9, 77.6, 3) == []
+    assert geo.within(12.9, 77.6, 1000) == []
@@ -0,0 +1,116 @@
+# tests/test_meta_store.py
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+import meta_store
+from meta_store import MetaStore, apply_changes, compact, matrix_path, write_store
+
+DIM = 8
+
+
+def vec(seed):
+    return np.random.default_rng(seed).random(DIM, dtype="float32")
+
+
+def meta(ids):
+    return [dict(store_id=i, name=f"s{i}", lat=1.0 + i, lon=2.0) for i in ids]
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / "meta.sqlite"), str(tmp_path / "emb.npy")
+
+
+@pytest.fixture
+def store(paths):
+    ids = [1, 2, 3, 4]
+    write_store(ids, [f"doc {i}" for i in ids], meta(ids), np.stack([vec(i) for i in ids]), *paths)
+    s = MetaStore(*paths)
+    yield s
+    s.close()
+
+
+def read_vectors(paths):
+    s = MetaStore(*paths)
+    try:
+        rows = s.rows()
+        emb = s.embeddings()
+        return {sid: np.asarray(emb[row]) for sid, row in rows.items()}
+    finally:
+        s.close()
+
+
+def test_write_then_read(store, paths):
+    got = read_vectors(paths)
+    assert sorted(got) == [1, 2, 3, 4]
+    for sid, v in got.items():
+        np.testing.assert_array_equal(v, vec(sid))
+    assert store.docs_for([3, 99]) == ["doc 3", None]
+    assert store.rows_for([2, 99]) == {2: 1}
+
+
+def test_apply_changes_returns_the_new_vectors(store, paths, monkeypatch):
+    monkeypatch.setattr(meta_store, "COMPACT_RATIO", 10.0)  # keep the holes
+    apply_changes([2, 5], ["doc 2b", "doc 5"], meta([2, 5]), np.stack([vec(20), vec(5)]), [4], *paths)
+    got = read_vectors(paths)
+    assert sorted(got) == [1, 2, 3, 5]
+    np.testing.assert_array_equal(got[2], vec(20))
+    np.testing.assert_array_equal(got[5], vec(5))
+    np.testing.assert_array_equal(got[1], vec(1))
+    s = MetaStore(*paths)
+    assert s.info()["n_rows"] == 6 and s.info()["holes"] == 2
+    assert s.docs_for([2]) == ["doc 2b"]
+    s.close()
+
+
+def test_updates_append_in_place_until_compaction(store, paths):
+    generation = store.info()["generation"]
+    for n in range(1, 6):
+        compacted = apply_changes([1], [f"doc 1 v{n}"], meta([1]), vec(100 + n)[None], [], *paths)
+        info = MetaStore(*paths).info()
+        # 4 live rows: the second superseded row passes 25% holes and compacts
+        assert compacted == (info["generation"] != generation)
+        assert info["n_rows"] <= 5
+        generation = info["generation"]
+    got = read_vectors(paths)
+    np.testing.assert_array_equal(got[1], vec(105))
+    assert len(got) == 4
+
+
+def test_old_generations_are_pruned(store, paths):
+    for _ in range(3):
+        compact(*paths)
+    files = sorted(f for f in os.listdir(os.path.dirname(paths[0])) if f.endswith(".f32"))
+    generation = MetaStore(*paths).info()["generation"]
+    assert files == [os.path.basename(matrix_path(paths[1], g)) for g in (generation - 1, generation)]
+
+
+def test_reader_keeps_its_generation_across_a_full_write(store, paths):
+    rows = store.rows()
+    write_store([7], ["doc 7"], meta([7]), vec(7)[None], *paths)
+    # the open connection still sees the old database and its matrix
+    emb = store.embeddings()
+    np.testing.assert_array_equal(np.asarray(emb[rows[3]]), vec(3))
+    assert read_vectors(paths).keys() == {7}
+
+
+def test_legacy_npy_store_is_read_and_converted(paths):
+    db_path, emb_path = paths
+    ids = [1, 2]
+    write_store(ids, ["a", "b"], meta(ids), np.stack([vec(1), vec(2)]), db_path, emb_path)
+    # rebuild the pre-generation layout: no info table, matrix in the .npy
+    s = MetaStore(db_path, emb_path)
+    np.save(emb_path, np.asarray(s.embeddings()))
+    s.close()
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE info")
+    conn.commit()
+    conn.close()
+    assert read_vectors(paths)[2].tolist() == vec(2).tolist()
+    apply_changes([3], ["c"], meta([3]), vec(3)[None], [], db_path, emb_path)
+    got = read_vectors(paths)
+    assert sorted(got) == [1, 2, 3]
+    np.testing.assert_array_equal(got[3], vec(3))
@@ -0,0 +1,103 @@
+# tests/test_pipeline.py
+import json
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+@pytest.fixture
+def make(tmp_path, monkeypatch):
+    """raw.txt -(double)-> doubled.txt -(total)-> total.txt, plus an unrelated copy stage."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "raw.txt").write_text("1 2 3")
+    (tmp_path / "other.txt").write_text("x")
+    calls = []
+
+    def double():
+        calls.append("double")
+        nums = open("raw.txt").read().split()
+        open("doubled.txt", "w").write(" ".join(str(2 * int(n)) for n in nums))
+
+    def total():
+        calls.append("total")
+        open("total.txt", "w").write(str(sum(int(n) for n in open("doubled.txt").read().split())))
+
+    def copy():
+        calls.append("copy")
+        open("copy.txt", "w").write(open("other.txt").read())
+
+    def build():
+        return Pipeline([Stage("double", double, ["raw.txt"], ["doubled.txt"]),
+                         Stage("total", total, ["doubled.txt"], ["total.txt"]),
+                         Stage("copy", copy, ["other.txt"], ["copy.txt"])],
+                        state_path="state/pipeline_state.json", log_path="state/runs.jsonl")
+    return build, calls
+
+
+def statuses(records):
+    return {r["stage"]: r["status"] for r in records}
+
+
+def test_fresh_stages_are_skipped_and_changes_propagate(make, tmp_path):
+    build, calls = make
+    assert statuses(build().run()) == dict(double="ran", total="ran", copy="ran")
+    assert (tmp_path / "total.txt").read_text() == "12"
+    assert statuses(build().run()) == dict(double="skipped", total="skipped", copy="skipped")
+
+    (tmp_path / "raw.txt").write_text("1 2 3 4")
+    calls.clear()
+    assert statuses(build().run()) == dict(double="ran", total="ran", copy="skipped")
+    assert sorted(calls) == ["double", "total"] and (tmp_path / "total.txt").read_text() == "20"
+    assert len((tmp_path / "state/runs.jsonl").read_text().splitlines()) == 3
+
+
+def test_rewriting_identical_content_does_not_rerun(make, tmp_path):
+    build, calls = make
+    build().run()
+    (tmp_path / "raw.txt").write_text("1 2 3")
+    assert set(statuses(build().run()).values()) == {"skipped"}
+
+
+def test_dry_run_marks_dependents_and_changes_nothing(make, tmp_path):
+    build, calls = make
+    build().run()
+    state = (tmp_path / "state/pipeline_state.json").read_text()
+    (tmp_path / "raw.txt").write_text("5")
+    calls.clear()
+    records = build().run(dry_run=True)
+    assert statuses(records) == {"double": "would run", "total": "would run", "copy": "skipped"}
+    assert calls == [] and (tmp_path / "total.txt").read_text() == "12"
+    assert (tmp_path / "state/pipeline_state.json").read_text() == state
+
+
+def test_missing_or_edited_outputs_and_force_rerun_a_stage(make, tmp_path):
+    build, calls = make
+    build().run()
+    (tmp_path / "copy.txt").unlink()
+    assert statuses(build().run())["copy"] == "ran"
+    (tmp_path / "total.txt").write_text("hand edited")
+    assert statuses(build().run()) == dict(double="skipped", total="ran", copy="skipped")
+    assert statuses(build().run(force=["double"])) == dict(double="ran", total="skipped", copy="skipped")
+    with pytest.raises(ValueError, match="Unknown stage"):
+        build().run(force=["nope"])
+
+
+def test_a_failed_stage_keeps_what_finished_before_it(make, tmp_path):
+    build, calls = make
+    pipe = build()
+
+    def boom():
+        raise OSError("disk full")
+
+    pipe.stages["total"].fn = boom
+    with pytest.raises(RuntimeError, match="'total' failed: disk full"):
+        pipe.run()
+    saved = json.loads((tmp_path / "state/pipeline_state.json").read_text())["stages"]
+    assert "double" in saved and "total" not in saved
+    assert statuses(build().run())["double"] == "skipped"
+
+
+def test_cycles_are_rejected():
+    with pytest.raises(ValueError, match="cycle"):
+        Pipeline([Stage("a", None, ["b.txt"], ["a.txt"]), Stage("b", None, ["a.txt"], ["b.txt"])])
@@ -0,0 +1,58 @@
+# tests/test_preprocess.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_store import TIMESTAMP_FORMAT, write_chunks
+from preprocess import aggregate_in_memory, aggregate_streaming, peak_hours, shard_ranges
+
+
+def footfall(n_hours=72, stores=(1, 2, 3, 4), seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2024-01-01", periods=n_hours, freq="h")
+    df = pd.DataFrame([(s, t) for t in ts for s in stores], columns=["store_id", "timestamp"])
+    df["footfall"] = rng.integers(0, 500, len(df))
+    return df
+
+
+def write_csv(df, path):
+    df.assign(timestamp=df["timestamp"].dt.strftime(TIMESTAMP_FORMAT)).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return write_csv(footfall(), tmp_path / "footfall.csv")
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_streaming_csv_matches_in_memory(csv_path, workers):
+    expected = aggregate_in_memory(csv_path)
+    got = aggregate_streaming(csv_path, chunksize=37, workers=workers)
+    pd.testing.assert_series_equal(got, expected, check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_streaming_parquet_row_groups_match_in_memory(tmp_path, workers):
+    df = footfall()
+    path = str(tmp_path / "footfall.parquet")
+    write_chunks((df.iloc[i:i + 50] for i in range(0, len(df), 50)), path, name="footfall")
+    expected = aggregate_in_memory(path)
+    got = aggregate_streaming(path, chunksize=16, workers=workers)
+    pd.testing.assert_series_equal(got, expected, check_names=False, check_dtype=False)
+
+
+def test_shard_ranges_are_newline_aligned_and_cover_the_data(csv_path):
+    ranges = shard_ranges(csv_path, 4)
+    with open(csv_path, "rb") as f:
+        data = f.read()
+    header = data.index(b"\n") + 1
+    assert ranges[0][0] == header and ranges[-1][1] == len(data)
+    assert all(b == c for (_, b), (c, _) in zip(ranges, ranges[1:]))
+    assert all(data[a - 1:a] == b"\n" for a, _ in ranges)
+
+
+def test_peak_hours_takes_the_first_hour_on_ties():
+    agg = pd.DataFrame({"store_id": [1, 1, 1, 2], "hour": [8, 9, 10, 3], "footfall": [5, 7, 7, 1]})
+    peaks = peak_hours(agg)
+    assert peaks.values.tolist() == [[1, 9, 7], [2, 3, 1]]
@@ -0,0 +1,54 @@
+# tests/test_rag_query.py
+import faiss
+import numpy as np
+import pytest
+
+import rag_query
+from meta_store import MetaStore, write_store
+
+DIM = 8
+N = 200
+
+
+@pytest.fixture
+def setup(tmp_path):
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, N + 1, dtype="int64") * 10
+    emb = rng.random((N, DIM), dtype="float32")
+    meta = [dict(store_id=int(i), name=f"s{i}", lat=1.0, lon=2.0) for i in ids]
+    paths = str(tmp_path / "meta.sqlite"), str(tmp_path / "emb.npy")
+    write_store(ids, [f"doc {i}" for i in ids], meta, emb, *paths)
+    idx = faiss.IndexIDMap2(faiss.IndexFlatL2(DIM))
+    idx.add_with_ids(emb, ids)
+    store = MetaStore(*paths)
+    yield idx, store, dict(zip(ids.tolist(), emb)), rng.random((5, DIM), dtype="float32")
+    store.close()
+
+
+def brute_force(vectors, q_emb, k, allowed):
+    out = []
+    for q in q_emb:
+        d = sorted((float(((vectors[s] - q) ** 2).sum()), s) for s in allowed if s in vectors)
+        out.append([s for _, s in d[:k]])
+    return out
+
+
+@pytest.mark.parametrize("exact_max", [rag_query.EXACT_FILTER_MAX, 0])
+def test_filtered_search_matches_brute_force(setup, monkeypatch, exact_max):
+    # exact_max=0 forces the over-fetch path through the index
+    monkeypatch.setattr(rag_query, "EXACT_FILTER_MAX", exact_max)
+    idx, store, vectors, q_emb = setup
+    retriever = rag_query.FaissRetriever(encoder=object())
+    # every 7th store plus an id that is not in the store at all
+    allowed = np.asarray(sorted(list(vectors)[::7] + [99999]), dtype="int64")
+    D, I = retriever._vector_search(idx, store, q_emb, 5, allowed)
+    assert I.tolist() == brute_force(vectors, q_emb, 5, allowed.tolist())
+    assert np.all(np.diff(D, axis=1) >= 0)
+
+
+def test_filtered_search_pads_when_fewer_than_k_allowed(setup):
+    idx, store, vectors, q_emb = setup
+    retriever = rag_query.FaissRetriever(encoder=object())
+    D, I = retriever._vector_search(idx, store, q_emb, 4, np.asarray([10, 20], dtype="int64"))
+    assert sorted(I[0, :2]) == [10, 20] and I[0, 2:].tolist() == [-1, -1]
+    assert np.isinf(D[:, 2:]).all()
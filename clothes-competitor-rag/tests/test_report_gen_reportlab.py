@@ -0,0 +1,47 @@
+# tests/test_report_gen_reportlab.py
+import os
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("reportlab")
+
+from data_store import write_table
+import report_gen_reportlab as reports
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_table("stores", pd.DataFrame(dict(store_id=[1, 2], name=["North", "South"], address=["1 A St", "2 B St"],
+                                            lat=[51.5, 51.4], lon=[-0.1, -0.2])))
+    write_table("peaks", pd.DataFrame(dict(store_id=[2, 1], peak_hour=[17, 12], peak_count=[300, 250])))
+    return tmp_path
+
+
+def is_pdf(path):
+    with open(path, "rb") as f:
+        return f.read(5) == b"%PDF-"
+
+
+def test_resources_hold_the_merged_peaks_table(data_dir):
+    res = reports.load_resources()
+    assert res.peaks_error is None
+    header, *rows = res.peaks_data
+    assert header[:3] == ["store_id", "peak_hour", "peak_count"] and "name" in header
+    assert sorted(r[header.index("name")] for r in rows) == ["North", "South"]
+
+
+def test_missing_tables_still_render_a_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    res = reports.load_resources()
+    assert res.peaks_data is None and res.peaks_error is not None
+    assert is_pdf(reports.make_report("q", "a", str(tmp_path / "r.pdf"), resources=res, quiet=True))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_writes_one_pdf_per_item_and_a_combined_one(data_dir, workers):
+    items = [(f"Query {i}", f"Answer {i}\nsecond line") for i in range(3)]
+    paths = reports.make_reports(items, out_dir="out", workers=workers, combined_pdf="all.pdf", chunksize=1)
+    assert paths == [os.path.join("out", f"report_{i:04d}.pdf") for i in range(3)]
+    assert all(is_pdf(p) for p in paths + ["all.pdf"])